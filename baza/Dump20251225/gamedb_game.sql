@@ -38,7 +38,11 @@ CREATE TABLE `game` (
   `creator` varchar(40) DEFAULT NULL,
   `steam_appid` int DEFAULT NULL,
   `peak_24h_players` int DEFAULT NULL,
-  PRIMARY KEY (`id_game`)
+  PRIMARY KEY (`id_game`),
+  KEY `idx_game_release` (`release_date` DESC,`name`,`id_game`),
+  KEY `idx_game_name` (`name`,`id_game`),
+  KEY `idx_game_price` (`price`,`id_game`),
+  KEY `idx_game_price_desc` (`price` DESC,`id_game`)
 ) ENGINE=InnoDB AUTO_INCREMENT=222 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
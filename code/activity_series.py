@@ -0,0 +1,149 @@
+# activity_series.py – historia liczby graczy jako tablice NumPy + gotowe agregaty
+# dzienne / tygodniowe / miesięczne, trzymane w pamięci per appid
+
+import datetime as _dt
+import json
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+MIN_TIMESTAMP_MS = 946684800000   # 2000-01-01 – starsze punkty w chart-data.json to śmieci
+MS_PER_DAY = 86_400_000
+SERIES_TTL = 15 * 60              # po ilu sekundach przeładować serię z bazy
+LEVELS = ("day", "week", "month")
+LEVEL_LABELS = {"day": "dzienna", "week": "tygodniowa", "month": "miesięczna"}
+WEEKLY_FROM_DAYS = 3 * 365        # dłuższe zakresy rysujemy ze średnich tygodniowych
+MONTHLY_FROM_DAYS = 12 * 365      # ...a bardzo długie z miesięcznych
+_EPOCH = _dt.date(1970, 1, 1)
+
+
+def epoch_day(d: Optional[_dt.date] = None) -> int:
+    """Numer dnia od 1970-01-01 (domyślnie dziś)."""
+    return ((d or _dt.date.today()) - _EPOCH).days
+
+
+def pick_level(span_days: int) -> str:
+    if span_days >= MONTHLY_FROM_DAYS:
+        return "month"
+    if span_days >= WEEKLY_FROM_DAYS:
+        return "week"
+    return "day"
+
+
+# === Wczytanie chart-data.json ===
+def ingest_points(points) -> tuple[np.ndarray, np.ndarray]:
+    """
+    [[timestamp_ms, gracze], ...] (lista albo surowy JSON) -> (int64 ms, uint32 gracze),
+    posortowane, bez punktów sprzed 2000 r., z przyszłości i z zerową liczbą graczy.
+    """
+    if isinstance(points, (bytes, str)):
+        points = json.loads(points)
+    if not points:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint32)
+
+    arr = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    ts, players = arr[:, 0], arr[:, 1]
+    now_ms = time.time() * 1000 + MS_PER_DAY
+    keep = (ts >= MIN_TIMESTAMP_MS) & (ts < now_ms) & np.isfinite(players) & (players > 0)
+    ts = ts[keep].astype(np.int64)
+    players = np.minimum(players[keep], np.iinfo(np.uint32).max).astype(np.uint32)
+    order = np.argsort(ts, kind="stable")
+    return ts[order], players[order]
+
+
+def daily_rollup(ts_ms: np.ndarray, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(dni od 1970-01-01 jako int64, średnia dzienna float64)."""
+    if not len(ts_ms):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    days = ts_ms // MS_PER_DAY
+    uniq, inv = np.unique(days, return_inverse=True)
+    means = np.bincount(inv, weights=players.astype(np.float64)) / np.bincount(inv)
+    return uniq.astype(np.int64), means
+
+
+def rollup(days: np.ndarray, values: np.ndarray, level: str) -> tuple[np.ndarray, np.ndarray]:
+    """Średnie tygodniowe (od poniedziałku) lub miesięczne; x = pierwszy dzień okresu."""
+    if level == "day" or not len(days):
+        return days, values
+    if level == "week":
+        start = days - (days + 3) % 7          # 1970-01-01 to czwartek
+    elif level == "month":
+        start = days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    else:
+        raise ValueError(f"Nieznany poziom agregacji: {level}")
+    uniq, inv = np.unique(start, return_inverse=True)
+    means = np.bincount(inv, weights=values) / np.bincount(inv)
+    return uniq, means
+
+
+# === Seria w pamięci ===
+class ActivitySeries:
+    """Dzienne dane gry + agregaty liczone raz; zmiana zakresu to tylko searchsorted i wycinek."""
+
+    def __init__(self, days: np.ndarray, values: np.ndarray):
+        days = np.asarray(days, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(days, kind="stable")
+        self.levels: dict[str, tuple[np.ndarray, np.ndarray]] = {"day": (days[order], values[order])}
+        for level in LEVELS[1:]:
+            self.levels[level] = rollup(*self.levels["day"], level)
+        self.loaded_at = time.monotonic()
+        self._extra: dict = {}   # dowolne dane pochodne (np. piramidy do wykresu)
+
+    def __len__(self) -> int:
+        return len(self.levels["day"][0])
+
+    @property
+    def last_day(self) -> Optional[int]:
+        days = self.levels["day"][0]
+        return int(days[-1]) if len(days) else None
+
+    def slice(self, level: str = "day", from_day: Optional[int] = None,
+              to_day: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        days, values = self.levels[level]
+        lo = 0 if from_day is None else int(np.searchsorted(days, from_day, side="left"))
+        hi = len(days) if to_day is None else int(np.searchsorted(days, to_day, side="right"))
+        return days[lo:hi], values[lo:hi]
+
+    def derived(self, key, build):
+        """Wynik build() zapamiętany przy serii (np. DownsamplePyramid danego poziomu)."""
+        if key not in self._extra:
+            self._extra[key] = build()
+        return self._extra[key]
+
+
+def days_to_datetime64(days: np.ndarray) -> np.ndarray:
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]")
+
+
+_cache: dict[int, ActivitySeries] = {}
+_cache_lock = threading.Lock()
+
+
+def get_activity_series(appid: int, loader, ttl: float = SERIES_TTL) -> ActivitySeries:
+    """
+    Seria z pamięci albo z loader(appid) -> [(date, gracze), ...] (np. load_daily_stats).
+    """
+    appid = int(appid)
+    with _cache_lock:
+        series = _cache.get(appid)
+    if series is not None and time.monotonic() - series.loaded_at < ttl:
+        return series
+
+    rows = loader(appid)
+    days = np.fromiter((epoch_day(d) for d, _ in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((p for _, p in rows), dtype=np.float64, count=len(rows))
+    series = ActivitySeries(days, values)
+    with _cache_lock:
+        _cache[appid] = series
+    return series
+
+
+def invalidate_activity_series(appid: Optional[int] = None) -> None:
+    with _cache_lock:
+        if appid is None:
+            _cache.clear()
+        else:
+            _cache.pop(int(appid), None)
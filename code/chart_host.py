@@ -0,0 +1,217 @@
+# chart_host.py – jedna figura i jedno płótno na panel wykresu; zmiana wyboru w liście
+# podmienia tylko dane artystów (wysokości słupków, etykiety, punkty) i woła draw_idle
+#   ChartHost – figura + płótno Tk + zdarzenia podpinane raz,
+#   BarSeries – pula prostokątów i podpisów wartości używana ponownie przy każdym wyborze,
+#   WindowedBarSeries – to samo, ale rysuje tylko słupki w widocznym oknie (przewijanie).
+
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from matplotlib.patches import Rectangle
+
+from analysis_ui_styles import BORDER_COLOR, CHART_AX_FACE, CHART_FACE
+from figure_lifecycle import attach_canvas, new_figure
+
+
+class ChartHost:
+    """
+    Figura, oś i FigureCanvasTkAgg tworzone raz dla ramki `master`. Zdarzenia mpl
+    podpina się przez connect() (też raz), a draw_chart() w generatorach tylko zmienia
+    dane i woła draw(). Figura pochodzi z figure_lifecycle – zniszczenie panelu ją zwalnia.
+    """
+
+    def __init__(self, master, figsize=(10, 6), face: str = CHART_FACE, ax_face: str = CHART_AX_FACE,
+                 spine_color: Optional[str] = BORDER_COLOR, **figure_kw):
+        self.face = face
+        self.ax_face = ax_face
+        self.spine_color = spine_color
+        self.fig = new_figure(figsize=figsize, facecolor=face, **figure_kw)
+        self.ax = self.fig.add_subplot()
+        self._style_axes()
+
+        self.canvas = attach_canvas(self.fig, master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(fill="both", expand=True)
+        self._cids: list[int] = []
+
+    def _style_axes(self) -> None:
+        self.ax.set_facecolor(self.ax_face)
+        if self.spine_color:
+            for spine in self.ax.spines.values():
+                spine.set_color(self.spine_color)
+
+    def connect(self, event: str, handler: Callable) -> int:
+        cid = self.canvas.mpl_connect(event, handler)
+        self._cids.append(cid)
+        return cid
+
+    def disconnect(self) -> None:
+        for cid in self._cids:
+            self.canvas.mpl_disconnect(cid)
+        self._cids = []
+
+    def reset_axes(self) -> None:
+        """Dla wykresów bez stałych artystów (kołowe) – czyści oś, figura i płótno zostają."""
+        self.ax.clear()
+        self._style_axes()
+
+    def clear(self) -> None:
+        """Pusty wykres (np. brak danych dla wybranej pozycji)."""
+        self.reset_axes()
+        self.draw()
+
+    def draw(self) -> None:
+        self.canvas.draw_idle()
+
+
+class BarSeries:
+    """
+    Słupki na pozycjach 0..n-1 z podpisem wartości nad każdym. Prostokąty i podpisy
+    są dokładane do puli tylko, gdy nowy wybór ma więcej słupków niż dotąd; nadmiarowe
+    są ukrywane.
+    """
+
+    def __init__(self, ax, color: str, width: float = 0.8, value_fmt: str = "{:.0f}",
+                 value_color: str = "white", fontsize: int = 9,
+                 tick_color: str = "white", tick_rotation: int = 45):
+        self.ax = ax
+        self.color = color
+        self.width = width
+        self.value_fmt = value_fmt
+        self.value_color = value_color
+        self.fontsize = fontsize
+        self.tick_color = tick_color
+        self.tick_rotation = tick_rotation
+        self.bars: list[Rectangle] = []
+        self.texts: list = []
+        self.labels: list[str] = []
+        self.values = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _grow(self, n: int) -> None:
+        while len(self.bars) < n:
+            rect = Rectangle((0, 0), self.width, 0, color=self.color)
+            self.ax.add_patch(rect)
+            self.bars.append(rect)
+            self.texts.append(self.ax.annotate(
+                "", xy=(0, 0), xytext=(0, 3), textcoords="offset points",
+                ha="center", va="bottom", fontsize=self.fontsize, color=self.value_color))
+
+    def _render(self, lo: int, hi: int) -> None:
+        """Wiąże pulę artystów ze słupkami lo..hi-1 (reszta puli ukryta) i ustawia ich etykiety osi."""
+        self._grow(hi - lo)
+        values = self.values
+        for k, (rect, text) in enumerate(zip(self.bars, self.texts)):
+            i = lo + k
+            visible = i < hi
+            rect.set_visible(visible)
+            text.set_visible(visible)
+            if visible:
+                h = values[i]
+                rect.set_x(i - self.width / 2)
+                rect.set_height(h)
+                text.xy = (i, h)
+                text.set_text(self.value_fmt.format(h))
+
+        self.ax.set_xticks(range(lo, hi))
+        self.ax.set_xticklabels(self.labels[lo:hi], rotation=self.tick_rotation, ha="right",
+                                fontsize=self.fontsize, color=self.tick_color)
+
+    def _set_arrays(self, labels: Sequence[str], values: Sequence[float]) -> None:
+        self.labels = list(labels)
+        self.values = np.asarray(values, dtype=np.float64)
+        top = float(self.values.max()) if len(self.values) else 1.0
+        self.ax.set_ylim(0, top * 1.1 if top > 0 else 1.0)
+
+    def set_data(self, labels: Sequence[str], values: Sequence[float]) -> None:
+        self._set_arrays(labels, values)
+        n = len(self.values)
+        self._render(0, n)
+        self.ax.set_xlim(-0.5, n - 0.5 if n else 0.5)
+
+
+BAR_WINDOW = 25   # ile słupków widać naraz w WindowedBarSeries
+
+
+class WindowedBarSeries(BarSeries):
+    """
+    Pełne dane w tablicach, na osi tylko okno `window` słupków: pula ma stały rozmiar
+    (okno + 2), a przewijanie/przeciąganie przesuwa xlim i przepina artystów na słupki
+    w nowym oknie. Czas rysowania nie zależy od liczby gier.
+    """
+
+    def __init__(self, ax, color: str, window: int = BAR_WINDOW, **kwargs):
+        super().__init__(ax, color, **kwargs)
+        self.window = max(1, int(window))
+        self.left = -0.5
+        self._span = (0, 0)
+
+    @property
+    def visible_width(self) -> float:
+        return float(min(self.window, max(len(self.values), 1)))
+
+    def set_data(self, labels: Sequence[str], values: Sequence[float]) -> None:
+        self._set_arrays(labels, values)
+        self._span = (-1, -1)
+        self.scroll_to(-0.5)
+
+    def scroll_to(self, left: float) -> None:
+        n = len(self.values)
+        width = self.visible_width
+        left = max(-0.5, min(float(left), n - 0.5 - width))
+        self.left = left
+        self.ax.set_xlim(left, left + width)
+
+        lo = max(0, int(np.floor(left + 0.5 - self.width / 2)))
+        hi = min(n, int(np.ceil(left + width - 0.5 + self.width / 2)) + 1)
+        if (lo, hi) != self._span:   # samo przesunięcie w obrębie tych samych słupków – bez przepinania
+            self._span = (lo, hi)
+            self._render(lo, hi)
+
+    def pan(self, dx: float) -> None:
+        self.scroll_to(self.left + dx)
+
+
+def attach_bar_pan(host: ChartHost, series: WindowedBarSeries, step: float = 1.0) -> None:
+    """Kółko przesuwa okno o `step` słupków, przeciąganie lewym przyciskiem – płynnie."""
+    ax = host.ax
+    pan_start = {"x": None}
+
+    def on_scroll(event):
+        series.pan(-step if event.step > 0 else step)
+        host.draw()
+
+    def on_press(event):
+        if event.button == 1 and event.inaxes == ax:
+            pan_start["x"] = event.xdata
+
+    def on_release(_event):
+        pan_start["x"] = None
+
+    def on_motion(event):
+        if pan_start["x"] is not None and event.inaxes == ax and event.xdata is not None:
+            series.pan(pan_start["x"] - event.xdata)
+            pan_start["x"] = event.xdata
+            host.draw()
+
+    host.connect("scroll_event", on_scroll)
+    host.connect("button_press_event", on_press)
+    host.connect("button_release_event", on_release)
+    host.connect("motion_notify_event", on_motion)
+
+
+def update_scatter(collection, x, y, margin: float = 0.05) -> None:
+    """Nowe punkty istniejącego scatter (set_offsets) + granice osi z marginesem; NaN pomijane."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    collection.set_offsets(np.column_stack([x, y]) if len(x) else np.empty((0, 2)))
+    ok = np.isfinite(x) & np.isfinite(y)
+    if not ok.any():
+        return
+    ax = collection.axes
+    for setter, v in ((ax.set_xlim, x[ok]), (ax.set_ylim, y[ok])):
+        lo, hi = float(v.min()), float(v.max())
+        pad = (hi - lo) * margin or 1.0
+        setter(lo - pad, hi + pad)
@@ -0,0 +1,186 @@
+# chart_hover.py – wspólna obsługa podpowiedzi po najechaniu na wykres
+#   LineHoverIndex    – najbliższy punkt linii: bisekcja po posortowanym x, O(log n),
+#   ScatterHoverIndex – punkty rozrzutu w siatce pikseli (kubełki), sprawdzane tylko 3x3 sąsiednie,
+#   HoverEngine       – łączy indeks z adnotacją; przerysowuje tylko adnotację (blit).
+
+from typing import Callable, Optional
+
+import numpy as np
+
+DEFAULT_HIT_RADIUS_PX = 6.0
+
+
+class LineHoverIndex:
+    """Punkty linii posortowane po x; nearest() zwraca indeks punktu najbliższego w poziomie."""
+
+    def __init__(self, x=(), y=()):
+        self.set_data(x, y)
+
+    def set_data(self, x, y) -> None:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) > 1 and np.any(x[1:] < x[:-1]):
+            order = np.argsort(x, kind="stable")
+            x, y = x[order], y[order]
+        self.x, self.y = x, y
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def nearest(self, event) -> Optional[int]:
+        if event.xdata is None or not len(self.x):
+            return None
+        i = int(np.searchsorted(self.x, event.xdata))
+        if i >= len(self.x):
+            return len(self.x) - 1
+        if i > 0 and event.xdata - self.x[i - 1] <= self.x[i] - event.xdata:
+            return i - 1
+        return i
+
+
+class ScatterHoverIndex:
+    """
+    Siatka w pikselach ekranu o boku = promień trafienia. Budowana leniwie i ponownie tylko
+    wtedy, gdy zmienią się granice osi lub rozmiar wykresu (zoom, pan, resize).
+    nearest() zwraca indeks punktu w oryginalnej kolejności danych albo None.
+    """
+
+    def __init__(self, ax, x, y, radius_px: Optional[float] = None, collection=None):
+        self.ax = ax
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if radius_px is None:
+            radius_px = marker_radius_px(collection, ax.figure.dpi) if collection is not None else DEFAULT_HIT_RADIUS_PX
+        self.radius = max(1.0, float(radius_px))
+        self._ids = np.flatnonzero(np.isfinite(self.x) & np.isfinite(self.y))
+        self._view = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _view_key(self):
+        return (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()), tuple(self.ax.bbox.bounds))
+
+    def _build(self) -> None:
+        ids = self._ids
+        pts = self.ax.transData.transform(np.column_stack([self.x[ids], self.y[ids]]))
+        cells = np.floor(pts / self.radius).astype(np.int64)
+        keys = _cell_key(cells[:, 0], cells[:, 1])
+        order = np.argsort(keys, kind="stable")
+        self._px = pts[order]
+        self._sorted_ids = ids[order]
+        self._keys, self._starts = np.unique(keys[order], return_index=True)
+        self._ends = np.append(self._starts[1:], len(order))
+
+    def nearest(self, event) -> Optional[int]:
+        if not len(self._ids) or event.x is None or event.y is None:
+            return None
+        if getattr(event, "button", None) is not None:
+            return None   # przeciąganie (pan) – nie przebudowujemy siatki przy każdym ruchu
+        view = self._view_key()
+        if view != self._view:
+            self._build()
+            self._view = view
+
+        cx, cy = int(np.floor(event.x / self.radius)), int(np.floor(event.y / self.radius))
+        probe = _cell_key(np.arange(cx - 1, cx + 2).repeat(3), np.tile(np.arange(cy - 1, cy + 2), 3))
+        pos = np.searchsorted(self._keys, probe)
+        valid = pos < len(self._keys)
+        pos = pos[valid][self._keys[pos[valid]] == probe[valid]]
+        if not len(pos):
+            return None
+
+        cand = np.concatenate([np.arange(self._starts[p], self._ends[p]) for p in pos])
+        d2 = ((self._px[cand] - (event.x, event.y)) ** 2).sum(axis=1)
+        best = int(np.argmin(d2))
+        if d2[best] > self.radius ** 2:
+            return None
+        return int(self._sorted_ids[cand[best]])
+
+
+def _cell_key(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    return (cx << 32) ^ (cy & 0xFFFFFFFF)
+
+
+def marker_radius_px(collection, dpi: float) -> float:
+    """Promień znacznika rozrzutu w pikselach (rozmiar s jest w pt², jak w scatter())."""
+    sizes = collection.get_sizes() if collection is not None else ()
+    size_pt2 = float(np.max(sizes)) if len(sizes) else 36.0
+    return max(DEFAULT_HIT_RADIUS_PX / 2, np.sqrt(size_pt2) / 2 * dpi / 72.0 + 1)
+
+
+class HoverEngine:
+    """
+    Łączy indeks (nearest(event) -> idx | None) z adnotacją. Adnotacja jest "animowana":
+    pełne rysowanie jej pomija, a po każdym draw_event zapamiętujemy tło i rysujemy ją
+    osobno. Ruch myszy zmienia tylko adnotację: restore_region + draw_artist + blit,
+    a gdy wskazany punkt się nie zmienił – nic.
+
+    update(idx, event) ustawia treść/pozycję adnotacji dla punktu idx.
+    """
+
+    def __init__(self, ax, annot, index, update: Callable[[int, object], None]):
+        self.ax = ax
+        self.fig = ax.figure
+        self.annot = annot
+        self.index = index
+        self.update = update
+        self.current: Optional[int] = None
+        self._background = None
+        annot.set_visible(False)
+        annot.set_animated(True)
+        # funkcje (nie metody związane) – rejestr matplotlib trzyma metody słabo, a silnika
+        # zwykle nikt poza nim nie przechowuje
+        self._cids = [
+            self.canvas.mpl_connect("motion_notify_event", lambda e: self.on_motion(e)),
+            self.canvas.mpl_connect("draw_event", lambda e: self._on_draw(e)),
+        ]
+
+    @property
+    def canvas(self):
+        # FigureCanvasTkAgg podpina się do figury już po utworzeniu silnika – zawsze bieżące płótno
+        return self.fig.canvas
+
+    def set_index(self, index) -> None:
+        self.index = index
+        self.current = None
+
+    def disconnect(self) -> None:
+        for cid in self._cids:
+            self.canvas.mpl_disconnect(cid)
+        self._cids = []
+        self._background = None
+
+    def _on_draw(self, _event) -> None:
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        if self.annot.get_visible():
+            self.fig.draw_artist(self.annot)
+
+    def _redraw_annotation(self) -> None:
+        if not getattr(self.canvas, "supports_blit", False) or self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        if self.annot.get_visible():
+            self.fig.draw_artist(self.annot)
+        self.canvas.blit(self.fig.bbox)
+
+    def on_motion(self, event) -> None:
+        idx = self.index.nearest(event) if event.inaxes == self.ax else None
+        if idx is None:
+            if self.annot.get_visible():
+                self.annot.set_visible(False)
+                self.current = None
+                self._redraw_annotation()
+            return
+        if idx == self.current and self.annot.get_visible():
+            return
+        self.current = idx
+        self.update(idx, event)
+        self.annot.set_visible(True)
+        self._redraw_annotation()
+
+    def refresh(self) -> None:
+        """Dane pod adnotacją się zmieniły (np. nowy wycinek) – schowaj ją; rysuje wołający."""
+        self.current = None
+        self.annot.set_visible(False)
@@ -1,20 +1,234 @@
+import argparse
 import mysql.connector
+import queue
+import re
+import sys
+import threading
+import time
 from contextlib import contextmanager
 from typing import Optional, Tuple
+
+# === Konfiguracja połączenia i puli ===
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "root",
+    "database": "gamedb",
+}
+POOL_SIZE = 8                 # maks. liczba jednocześnie otwartych połączeń
+POOL_CHECKOUT_TIMEOUT = 10.0  # ile sekund czekać na wolne połączenie
+POOL_RECYCLE_SECONDS = 1800   # starsze połączenia są zamykane i otwierane na nowo
+
+
+class PoolTimeoutError(RuntimeError):
+    """Brak wolnego połączenia w puli w zadanym czasie."""
+
+
+class ConnectionPool:
+    """
+    Prosta, wątkowo-bezpieczna pula połączeń MySQL.
+    Połączenie przy pobraniu jest sprawdzane (ping), a zbyt stare – wymieniane.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, checkout_timeout: float = POOL_CHECKOUT_TIMEOUT,
+                 recycle_seconds: float = POOL_RECYCLE_SECONDS, **config):
+        self.size = max(1, int(size))
+        self.checkout_timeout = checkout_timeout
+        self.recycle_seconds = recycle_seconds
+        self.config = config or dict(DB_CONFIG)
+        self._idle = queue.LifoQueue()   # (conn, created_at) – LIFO trzyma "ciepłe" połączenia
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return mysql.connector.connect(**self.config), time.monotonic()
+
+    def _discard(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def _is_usable(self, conn, created_at: float) -> bool:
+        if self.recycle_seconds and time.monotonic() - created_at > self.recycle_seconds:
+            return False
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            try:
+                conn, created_at = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Brak wolnego połączenia w puli (rozmiar {self.size}) po {self.checkout_timeout}s."
+                    )
+                try:
+                    conn, created_at = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if self._is_usable(conn, created_at):
+                return conn, created_at
+            self._discard(conn)
+
+    def release(self, conn, created_at: float, broken: bool = False) -> None:
+        if not broken:
+            try:
+                # zamknij otwartą transakcję, żeby kolejny użytkownik nie czytał starego snapshotu
+                conn.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, created_at))
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(**DB_CONFIG)
+        return _pool
+
+
+def configure_pool(size: int = POOL_SIZE, checkout_timeout: float = POOL_CHECKOUT_TIMEOUT,
+                   recycle_seconds: float = POOL_RECYCLE_SECONDS) -> ConnectionPool:
+    """Podmienia globalną pulę (np. większa pula dla zadań w tle)."""
+    global _pool
+    with _pool_lock:
+        old = _pool
+        _pool = ConnectionPool(size, checkout_timeout, recycle_seconds, **DB_CONFIG)
+    if old is not None:
+        old.close_all()
+    return _pool
+
+
 @contextmanager
 def with_db_connection(dictionary=False):
-    conn = mysql.connector.connect(
-        host='localhost',
-        user='root',
-        password='root',
-        database='gamedb'
-    )
+    pool = get_pool()
+    conn, created_at = pool.acquire()
+    cursor = None
+    broken = False
     try:
         cursor = conn.cursor(dictionary=dictionary)
         yield conn, cursor
+    except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError):
+        broken = True
+        raise
     finally:
-        cursor.close()
-        conn.close()
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                broken = True
+        pool.release(conn, created_at, broken=broken)
+
+# === Zapis hurtowy ===
+BULK_BATCH_SIZE = 500   # ile wierszy w jednym poleceniu UPDATE
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _check_ident(*names: str) -> None:
+    for n in names:
+        if not _IDENT_RE.match(n or ""):
+            raise ValueError(f"Niepoprawna nazwa kolumny/tabeli: {n!r}")
+
+
+def bulk_update(table: str, key: str, columns: list[str], rows, batch_size: int = BULK_BATCH_SIZE) -> int:
+    """
+    Aktualizuje wiele wierszy naraz: rows = [(klucz, wartość_kol1, wartość_kol2, ...), ...].
+    Paczki po batch_size wierszy (UPDATE ... JOIN (SELECT ... UNION ALL ...)), wszystko w jednej
+    transakcji. Wiersze z identycznymi wartościami są pomijane – zwraca liczbę faktycznie zmienionych.
+    """
+    _check_ident(table, key, *columns)
+    rows = [tuple(r) for r in rows]
+    if not rows:
+        return 0
+    width = 1 + len(columns)
+    if any(len(r) != width for r in rows):
+        raise ValueError(f"Każdy wiersz musi mieć {width} wartości (klucz + {len(columns)} kolumn)")
+
+    first = "SELECT " + ", ".join(["%s AS k"] + [f"%s AS c{i}" for i in range(len(columns))])
+    other = "SELECT " + ", ".join(["%s"] * width)
+    set_sql = ", ".join(f"t.`{c}` = v.c{i}" for i, c in enumerate(columns))
+    same_sql = " AND ".join(f"t.`{c}` <=> v.c{i}" for i, c in enumerate(columns))
+
+    changed = 0
+    with with_db_connection() as (conn, cur):
+        try:
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                values = " UNION ALL ".join([first] + [other] * (len(chunk) - 1))
+                cur.execute(f"""
+                    UPDATE `{table}` t
+                    JOIN ({values}) v ON t.`{key}` = v.k
+                    SET {set_sql}
+                    WHERE NOT ({same_sql})
+                """, tuple(x for r in chunk for x in r))
+                changed += max(cur.rowcount, 0)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return changed
+
+
+def bulk_insert(table: str, columns: list[str], rows, batch_size: int = BULK_BATCH_SIZE) -> int:
+    """INSERT wielu wierszy (executemany składa je w wielowierszowe INSERT) w jednej transakcji."""
+    _check_ident(table, *columns)
+    rows = [tuple(r) for r in rows]
+    if not rows:
+        return 0
+    cols = ", ".join(f"`{c}`" for c in columns)
+    marks = ", ".join(["%s"] * len(columns))
+    sql = f"INSERT INTO `{table}` ({cols}) VALUES ({marks})"
+
+    inserted = 0
+    with with_db_connection() as (conn, cur):
+        try:
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                cur.executemany(sql, chunk)
+                inserted += len(chunk)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return inserted
+
 
 def upsert_rating(login: str, game_id: int, rating: int) -> None:
     """Zapisz lub zaktualizuj ocenę (1–10) dla gry posiadanej przez użytkownika."""
@@ -73,16 +287,278 @@ def fetch_game_rating_summary(game_id: int) -> Tuple[Optional[float], int]:
         return (float(avg) if avg is not None else None, cnt)
 
 
+def fetch_rating_summaries(game_ids=None) -> dict[int, Tuple[Optional[float], int]]:
+    """Zwraca {id_game: (średnia_ocena, liczba_ocen)} dla wielu gier jednym zapytaniem (None = wszystkie)."""
+    ids = None if game_ids is None else sorted({int(g) for g in game_ids if g})
+    if ids is not None and not ids:
+        return {}
+
+    result: dict[int, Tuple[Optional[float], int]] = {}
+    with with_db_connection(dictionary=True) as (conn, cur):
+        chunks = [None] if ids is None else [ids[i:i + 1000] for i in range(0, len(ids), 1000)]
+        for chunk in chunks:
+            where = ""
+            if chunk is not None:
+                where = f"WHERE r.id_game IN ({','.join(['%s'] * len(chunk))})"
+            cur.execute(f"""
+                SELECT r.id_game, ROUND(AVG(r.rating),1) AS avg_rating, COUNT(*) AS cnt
+                FROM rating r
+                {where}
+                GROUP BY r.id_game
+            """, tuple(chunk or ()))
+            for row in cur.fetchall():
+                avg = row.get("avg_rating")
+                result[int(row["id_game"])] = (float(avg) if avg is not None else None, int(row.get("cnt") or 0))
+    return result
+
+
+def fetch_user_ratings(login: str) -> dict[int, int]:
+    """Zwraca wszystkie oceny użytkownika jako {id_game: ocena}."""
+    with with_db_connection(dictionary=True) as (conn, cur):
+        cur.execute("""
+            SELECT r.id_game, r.rating
+            FROM rating r
+            JOIN `user` u ON u.id_user = r.id_user
+            WHERE u.login=%s
+        """, (login,))
+        return {int(r["id_game"]): int(r["rating"]) for r in cur.fetchall() if r.get("rating") is not None}
+
+
 def fetch_games_for_shop_with_ratings() -> list[dict]:
-    """Zwraca wszystkie gry z ich średnią oceną i liczbą ocen."""
+    """Zwraca wszystkie gry sklepu (z gatunkami) wraz ze średnią oceną i liczbą ocen."""
     with with_db_connection(dictionary=True) as (conn, cur):
         cur.execute("""
-            SELECT g.*,
-                   ROUND(AVG(r.rating),1) AS avg_rating,
-                   COUNT(r.rating)        AS rating_count
+            SELECT
+                g.id_game,
+                g.name,
+                g.price,
+                g.release_date,
+                g.image_url,
+                (
+                  SELECT GROUP_CONCAT(DISTINCT ge.name ORDER BY ge.name SEPARATOR ', ')
+                  FROM game_genre gg
+                  LEFT JOIN genre ge ON ge.id_genre = gg.id_genre
+                  WHERE gg.id_game = g.id_game
+                ) AS genres,
+                rs.avg_rating,
+                COALESCE(rs.rating_count, 0) AS rating_count
             FROM game g
-            LEFT JOIN rating r ON r.id_game = g.id_game
-            GROUP BY g.id_game
-            ORDER BY g.name
+            LEFT JOIN (
+                SELECT id_game, ROUND(AVG(rating),1) AS avg_rating, COUNT(*) AS rating_count
+                FROM rating
+                GROUP BY id_game
+            ) rs ON rs.id_game = g.id_game
+            ORDER BY g.release_date DESC, g.name ASC
+        """)
+        return list(cur.fetchall())
+
+
+# === Katalog stronicowany (keyset) ===
+SHOP_PAGE_SIZE = 60
+
+# klucze sortowania: lista (kolumna, malejąco?) – ostatni element zawsze unikalny (id_game).
+# Surowe kolumny (bez COALESCE), żeby porządek i warunek kursora obsłużył indeks z CATALOG_INDEXES.
+# NULL-e pierwszej kolumny idą na koniec, jak przy ORDER BY (kol IS NULL, kol): strona czytana jest
+# odcinkami "kol IS NOT NULL", potem "kol IS NULL" – każdy to zwykły zakres/ref po indeksie.
+# Dalsze kolumny mają natywny porządek MySQL (NULL najmniejszy), zgodny z kolejnością w indeksie.
+CATALOG_SORTS = {
+    "release":    [("g.release_date", True), ("g.name", False), ("g.id_game", False)],
+    "name":       [("g.name", False), ("g.id_game", False)],
+    "price_asc":  [("g.price", False), ("g.id_game", False)],
+    "price_desc": [("g.price", True), ("g.id_game", False)],
+}
+
+# indeksy złożone pod CATALOG_SORTS (kierunki jak w ORDER BY – MySQL 8 ma indeksy malejące)
+CATALOG_INDEXES = {
+    "idx_game_release":    "release_date DESC, name, id_game",
+    "idx_game_name":       "name, id_game",
+    "idx_game_price":      "price, id_game",
+    "idx_game_price_desc": "price DESC, id_game",
+}
+
+
+def ensure_catalog_indexes(dry_run: bool = False) -> list[str]:
+    """
+    Migracja dla baz sprzed zmiany zrzutu (nowy zrzut w baza/ ma już te indeksy):
+    zakłada brakujące indeksy katalogu i zwraca ich nazwy; dry_run – tylko je wypisuje.
+    Wołana ręcznie (python database_connection.py --catalog-indexes), nie przy odczycie sklepu –
+    CREATE INDEX na dużej tabeli trwa i wymaga uprawnień ALTER.
+    """
+    missing = []
+    with with_db_connection(dictionary=True) as (conn, cur):
+        cur.execute("""
+            SELECT DISTINCT index_name AS name
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'game'
         """)
-        return list(cur.fetchall())
\ No newline at end of file
+        existing = {r["name"] for r in cur.fetchall()}
+        for name, columns in CATALOG_INDEXES.items():
+            if name not in existing:
+                if not dry_run:
+                    cur.execute(f"CREATE INDEX {name} ON game ({columns})")
+                missing.append(name)
+        conn.commit()
+    return missing
+
+
+def _after(col: str, desc: bool, value, nullable: bool = True) -> tuple[Optional[str], list]:
+    """Warunek "dalej niż value" w kolumnie; None = w tej kolumnie nic nie ma dalej."""
+    if value is None:
+        # NULL jest najmniejszy: rosnąco dalej są wszystkie nie-NULL, malejąco – nic
+        return (None, []) if desc else (f"{col} IS NOT NULL", [])
+    if desc:
+        return (f"({col} < %s OR {col} IS NULL)", [value]) if nullable else (f"{col} < %s", [value])
+    return f"{col} > %s", [value]
+
+
+def _keyset_condition(spec: list, cursor: tuple, first_not_null: bool = False) -> tuple[str, list]:
+    """(a,b,c) "po" kursorze przy mieszanych kierunkach: a<x OR (a=x AND b>y) OR ..."""
+    ors, params = [], []
+    for i, (col, desc) in enumerate(spec):
+        after, after_params = _after(col, desc, cursor[i], nullable=not (i == 0 and first_not_null))
+        if after is None:
+            continue
+        ands, term_params = [], []
+        for j in range(i):
+            if cursor[j] is None:
+                ands.append(f"{spec[j][0]} IS NULL")
+            else:
+                ands.append(f"{spec[j][0]} = %s")
+                term_params.append(cursor[j])
+        ands.append(after)
+        ors.append("(" + " AND ".join(ands) + ")")
+        params += term_params + after_params
+    if not ors:
+        return "FALSE", []
+    return "(" + " OR ".join(ors) + ")", params
+
+
+def _catalog_segments(spec: list, cursor: Optional[tuple]) -> list[tuple[list, str, list]]:
+    """
+    Odcinki strony: [(klucze ORDER BY, warunek, parametry)]. Najpierw pierwsza kolumna
+    nie-NULL (od kursora), potem jej NULL-e uporządkowane resztą kluczy.
+    """
+    lead, rest = spec[0][0], spec[1:]
+    segments = []
+    if cursor is None or cursor[0] is not None:
+        cond, params = f"{lead} IS NOT NULL", []
+        if cursor is not None:
+            keyset, params = _keyset_condition(spec, cursor, first_not_null=True)
+            cond = f"{cond} AND {keyset}"
+        segments.append((spec, cond, params))
+    if rest:
+        cond, params = f"{lead} IS NULL", []
+        if cursor is not None and cursor[0] is None:
+            keyset, params = _keyset_condition(rest, cursor[1:])
+            cond = f"{cond} AND {keyset}"
+        segments.append((rest, cond, params))
+    return segments
+
+
+def count_games() -> int:
+    with with_db_connection() as (conn, cur):
+        cur.execute("SELECT COUNT(*) FROM game")
+        row = cur.fetchone()
+        return int(row[0]) if row else 0
+
+
+def fetch_games_page(genre: Optional[str] = None, date_from=None, date_to=None,
+                     price_max: Optional[float] = None, sort: str = "release",
+                     cursor: Optional[tuple] = None,
+                     limit: int = SHOP_PAGE_SIZE) -> tuple[list[dict], Optional[tuple]]:
+    """
+    Jedna strona katalogu sklepu (te same kolumny co fetch_games_for_shop_with_ratings).
+    Zwraca (wiersze, kursor_następnej_strony); kursor None = koniec listy.
+    Gatunki i oceny liczone tylko dla gier z tej strony.
+    """
+    spec = CATALOG_SORTS.get(sort)
+    if spec is None:
+        raise ValueError(f"Nieznany klucz sortowania: {sort}")
+
+    where, params = [], []
+    if genre:
+        where.append("""EXISTS (
+                SELECT 1 FROM game_genre gg
+                JOIN genre ge ON ge.id_genre = gg.id_genre
+                WHERE gg.id_game = g.id_game AND ge.name = %s
+            )""")
+        params.append(genre)
+    if date_from is not None:
+        where.append("g.release_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("g.release_date <= %s")
+        params.append(date_to)
+    if price_max is not None:
+        where.append("g.price <= %s")
+        params.append(float(price_max))
+
+    columns = [col for col, _ in spec]
+    keys = ", ".join(f"{col} AS _k{i}" for i, col in enumerate(columns))
+    rows = []
+    with with_db_connection(dictionary=True) as (conn, cur):
+        for order_spec, cond, cond_params in _catalog_segments(spec, cursor):
+            remaining = int(limit) - len(rows)
+            if remaining <= 0:
+                break
+            where_sql = "WHERE " + " AND ".join(where + [cond])
+            order = ", ".join(f"{col} {'DESC' if desc else 'ASC'}" for col, desc in order_spec)
+            cur.execute(f"""
+                SELECT g.id_game, g.name, g.price, g.release_date, g.image_url, {keys}
+                FROM game g
+                {where_sql}
+                ORDER BY {order}
+                LIMIT %s
+            """, tuple(params + cond_params + [remaining]))
+            rows += cur.fetchall()
+        if not rows:
+            return [], None
+
+        ids = [int(r["id_game"]) for r in rows]
+        marks = ",".join(["%s"] * len(ids))
+        cur.execute(f"""
+            SELECT gg.id_game, GROUP_CONCAT(DISTINCT ge.name ORDER BY ge.name SEPARATOR ', ') AS genres
+            FROM game_genre gg
+            LEFT JOIN genre ge ON ge.id_genre = gg.id_genre
+            WHERE gg.id_game IN ({marks})
+            GROUP BY gg.id_game
+        """, tuple(ids))
+        genres = {int(r["id_game"]): r["genres"] for r in cur.fetchall()}
+        cur.execute(f"""
+            SELECT id_game, ROUND(AVG(rating),1) AS avg_rating, COUNT(*) AS rating_count
+            FROM rating
+            WHERE id_game IN ({marks})
+            GROUP BY id_game
+        """, tuple(ids))
+        ratings = {int(r["id_game"]): r for r in cur.fetchall()}
+
+    last = rows[-1]
+    next_cursor = tuple(last[f"_k{i}"] for i in range(len(spec))) if len(rows) >= limit else None
+    for r in rows:
+        for i in range(len(spec)):
+            r.pop(f"_k{i}", None)
+        gid = int(r["id_game"])
+        r["genres"] = genres.get(gid)
+        rs = ratings.get(gid)
+        r["avg_rating"] = rs["avg_rating"] if rs else None
+        r["rating_count"] = int(rs["rating_count"]) if rs else 0
+    return rows, next_cursor
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Jednorazowe kroki utrzymania bazy gamedb.")
+    parser.add_argument("--catalog-indexes", action="store_true",
+                        help="załóż brakujące indeksy stronicowania katalogu (tabela game)")
+    parser.add_argument("--dry-run", action="store_true", help="tylko wypisz, czego brakuje")
+    args = parser.parse_args(argv)
+    if not args.catalog_indexes:
+        parser.print_help()
+        return 0
+    names = ensure_catalog_indexes(dry_run=args.dry_run)
+    verb = "Brakuje" if args.dry_run else "Utworzono"
+    print(f"[DB] {verb} indeksów katalogu: {', '.join(names)}" if names else "[DB] Indeksy katalogu są kompletne.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# downsampling.py – przerzedzanie długich serii do wykresów bez gubienia szczytów
+#   lttb()   – Largest-Triangle-Three-Buckets (kształt linii),
+#   minmax() – min i max w każdym kubełku (żaden pik nie ginie),
+#   DownsamplePyramid – poziomy rozdzielczości liczone raz; pan/zoom tylko wybiera poziom i wycina.
+
+from typing import Optional
+
+import numpy as np
+
+
+def _as_arrays(x, y) -> tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.shape != y.shape or x.ndim != 1:
+        raise ValueError("x i y muszą być jednowymiarowe i tej samej długości")
+    return x, y
+
+
+def minmax(x, y, n_out: int) -> np.ndarray:
+    """
+    Indeksy punktów: min i max z każdego z n_out//2 kubełków (równa liczba punktów),
+    plus pierwszy i ostatni punkt. Całość wektorowo (reduceat).
+    """
+    x, y = _as_arrays(x, y)
+    n = len(y)
+    n_buckets = max(1, int(n_out) // 2)
+    if n <= max(int(n_out), 2):
+        return np.arange(n)
+
+    starts = np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+    starts = np.unique(starts)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+
+    idx = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(y, starts)
+        hit = np.flatnonzero(y == extreme[bucket])
+        _, first = np.unique(bucket[hit], return_index=True)   # pierwszy trafiony punkt w kubełku
+        idx.append(hit[first])
+    idx.append(np.array([0, n - 1]))
+    return np.unique(np.concatenate(idx))
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Indeksy wybrane algorytmem LTTB (Steinarsson). Kubełki i średnie liczone wektorowo;
+    pętla tylko po kubełkach, bo każdy wybór zależy od poprzednio wybranego punktu.
+    """
+    x, y = _as_arrays(x, y)
+    n = len(y)
+    n_out = int(n_out)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # granice jak w wersji referencyjnej: kubełek i = [floor(i*every)+1, floor((i+1)*every)+1);
+    # n_out-2 kubełków wewnętrznych + końcówka (zwykle sam ostatni punkt) jako ostatni "następny"
+    every = (n - 2) / (n_out - 2)
+    edges = np.minimum(np.floor(np.arange(n_out) * every).astype(np.int64) + 1, n)
+    starts, ends = edges[:-2], edges[1:-1]
+
+    # średnie "następnego" kubełka dla każdego kubełka
+    counts = np.diff(edges)
+    cx = (np.add.reduceat(x[:edges[-1]], edges[:-1]) / counts)[1:]
+    cy = (np.add.reduceat(y[:edges[-1]], edges[:-1]) / counts)[1:]
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(len(starts)):
+        s, e = starts[b], ends[b]
+        if e <= s:
+            out[b + 1] = a
+            continue
+        bx, by = x[s:e], y[s:e]
+        area = np.abs((x[a] - cx[b]) * (by - y[a]) - (x[a] - bx) * (cy[b] - y[a]))
+        a = s + int(np.argmax(area))
+        out[b + 1] = a
+    return np.unique(out)
+
+
+METHODS = {"minmax": minmax, "lttb": lttb}
+
+
+class DownsamplePyramid:
+    """
+    Poziom 0 = pełna seria, każdy kolejny ~2x mniejszy (z pełnej serii, wybraną metodą),
+    aż do min_points. slice() wybiera najdokładniejszy poziom, który w zakresie [x0, x1]
+    mieści się w max_points, i zwraca wycinek (+1 punkt z każdej strony, żeby linia
+    dochodziła do krawędzi).
+    """
+
+    def __init__(self, x, y, method: str = "minmax", min_points: int = 256):
+        x, y = _as_arrays(x, y)
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+        fn = METHODS[method]
+
+        self.levels: list[tuple[np.ndarray, np.ndarray]] = [(x, y)]
+        size = len(x) // 2
+        while size >= min_points:
+            idx = fn(x, y, size)
+            if len(idx) >= len(self.levels[-1][0]):
+                break
+            self.levels.append((x[idx], y[idx]))
+            size //= 2
+
+    def __len__(self) -> int:
+        return len(self.levels[0][0])
+
+    @property
+    def x_range(self) -> tuple[float, float]:
+        x = self.levels[0][0]
+        return (float(x[0]), float(x[-1])) if len(x) else (0.0, 0.0)
+
+    def slice(self, x0: Optional[float] = None, x1: Optional[float] = None,
+              max_points: int = 1000) -> tuple[np.ndarray, np.ndarray]:
+        for lx, ly in self.levels:
+            lo = 0 if x0 is None else max(0, int(np.searchsorted(lx, x0, side="left")) - 1)
+            hi = len(lx) if x1 is None else min(len(lx), int(np.searchsorted(lx, x1, side="right")) + 1)
+            if hi - lo <= max_points:
+                return lx[lo:hi], ly[lo:hi]
+        return lx[lo:hi], ly[lo:hi]   # najgrubszy poziom, nawet jeśli większy
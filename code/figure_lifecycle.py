@@ -0,0 +1,94 @@
+# figure_lifecycle.py – tworzenie i zwalnianie figur matplotlib dla paneli Tk
+# Figury powstają bezpośrednio z matplotlib.figure.Figure (bez pyplot i jego globalnego
+# menedżera figur). Gdy widżet płótna znika (panel podmieniony / zniszczony), figura jest
+# zwalniana: odpięte wszystkie callbacki mpl, wyczyszczona zawartość, wypisana z rejestru.
+
+import threading
+import weakref
+from typing import Callable
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+LIVE_FIGURES_WARN = 20   # tyle żywych figur naraz to już raczej wyciek niż kilka paneli
+
+
+class FigureRegistry:
+    def __init__(self, warn_at: int = LIVE_FIGURES_WARN):
+        self.warn_at = warn_at
+        self._live: "weakref.WeakValueDictionary[int, Figure]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.released = 0
+
+    # === Tworzenie ===
+    def new_figure(self, figsize=(10, 6), facecolor=None, **kwargs) -> Figure:
+        fig = Figure(figsize=figsize, facecolor=facecolor, **kwargs)
+        with self._lock:
+            self._live[id(fig)] = fig
+            self.created += 1
+            live = len(self._live)
+        if live >= self.warn_at:
+            print(f"[FIGURES] Uwaga: {live} żywych figur – czy panele są zwalniane?")
+        return fig
+
+    def attach_canvas(self, fig: Figure, master) -> FigureCanvasTkAgg:
+        """Płótno Tk dla figury; zniszczenie jego widżetu zwalnia figurę."""
+        canvas = FigureCanvasTkAgg(fig, master=master)
+        widget = canvas.get_tk_widget()
+        widget.bind("<Destroy>", lambda e: self.release(fig) if e.widget is widget else None, add="+")
+        return canvas
+
+    # === Zwalnianie ===
+    def release(self, fig: Figure) -> None:
+        with self._lock:
+            if self._live.pop(id(fig), None) is None:
+                return
+            self.released += 1
+        disconnect_all(fig)
+        fig.clear()
+
+    def release_all(self) -> None:
+        for fig in list(self._live.values()):
+            self.release(fig)
+
+    # === Statystyki ===
+    @property
+    def live(self) -> int:
+        return len(self._live)
+
+    def stats(self) -> dict:
+        return {"live": self.live, "created": self.created, "released": self.released}
+
+
+def disconnect_all(fig: Figure) -> int:
+    """Odpina wszystkie callbacki mpl figury (także te podpięte przez HoverEngine itp.)."""
+    registry = fig.canvas.callbacks
+    cids = [cid for handlers in registry.callbacks.values() for cid in list(handlers)]
+    for cid in cids:
+        registry.disconnect(cid)
+    return len(cids)
+
+
+_registry = FigureRegistry()
+
+
+def get_figure_registry() -> FigureRegistry:
+    return _registry
+
+
+def new_figure(figsize=(10, 6), facecolor=None, **kwargs) -> Figure:
+    return _registry.new_figure(figsize=figsize, facecolor=facecolor, **kwargs)
+
+
+def attach_canvas(fig: Figure, master) -> FigureCanvasTkAgg:
+    return _registry.attach_canvas(fig, master)
+
+
+def figure_stats() -> dict:
+    return _registry.stats()
+
+
+def log_figure_stats(log: Callable[[str], None] = print) -> None:
+    s = figure_stats()
+    log(f"[FIGURES] żywe {s['live']}, utworzone {s['created']}, zwolnione {s['released']}")
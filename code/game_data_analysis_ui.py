@@ -1,20 +1,18 @@
 import os
 import sys
 import subprocess
-import requests
+import threading
 import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib import colormaps
 import tkinter as tk
 from tkinter import ttk
 from analysis_ui_styles import (
     COLOR_LEFT, COLOR_RIGHT, COLOR_BOTTOM, BORDER_COLOR, BORDER_WIDTH,
     FONT, HEADER_FONT, LISTBOX_BG, LISTBOX_FG, LISTBOX_SELECT_BG, LISTBOX_SELECT_FG,
-    CHART_FACE, CHART_AX_FACE, CHART_BAR_COLOR, CHART_TEXT_COLOR, TEXT_COLOR, BTN_BG, BTN_FG
+    CHART_FACE, CHART_BAR_COLOR, CHART_TEXT_COLOR, TEXT_COLOR, BTN_BG, BTN_FG
 )
 from itertools import cycle
 from database_connection import with_db_connection
@@ -23,6 +21,18 @@ from ai_data_analysis import interpretuj_ai_z_kategorii
 from database_connection import with_db_connection
 from analysis_ui_styles import stylized_button
 from chart_ai_bridge import (ChartSnapshot,register_chart_snapshot,analyze_latest_chart_async, append_log, )
+from steamcharts import SteamChartsRefresher, fetch_steamcharts_data
+from player_stats_sync import BACKFILL_MAX_ROWS, load_daily_stats, sync_player_stats
+from price_sync import sync_prices
+from refresh_scheduler import RefreshScheduler, get_refresh_scheduler, save_live_stats
+from downsampling import DownsamplePyramid
+from chart_hover import HoverEngine, LineHoverIndex, ScatterHoverIndex
+from chart_host import BarSeries, ChartHost, WindowedBarSeries, attach_bar_pan, update_scatter
+from figure_lifecycle import log_figure_stats
+from ui_scheduler import (CancelToken, LoadingIndicator, bind_listbox_select, log_task_stats, run_in_background,
+                          selected_item, selected_items, shutdown_task_executor)
+from activity_series import (LEVEL_LABELS, days_to_datetime64, epoch_day, get_activity_series,
+                             invalidate_activity_series, pick_level)
 def _post_to_log(widget, message: str) -> None:
     if not widget:
         return
@@ -164,79 +174,12 @@ def get_game_info(game_title: str) -> dict:
     except Exception as e:
         return {"Błąd": str(e)}
 
-def fetch_steamcharts_data(appid: int, timeout: float = 10.0):
-    import re
-    from bs4 import BeautifulSoup
-    import requests
-
-    def parse_int(txt: str):
-        txt = re.sub(r"[^\d]", "", txt or "")
-        return int(txt) if txt else None
-
-    try:
-        url = f"https://steamcharts.com/app/{appid}"
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "text/html,application/xhtml+xml",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Connection": "close",
-        }
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-        stats = soup.find_all("div", class_="app-stat")
-        if not stats:
-            return None, None, None
-
-        current = peak24 = alltime = None
-
-        for box in stats:
-            num = box.find("span", class_="num")
-            label = box.get_text(" ", strip=True).lower()
-            value = parse_int(num.get_text(strip=True) if num else "")
-
-            if "right now" in label or "graczy teraz" in label:
-                current = value
-            elif "24-hour peak" in label or "24 godz." in label:
-                peak24 = value
-            elif "all-time peak" in label or "rekord wszechczasów" in label:
-                alltime = value
-
-        if any(v is None for v in (current, peak24, alltime)) and len(stats) >= 3:
-            try:
-                current = current or parse_int(stats[0].find("span", class_="num").get_text(strip=True))
-                peak24  = peak24  or parse_int(stats[1].find("span", class_="num").get_text(strip=True))
-                alltime = alltime or parse_int(stats[2].find("span", class_="num").get_text(strip=True))
-            except Exception:
-                pass
-
-        return current, peak24, alltime
-
-    except Exception:
-        return None, None, None
-def update_steamcharts_data(
-    appid: int,
-    current: int | None,
-    peak_24h: int | None,
-    peak_all: int | None
-) -> bool:
-    try:
-        with with_db_connection() as (conn, cursor):
-            cursor.execute(
-                """
-                UPDATE game
-                SET current_players = %s,
-                    peak_24h_players = %s,
-                    peak_players = %s
-                WHERE steam_appid = %s
-                """,
-                (current, peak_24h, peak_all, appid),
-            )
-            conn.commit()
-            return cursor.rowcount > 0
-    except Exception:
-        return False
+def update_steamcharts_data_bulk(rows) -> int:
+    """rows = [(appid, current, peak_24h, peak_all), ...] – jedna transakcja; zwraca liczbę zmienionych gier."""
+    updated = save_live_stats(rows)
+    if _scheduler is not None:
+        _scheduler.record(rows)   # ręcznie odświeżone gry harmonogram przesuwa na później
+    return updated
 def _set_info_text(widget, text: str) -> None:
     if not widget:
         return
@@ -244,65 +187,179 @@ def _set_info_text(widget, text: str) -> None:
         widget.after(0, lambda: widget.config(text=text))
     except Exception:
         pass
+REFRESH_POLL_MS = 100
+APP_SCHEDULER_ENABLED = True   # liczby graczy odświeżane w tle przez cały czas działania panelu
+_active_refresh: SteamChartsRefresher | None = None
+_scheduler: RefreshScheduler | None = None
+
+
+def _steamcharts_games() -> list[dict]:
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("SELECT steam_appid, name FROM game WHERE steam_appid IS NOT NULL")
+        return cursor.fetchall()
+
+
+def _log_refresh_event(kind: str, data: dict, info_target=None, log_target=None) -> None:
+    if kind == "game":
+        if data["current"] is not None:
+            _post_to_log(
+                log_target,
+                f"  • {data['name']}: {data['current']} teraz, {data['peak_24h']} / 24h, rekord {data['peak_all']}"
+            )
+        else:
+            _post_to_log(log_target, f"  • {data['name']}: brak danych")
+        return
+
+    # "done"
+    if data["cancelled"]:
+        msg = f"Przerwano – pobrano {data['fetched']}, zaktualizowano {data['updated']} gier."
+    else:
+        msg = f"Pobrano {data['fetched']}, zaktualizowano {data['updated']} gier."
+    _set_info_text(info_target, msg)
+    if info_target:
+        try:
+            info_target.after(5000, lambda: _set_info_text(info_target, ""))
+        except Exception:
+            pass
+    _post_to_log(log_target, f"{msg} ({data['total']} z appid, {data['seconds']:.1f}s)\n")
+
+
 def refresh_all_games(info_target=None, log_target=None) -> int:
-    updated_count = 0
+    """Blokujące odświeżenie wszystkich gier (pula wątków) – dla skryptów; UI używa wersji async."""
     try:
         _set_info_text(info_target, "Pobieranie danych...")
         _post_to_log(log_target, "Rozpoczynam pobieranie danych ze SteamCharts...")
+        refresher = SteamChartsRefresher(save_many=update_steamcharts_data_bulk)
+        results = refresher.run(_steamcharts_games())
+        summary = {}
 
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("SELECT steam_appid, name FROM game WHERE steam_appid IS NOT NULL")
-            games = cursor.fetchall()
-
-        for game in games:
-            appid = game["steam_appid"]
-            current, peak_24h, peak_all = fetch_steamcharts_data(appid)
-
-            if current is not None:
-                ok = update_steamcharts_data(appid, current, peak_24h, peak_all)
-                if ok:
-                    updated_count += 1
-                _post_to_log(
-                    log_target,
-                    f"  • {game['name']}: {current} teraz, {peak_24h} / 24h, rekord {peak_all}"
-                )
-            else:
-                _post_to_log(log_target, f"  • {game['name']}: brak danych")
-
-        _set_info_text(info_target, f"Zaktualizowano {updated_count} gier.")
-        if info_target:
-            try:
-                info_target.after(5000, lambda: _set_info_text(info_target, ""))
-            except Exception:
-                pass
-
-        _post_to_log(log_target, f"Zaktualizowano {updated_count} gier.\n")
-        return updated_count
+        def handle(kind, data):
+            if kind == "done":
+                summary.update(data)
+            _log_refresh_event(kind, data, info_target, log_target)
 
+        refresher.poll(handle, max_events=len(results) + 1)
+        return summary.get("updated", 0)
     except Exception as e:
         _set_info_text(info_target, f"Błąd: {e}")
         _post_to_log(log_target, f"Błąd przy odświeżaniu danych: {e}")
-        return updated_count
+        return 0
+
+
 # === Async wrapper (nie blokuje GUI) ===
 def refresh_all_games_async(info_target=None, log_target=None) -> None:
-    import threading
-    threading.Thread(
-        target=lambda: refresh_all_games(info_target, log_target),
-        daemon=True
-    ).start()
+    """Pobieranie w tle, postęp odbierany w pętli Tk; ponowne kliknięcie w trakcie przerywa."""
+    global _active_refresh
+    if _active_refresh is not None and _active_refresh.running:
+        _active_refresh.cancel()
+        _set_info_text(info_target, "Przerywanie...")
+        return
 
-def generate_playtime_chart(parent_frame, log_box):
     try:
-        with with_db_connection() as (conn, cursor):
-            cursor.execute("""
-                SELECT g.name, SUM(l.play_time)/60 AS total_hours
-                FROM library l
-                JOIN game g ON g.id_game = l.id_game
-                GROUP BY g.name
-                ORDER BY total_hours DESC
-            """)
-            data = cursor.fetchall()
+        games = _steamcharts_games()
+    except Exception as e:
+        _set_info_text(info_target, f"Błąd: {e}")
+        _post_to_log(log_target, f"Błąd przy odświeżaniu danych: {e}")
+        return
+
+    _set_info_text(info_target, f"Pobieranie danych... (0/{len(games)})")
+    _post_to_log(log_target, "Rozpoczynam pobieranie danych ze SteamCharts...")
+    refresher = SteamChartsRefresher(save_many=update_steamcharts_data_bulk)
+    _active_refresh = refresher
+    progress = {"n": 0}
+    ui = info_target or log_target
+
+    def handle(kind, data):
+        if kind == "game":
+            progress["n"] += 1
+            _set_info_text(info_target, f"Pobieranie danych... ({progress['n']}/{len(games)})")
+        _log_refresh_event(kind, data, info_target, log_target)
+
+    def pump():
+        if refresher.poll(handle) and ui is not None:
+            ui.after(REFRESH_POLL_MS, pump)
+
+    refresher.start(games)
+    if ui is not None:
+        ui.after(REFRESH_POLL_MS, pump)
+
+
+def start_refresh_scheduler(log_target=None) -> RefreshScheduler | None:
+    """Harmonogram w wątku aplikacji; wyniki idą do bazy, log tylko gdy coś się zmieniło."""
+    global _scheduler
+    if not APP_SCHEDULER_ENABLED:
+        return None
 
+    def log(msg: str) -> None:
+        if "zmienione 0," not in msg:
+            _post_to_log(log_target, msg)
+
+    _scheduler = get_refresh_scheduler(log=log)
+    _scheduler.start()
+    return _scheduler
+
+
+def stop_refresh_scheduler() -> None:
+    if _scheduler is not None:
+        _scheduler.stop()
+
+
+def refresh_prices_async(info_target=None, log_target=None) -> None:
+    """Ceny ze sklepu Steam w tle (price_sync) – log i status przez after()."""
+    def work():
+        _set_info_text(info_target, "Pobieranie cen...")
+        _post_to_log(log_target, "Rozpoczynam pobieranie cen ze sklepu Steam...")
+        try:
+            summary = sync_prices(log=lambda m: _post_to_log(log_target, m))
+            _set_info_text(info_target, f"Zmieniono ceny {summary['updated']} gier.")
+        except Exception as e:
+            _set_info_text(info_target, f"Błąd: {e}")
+            _post_to_log(log_target, f"Błąd przy pobieraniu cen: {e}")
+
+    threading.Thread(target=work, daemon=True).start()
+
+
+# === Ładowanie danych paneli w tle ===
+_panel_loads: dict[str, CancelToken] = {}
+_panel_indicators: dict[str, LoadingIndicator] = {}
+
+
+def load_panel(parent_frame, load, build, on_error=None):
+    """
+    Zapytania panelu w puli wątków, build(dane) w pętli Tk. Nowy panel w tej samej ramce
+    (kolejny przycisk) anuluje ładowanie poprzedniego, żeby spóźniony wynik go nie nadpisał.
+    """
+    key = str(parent_frame)
+    previous = _panel_loads.get(key)
+    if previous is not None:
+        previous.cancel()
+    token = _panel_loads[key] = CancelToken()
+    indicator = _panel_indicators.get(key)
+    if indicator is None:
+        indicator = _panel_indicators[key] = LoadingIndicator(parent_frame)
+    return run_in_background(parent_frame, load, build, token=token, on_error=on_error, indicator=indicator)
+
+
+def _load_playtime_totals():
+    with with_db_connection() as (conn, cursor):
+        cursor.execute("""
+            SELECT g.name, SUM(l.play_time)/60 AS total_hours
+            FROM library l
+            JOIN game g ON g.id_game = l.id_game
+            GROUP BY g.name
+            ORDER BY total_hours DESC
+        """)
+        return cursor.fetchall()
+
+
+def generate_playtime_chart(parent_frame, log_box):
+    load_panel(parent_frame, _load_playtime_totals,
+               lambda data: _build_playtime_chart(parent_frame, log_box, data),
+               on_error=lambda e: print(f"Błąd generowania wykresu: {e}"))
+
+
+def _build_playtime_chart(parent_frame, log_box, data):
+    try:
         if not data:
             return
 
@@ -347,79 +404,27 @@ def generate_playtime_chart(parent_frame, log_box):
         chart_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
 
-        def draw_chart(selected_titles):
-            for widget in chart_frame.winfo_children():
-                widget.destroy()
+        host = ChartHost(chart_frame, figsize=(12, 6))
+        ax = host.ax
+        bars = WindowedBarSeries(ax, CHART_BAR_COLOR, width=0.5, value_fmt="{:.1f}",
+                                 value_color=CHART_TEXT_COLOR, tick_color=CHART_TEXT_COLOR)
+        ax.set_title("Łączny czas spędzony w grach (godziny)", color=CHART_TEXT_COLOR, fontsize=14, pad=20)
+        ax.set_ylabel("Czas gry [godziny]", color=CHART_TEXT_COLOR, fontsize=11, labelpad=15)
+        ax.tick_params(axis='y', colors=CHART_TEXT_COLOR)
+        ax.tick_params(axis='x', colors=CHART_TEXT_COLOR)
+        host.widget.config(borderwidth=0, highlightthickness=0)
 
+        # === PRZEWIJANIE: rysowane są tylko słupki w oknie ===
+        attach_bar_pan(host, bars)
+
+        def draw_chart(selected_titles, _token=None):
             if not selected_titles:
                 return
 
             selected_hours = [hours_dict[title] for title in selected_titles]
-            num_bars = len(selected_titles)
-
-            fig, ax = plt.subplots(figsize=(max(12, num_bars * 0.6), 6))
-            fig.patch.set_facecolor(CHART_FACE)
-            ax.set_facecolor(CHART_AX_FACE)
-
-            bars = ax.bar(range(num_bars), selected_hours, color=CHART_BAR_COLOR, width=0.5)
-
-            for i, bar in enumerate(bars):
-                height = bar.get_height()
-                ax.annotate(f'{height:.1f}', (bar.get_x() + bar.get_width() / 2, height),
-                            xytext=(0, 3), textcoords="offset points",
-                            ha='center', va='bottom', fontsize=9, color=CHART_TEXT_COLOR)
-
-            ax.set_title("Łączny czas spędzony w grach (godziny)", color=CHART_TEXT_COLOR, fontsize=14, pad=20)
-            ax.set_ylabel("Czas gry [godziny]", color=CHART_TEXT_COLOR, fontsize=11, labelpad=15)
-            ax.tick_params(axis='y', colors=CHART_TEXT_COLOR)
-            ax.get_yaxis().set_visible(True)
-            ax.set_xticks(range(num_bars))
-            ax.set_xticklabels(selected_titles, rotation=45, ha='right', fontsize=9, color=CHART_TEXT_COLOR)
-
-            for spine in ax.spines.values():
-                spine.set_color(BORDER_COLOR)
-
-            ax.tick_params(axis='x', colors=CHART_TEXT_COLOR)
-
-            fig.tight_layout(rect=[0, 0.18, 1, 1])
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            canvas.get_tk_widget().config(borderwidth=0, highlightthickness=0)
-
-
-            # === ZOOM & PAN ===
-            pan_start = {"x": None}
-
-            def on_mouse_scroll(event):
-                shift = 1
-                cur_xlim = ax.get_xlim()
-                width = cur_xlim[1] - cur_xlim[0]
-                new_left = cur_xlim[0] - shift if event.step > 0 else cur_xlim[0] + shift
-                new_left = max(-0.5, min(new_left, num_bars + 0.5 - width))
-                ax.set_xlim(new_left, new_left + width)
-                fig.canvas.draw_idle()
-
-            def on_press(event):
-                if event.button == 1 and event.inaxes == ax:
-                    pan_start["x"] = event.xdata
-
-            def on_release(event):
-                pan_start["x"] = None
+            bars.set_data(selected_titles, selected_hours)
+            host.draw()
 
-            def on_motion(event):
-                if pan_start["x"] is not None and event.inaxes == ax and event.xdata is not None:
-                    dx = pan_start["x"] - event.xdata
-                    ax.set_xlim(ax.get_xlim()[0] + dx, ax.get_xlim()[1] + dx)
-                    pan_start["x"] = event.xdata
-                    fig.canvas.draw_idle()
-
-            fig.canvas.mpl_connect("scroll_event", on_mouse_scroll)
-            fig.canvas.mpl_connect("button_press_event", on_press)
-            fig.canvas.mpl_connect("button_release_event", on_release)
-            fig.canvas.mpl_connect("motion_notify_event", on_motion)
-
-            selected_hours = [hours_dict[title] for title in selected_titles]
             df_chart = pd.DataFrame({
                 "Game": selected_titles,
                 "Hours": selected_hours
@@ -435,26 +440,59 @@ def generate_playtime_chart(parent_frame, log_box):
                 meta={"tryb wyboru": "lista gier", "liczba pozycji": len(selected_titles)}
             ))
 
-        def on_select_change(event):
-            selected_titles = [listbox.get(i) for i in listbox.curselection()]
-            draw_chart(selected_titles if selected_titles else all_titles)
-
-        listbox.bind('<<ListboxSelect>>', on_select_change)
-        draw_chart(all_titles)
+        select = bind_listbox_select(listbox, lambda: selected_items(listbox, all_titles), draw_chart)
+        select.flush()
+        host.fig.tight_layout(rect=[0, 0.18, 1, 1])
 
     except Exception as e:
         print(f"Błąd generowania wykresu: {e}")
 
+def _load_games_by_name():
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("SELECT name, id_game FROM game ORDER BY name ASC")
+        return cursor.fetchall()
+
+
+def _load_game_achievements(selected_game: str):
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT 
+                l.achievement_progress, 
+                l.achievements, 
+                g.name, 
+                g.id_game
+            FROM library l
+            JOIN game g ON g.id_game = l.id_game
+            WHERE g.name = %s
+        """, (selected_game,))
+        data = cursor.fetchall()
+        if not data:
+            return data, None
+
+        cursor.execute(
+            "SELECT MAX(achievements) AS max_ach FROM library WHERE id_game = %s",
+            (data[0]['id_game'],)
+        )
+        row_max = cursor.fetchone()
+        return data, (row_max['max_ach'] if row_max and row_max['max_ach'] else 1)
+
+
 def generate_achievement_pie_chart(parent_frame, log_target=None):
+    def fail(e):
+        print(f"Błąd generowania wykresu: {e}")
+        if log_target is not None:
+            append_log(log_target, f"[Pie] Błąd generowania wykresu: {e}")
+
+    load_panel(parent_frame, _load_games_by_name,
+               lambda games: _build_achievement_pie_chart(parent_frame, log_target, games), on_error=fail)
+
+
+def _build_achievement_pie_chart(parent_frame, log_target, games):
     def _log(msg: str):
         if log_target is not None:
             append_log(log_target, msg)
 
     try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("SELECT name, id_game FROM game ORDER BY name ASC")
-            games = cursor.fetchall()
-
         if not games:
             _log("[Pie] Brak gier do wyświetlenia.")
             return
@@ -476,37 +514,24 @@ def generate_achievement_pie_chart(parent_frame, log_target=None):
 
         chart_frame = tk.Frame(parent_frame, bg="#121222")
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        host = ChartHost(chart_frame, figsize=(6, 6), face="#121222", ax_face="#1A0033", spine_color=None)
+        ax = host.ax
+        loading = LoadingIndicator(chart_frame)
 
-        def draw_chart(selected_game: str):
-            for w in chart_frame.winfo_children():
-                w.destroy()
+        def on_sql_error(e):
+            print(f"Błąd SQL: {e}")
+            _log(f"[Pie] Błąd SQL: {e}")
+            host.clear()
 
-            try:
-                with with_db_connection(dictionary=True) as (conn, cursor):
-                    cursor.execute("""
-                        SELECT 
-                            l.achievement_progress, 
-                            l.achievements, 
-                            g.name, 
-                            g.id_game
-                        FROM library l
-                        JOIN game g ON g.id_game = l.id_game
-                        WHERE g.name = %s
-                    """, (selected_game,))
-                    data = cursor.fetchall()
-                    if not data:
-                        _log(f'[Pie] Brak danych dla gry: "{selected_game}".')
-                        return
-
-                    cursor.execute(
-                        "SELECT MAX(achievements) AS max_ach FROM library WHERE id_game = %s",
-                        (data[0]['id_game'],)
-                    )
-                    row_max = cursor.fetchone()
-                    max_ach = row_max['max_ach'] if row_max and row_max['max_ach'] else 1
-            except Exception as e:
-                print(f"Błąd SQL: {e}")
-                _log(f"[Pie] Błąd SQL: {e}")
+        def draw_chart(selected_game: str, token=None):
+            run_in_background(chart_frame, lambda: _load_game_achievements(selected_game),
+                              lambda result: render_chart(selected_game, *result),
+                              token=token, on_error=on_sql_error, indicator=loading)
+
+        def render_chart(selected_game: str, data, max_ach):
+            if not data:
+                _log(f'[Pie] Brak danych dla gry: "{selected_game}".')
+                host.clear()
                 return
 
             grouped = {}
@@ -518,15 +543,14 @@ def generate_achievement_pie_chart(parent_frame, log_target=None):
             counts = list(grouped.values())
             if not counts:
                 _log(f'[Pie] Brak wartości do narysowania dla: "{selected_game}".')
+                host.clear()
                 return
 
             percentages = [(a / max_ach) * 100 if max_ach else 0 for a in achieved]
             labels = [f"{v:.2f}% ({a}/{max_ach})" for a, v in zip(achieved, percentages)]
-            colors = plt.cm.viridis([i / max(1, len(counts)) for i in range(len(counts))])
+            colors = colormaps["viridis"]([i / max(1, len(counts)) for i in range(len(counts))])
 
-            fig, ax = plt.subplots(figsize=(6, 6))
-            fig.patch.set_facecolor("#121222")
-            ax.set_facecolor("#1A0033")
+            host.reset_axes()
 
             def make_autopct(sizes, raw_labels):
                 def pct(pct):
@@ -542,10 +566,7 @@ def generate_achievement_pie_chart(parent_frame, log_target=None):
                 textprops={'color': 'white', 'fontsize': 10}
             )
             ax.set_title(f'Osiągnięcia graczy w grze "{selected_game}" (%)', color='white', fontsize=13)
-
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            host.draw()
 
             df_pie = pd.DataFrame({
                 "Label": labels,
@@ -563,36 +584,58 @@ def generate_achievement_pie_chart(parent_frame, log_target=None):
             ))
             _log(f"[Chart] Snapshot: {selected_game} – {len(counts)} sektorów.")
 
-        def on_select_change(_event):
-            sel = listbox.curselection()
-            if sel:
-                draw_chart(listbox.get(sel[0]))
-
-        listbox.bind('<<ListboxSelect>>', on_select_change)
+        select = bind_listbox_select(listbox, lambda: selected_item(listbox), draw_chart)
 
         if game_titles:
             listbox.selection_set(0)
-            draw_chart(game_titles[0])
+            select.flush()
 
     except Exception as e:
         print(f"Błąd generowania wykresu: {e}")
         if log_target is not None:
             append_log(log_target, f"[Pie] Błąd generowania wykresu: {e}")
 
+def _load_achievement_genres():
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT DISTINCT ge.id_genre, ge.name
+            FROM genre ge
+            JOIN game_genre gg ON gg.id_genre = ge.id_genre
+            JOIN game g ON g.id_game = gg.id_game
+            JOIN library l ON l.id_game = g.id_game
+            WHERE l.achievements > 0
+            ORDER BY ge.name ASC
+        """)
+        return cursor.fetchall()
+
+
+def _load_achievements_by_genre(selected_genres):
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        placeholders = ','.join(['%s'] * len(selected_genres))
+        query = f"""
+            SELECT 
+                ge.name AS genre_name,
+                SUM(l.achievements) AS total_achieved,
+                SUM(l.achievements / NULLIF(l.achievement_progress, 0) * 100) AS estimated_possible
+            FROM library l
+            JOIN game g ON g.id_game = l.id_game
+            JOIN game_genre gg ON gg.id_game = g.id_game
+            JOIN genre ge ON ge.id_genre = gg.id_genre
+            WHERE ge.name IN ({placeholders})
+            GROUP BY ge.name
+        """
+        cursor.execute(query, selected_genres)
+        return cursor.fetchall()
+
+
 def generate_genre_achievement_chart(parent_frame, log_target):
-    try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("""
-                SELECT DISTINCT ge.id_genre, ge.name
-                FROM genre ge
-                JOIN game_genre gg ON gg.id_genre = ge.id_genre
-                JOIN game g ON g.id_game = gg.id_game
-                JOIN library l ON l.id_game = g.id_game
-                WHERE l.achievements > 0
-                ORDER BY ge.name ASC
-            """)
-            genres = cursor.fetchall()
+    load_panel(parent_frame, _load_achievement_genres,
+               lambda genres: _build_genre_achievement_chart(parent_frame, log_target, genres),
+               on_error=lambda e: print(f"Błąd generowania wykresu osiągnięć wg gatunków: {e}"))
+
 
+def _build_genre_achievement_chart(parent_frame, log_target, genres):
+    try:
         genre_dict = {g['name']: g['id_genre'] for g in genres}
         genre_names = list(genre_dict.keys())
 
@@ -617,33 +660,22 @@ def generate_genre_achievement_chart(parent_frame, log_target):
         chart_frame = tk.Frame(parent_frame, bg=CHART_FACE)
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        def draw_chart(selected_genres):
-            for w in chart_frame.winfo_children():
-                w.destroy()
-            if not selected_genres:
-                return
+        host = ChartHost(chart_frame, figsize=(7, 7), spine_color=None)
+        ax = host.ax
+        loading = LoadingIndicator(chart_frame)
 
-            try:
-                with with_db_connection(dictionary=True) as (conn, cursor):
-                    placeholders = ','.join(['%s'] * len(selected_genres))
-                    query = f"""
-                        SELECT 
-                            ge.name AS genre_name,
-                            SUM(l.achievements) AS total_achieved,
-                            SUM(l.achievements / NULLIF(l.achievement_progress, 0) * 100) AS estimated_possible
-                        FROM library l
-                        JOIN game g ON g.id_game = l.id_game
-                        JOIN game_genre gg ON gg.id_game = g.id_game
-                        JOIN genre ge ON ge.id_genre = gg.id_genre
-                        WHERE ge.name IN ({placeholders})
-                        GROUP BY ge.name
-                    """
-                    cursor.execute(query, selected_genres)
-                    data = cursor.fetchall()
-            except Exception as e:
-                print(f"Błąd SQL: {e}")
+        def on_sql_error(e):
+            print(f"Błąd SQL: {e}")
+            host.clear()
+
+        def draw_chart(selected_genres, token=None):
+            if not selected_genres:
                 return
+            run_in_background(chart_frame, lambda: _load_achievements_by_genre(selected_genres),
+                              lambda data: render_chart(selected_genres, data),
+                              token=token, on_error=on_sql_error, indicator=loading)
 
+        def render_chart(selected_genres, data):
             labels, values = [], []
             for row in data:
                 total = row['total_achieved']
@@ -654,6 +686,7 @@ def generate_genre_achievement_chart(parent_frame, log_target):
                     values.append(percent)
 
             if not values:
+                host.clear()
                 return
 
             # --- RYSOWANIE ---
@@ -666,10 +699,7 @@ def generate_genre_achievement_chart(parent_frame, log_target):
                     c = next(color_cycle)
                 colors.append(c)
 
-            fig, ax = plt.subplots(figsize=(7, 7))
-            fig.patch.set_facecolor(CHART_FACE)
-            ax.set_facecolor(CHART_AX_FACE)
-
+            host.reset_axes()
             wedges, _ = ax.pie(values, labels=labels, colors=colors, autopct=None,
                                textprops={'color': CHART_TEXT_COLOR})
             for i, wedge in enumerate(wedges):
@@ -680,9 +710,7 @@ def generate_genre_achievement_chart(parent_frame, log_target):
                         ha='center', va='center', fontsize=10, color=CHART_TEXT_COLOR)
 
             ax.set_title("Zdobyte osiągnięcia wg gatunku (%)", color=CHART_TEXT_COLOR, fontsize=14)
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            host.draw()
 
             # --- SNAPSHOT dla AI (dokładnie to, co na wykresie) ---
             df_pie = pd.DataFrame({
@@ -701,30 +729,54 @@ def generate_genre_achievement_chart(parent_frame, log_target):
             if log_target:
                 append_log(log_target, f"[Chart] Snapshot (gatunki): {len(values)} sektorów z {len(selected_genres)} wybranych.")
 
-        def on_select_change(event=None):
-            selected = [listbox.get(i) for i in listbox.curselection()]
-            draw_chart(selected if selected else genre_names)
-
-        listbox.bind('<<ListboxSelect>>', on_select_change)
-        draw_chart(genre_names)
+        select = bind_listbox_select(listbox, lambda: selected_items(listbox, genre_names), draw_chart)
+        select.flush()
 
     except Exception as e:
         print(f"Błąd generowania wykresu osiągnięć wg gatunków: {e}")
 
+def _load_item_genres() -> list[str]:
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT DISTINCT ge.name
+            FROM genre ge
+            JOIN game_genre gg ON gg.id_genre = ge.id_genre
+            JOIN game g ON g.id_game = gg.id_game
+            JOIN library l ON l.id_game = g.id_game
+            WHERE l.items_owned > 0
+            ORDER BY ge.name ASC
+        """)
+        return [row['name'] for row in cursor.fetchall()]
+
+
+def _load_items_by_genre(selected_genres):
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        placeholders = ','.join(['%s'] * len(selected_genres))
+        query = f"""
+            SELECT ge.name AS genre_name, SUM(l.items_owned) AS total_items
+            FROM library l
+            JOIN game g ON g.id_game = l.id_game
+            JOIN game_genre gg ON gg.id_game = g.id_game
+            JOIN genre ge ON ge.id_genre = gg.id_genre
+            WHERE ge.name IN ({placeholders}) AND l.items_owned > 0
+            GROUP BY ge.name
+            ORDER BY total_items DESC
+        """
+        cursor.execute(query, selected_genres)
+        return cursor.fetchall()
+
+
 def generate_real_currency_items_chart(parent_frame, log_target):
-    try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("""
-                SELECT DISTINCT ge.name
-                FROM genre ge
-                JOIN game_genre gg ON gg.id_genre = ge.id_genre
-                JOIN game g ON g.id_game = gg.id_game
-                JOIN library l ON l.id_game = g.id_game
-                WHERE l.items_owned > 0
-                ORDER BY ge.name ASC
-            """)
-            genres = [row['name'] for row in cursor.fetchall()]
+    def fail(e):
+        print(f"Błąd generowania wykresu przedmiotów za walutę: {e}")
+        append_log(log_target, f"[Items] Błąd: {e}")
 
+    load_panel(parent_frame, _load_item_genres,
+               lambda genres: _build_real_currency_items_chart(parent_frame, log_target, genres), on_error=fail)
+
+
+def _build_real_currency_items_chart(parent_frame, log_target, genres):
+    try:
         for w in parent_frame.winfo_children():
             w.destroy()
 
@@ -746,61 +798,42 @@ def generate_real_currency_items_chart(parent_frame, log_target):
         chart_frame = tk.Frame(parent_frame, bg="#121222")
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        def draw_chart(selected_genres):
-            for w in chart_frame.winfo_children():
-                w.destroy()
+        host = ChartHost(chart_frame, figsize=(10, 6), face="#121222", ax_face="#1A0033", spine_color="#FF00AA")
+        ax = host.ax
+        bars = BarSeries(ax, "magenta")
+        ax.set_title("Przedmioty za prawdziwą walutę wg gatunku", color='white', fontsize=14)
+        ax.set_ylabel("Liczba przedmiotów", color='white')
+        ax.tick_params(axis='x', colors='white')
+        ax.tick_params(axis='y', colors='white')
+        loading = LoadingIndicator(chart_frame)
+        layout = {"done": False}
+
+        def draw_chart(selected_genres, token=None):
             if not selected_genres:
                 return
 
-            try:
-                with with_db_connection(dictionary=True) as (conn, cursor):
-                    placeholders = ','.join(['%s'] * len(selected_genres))
-                    query = f"""
-                        SELECT ge.name AS genre_name, SUM(l.items_owned) AS total_items
-                        FROM library l
-                        JOIN game g ON g.id_game = l.id_game
-                        JOIN game_genre gg ON gg.id_game = g.id_game
-                        JOIN genre ge ON ge.id_genre = gg.id_genre
-                        WHERE ge.name IN ({placeholders}) AND l.items_owned > 0
-                        GROUP BY ge.name
-                        ORDER BY total_items DESC
-                    """
-                    cursor.execute(query, selected_genres)
-                    data = cursor.fetchall()
-            except Exception as e:
+            def on_sql_error(e):
                 print(f"Błąd SQL: {e}")
-                return
+                render_chart(selected_genres, [])
+
+            run_in_background(chart_frame, lambda: _load_items_by_genre(selected_genres),
+                              lambda data: render_chart(selected_genres, data),
+                              token=token, on_error=on_sql_error, indicator=loading)
 
+        def render_chart(selected_genres, data):
             if not data:
+                bars.set_data([], [])
+                host.draw()
                 return
 
             labels = [row['genre_name'] for row in data]
             values = [int(row['total_items'] or 0) for row in data]
 
-            # --- RYSOWANIE ---
-            fig, ax = plt.subplots(figsize=(max(10, len(labels) * 0.7), 6))
-            fig.patch.set_facecolor("#121222")
-            ax.set_facecolor("#1A0033")
-
-            bars = ax.bar(labels, values, color="magenta")
-            ax.set_title("Przedmioty za prawdziwą walutę wg gatunku", color='white', fontsize=14)
-            ax.set_ylabel("Liczba przedmiotów", color='white')
-            ax.tick_params(axis='x', labelrotation=45, colors='white')
-            ax.tick_params(axis='y', colors='white')
-            for spine in ax.spines.values():
-                spine.set_color("#FF00AA")
-
-            for bar in bars:
-                height = bar.get_height()
-                ax.annotate(f'{int(height)}', xy=(bar.get_x() + bar.get_width() / 2, height),
-                            xytext=(0, 3), textcoords="offset points",
-                            ha='center', va='bottom', color='white', fontsize=9)
-                fig.tight_layout(rect=[0, 0.08, 1, 1])
-
-
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            bars.set_data(labels, values)
+            if not layout["done"]:   # układ liczony raz, gdy są już etykiety pierwszego wyniku
+                host.fig.tight_layout(rect=[0, 0.08, 1, 1])
+                layout["done"] = True
+            host.draw()
 
             df_bar = pd.DataFrame({
                 "Genre": labels,
@@ -817,29 +850,36 @@ def generate_real_currency_items_chart(parent_frame, log_target):
             ))
             append_log(log_target, f"[Chart] Snapshot (items by genre): {len(values)} słupków.")
 
-        def on_select_change(event=None):
-            selected = [listbox.get(i) for i in listbox.curselection()]
-            draw_chart(selected if selected else genres)
-
-        listbox.bind('<<ListboxSelect>>', on_select_change)
-        draw_chart(genres)
+        select = bind_listbox_select(listbox, lambda: selected_items(listbox, genres), draw_chart)
+        select.flush()
 
     except Exception as e:
         print(f"Błąd generowania wykresu przedmiotów za walutę: {e}")
         append_log(log_target, f"[Items] Błąd: {e}")
 
+def _load_items_by_age():
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT u.age, SUM(l.items_owned) AS total_items
+            FROM user u
+            JOIN library l ON u.id_user = l.id_user
+            WHERE l.items_owned > 0
+            GROUP BY u.age
+        """)
+        return cursor.fetchall()
+
+
 def generate_items_by_age_chart(parent_frame, log_target):
-    try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("""
-                SELECT u.age, SUM(l.items_owned) AS total_items
-                FROM user u
-                JOIN library l ON u.id_user = l.id_user
-                WHERE l.items_owned > 0
-                GROUP BY u.age
-            """)
-            data = cursor.fetchall()
+    def fail(e):
+        print(f"Błąd generowania wykresu wg wieku: {e}")
+        append_log(log_target, f"[AgeItems] Błąd: {e}")
+
+    load_panel(parent_frame, _load_items_by_age,
+               lambda data: _build_items_by_age_chart(parent_frame, log_target, data), on_error=fail)
+
 
+def _build_items_by_age_chart(parent_frame, log_target, data):
+    try:
         # wyczyść panel
         for w in parent_frame.winfo_children():
             w.destroy()
@@ -884,9 +924,8 @@ def generate_items_by_age_chart(parent_frame, log_target):
 
         # --- RYSOWANIE ---
         colors = ['#FF007F', '#FFAA00', '#66FF66', '#0099FF', '#9933FF', '#FF3333', '#33CCCC']
-        fig, ax = plt.subplots(figsize=(7, 7))
-        fig.patch.set_facecolor("#121222")
-        ax.set_facecolor("#1A0033")
+        host = ChartHost(chart_frame, figsize=(7, 7), face="#121222", ax_face="#1A0033", spine_color=None)
+        ax = host.ax
 
         ax.pie(
             values,
@@ -896,10 +935,7 @@ def generate_items_by_age_chart(parent_frame, log_target):
             textprops={'color': 'white', 'fontsize': 10}
         )
         ax.set_title("Przedmioty za prawdziwą walutę wg wieku użytkowników", color='white', fontsize=13)
-
-        canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        host.draw()
 
         # --- SNAPSHOT dla AI (dokładnie to, co na wykresie) ---
         df_pie = pd.DataFrame({
@@ -921,12 +957,41 @@ def generate_items_by_age_chart(parent_frame, log_target):
         print(f"Błąd generowania wykresu wg wieku: {e}")
         append_log(log_target, f"[AgeItems] Błąd: {e}")
 
+def _load_user_logins() -> list[str]:
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("SELECT login FROM user ORDER BY login ASC;")
+        return [row['login'] for row in cursor.fetchall()]
+
+
+def _load_user_sessions(login: str):
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("SELECT id_user FROM user WHERE login = %s", (login,))
+        user = cursor.fetchone()
+        if not user:
+            return None
+        user_id = user["id_user"]
+
+        cursor.execute("""
+            SELECT g.name AS game_name, l.purchase_date, a.time AS last_session, a.game_time
+            FROM library l
+            JOIN game g ON g.id_game = l.id_game
+            JOIN game_activity ga ON ga.id_game = g.id_game
+            JOIN activity a ON a.id_activity = ga.id_activity
+            WHERE l.id_user = %s AND a.id_user = %s AND l.purchase_date IS NOT NULL
+            GROUP BY g.name, l.purchase_date, a.time, a.game_time
+            ORDER BY a.time DESC
+        """, (user_id, user_id))
+        return cursor.fetchall()
+
+
 def generate_purchase_vs_last_session_user_chart(parent_frame, log_target=None):
-    try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("SELECT login FROM user ORDER BY login ASC;")
-            users = [row['login'] for row in cursor.fetchall()]
+    load_panel(parent_frame, _load_user_logins,
+               lambda users: _build_purchase_vs_last_session_user_chart(parent_frame, log_target, users),
+               on_error=lambda e: print(f"Błąd generowania wykresu użytkownika: {e}"))
 
+
+def _build_purchase_vs_last_session_user_chart(parent_frame, log_target, users):
+    try:
         for widget in parent_frame.winfo_children():
             widget.destroy()
 
@@ -948,30 +1013,62 @@ def generate_purchase_vs_last_session_user_chart(parent_frame, log_target=None):
         chart_frame = tk.Frame(parent_frame, bg="#121222")
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        def draw_chart(login):
-            for widget in chart_frame.winfo_children():
-                widget.destroy()
-
-            with with_db_connection(dictionary=True) as (conn, cursor):
-                cursor.execute("SELECT id_user FROM user WHERE login = %s", (login,))
-                user = cursor.fetchone()
-                if not user:
-                    return
-                user_id = user["id_user"]
-
-                cursor.execute("""
-                    SELECT g.name AS game_name, l.purchase_date, a.time AS last_session, a.game_time
-                    FROM library l
-                    JOIN game g ON g.id_game = l.id_game
-                    JOIN game_activity ga ON ga.id_game = g.id_game
-                    JOIN activity a ON a.id_activity = ga.id_activity
-                    WHERE l.id_user = %s AND a.id_user = %s AND l.purchase_date IS NOT NULL
-                    GROUP BY g.name, l.purchase_date, a.time, a.game_time
-                    ORDER BY a.time DESC
-                """, (user_id, user_id))
-                rows = cursor.fetchall()
+        host = ChartHost(chart_frame, figsize=(10, 6), face="#121222", ax_face="#1A0033", spine_color="#FF00AA")
+        fig, ax = host.fig, host.ax
+        scatter = ax.scatter([], [], color="#00FFFF", alpha=0.6)
+        ax.xaxis_date()
+        ax.yaxis_date()
+        ax.set_xlabel("Data zakupu", color='white')
+        ax.set_ylabel("Data ostatniej sesji", color='white')
+        ax.tick_params(axis='x', rotation=45, colors='white')
+        ax.tick_params(axis='y', colors='white')
+
+        annot = ax.annotate(
+            "", xy=(0, 0), xytext=(15, 15), textcoords="offset points",
+            bbox=dict(boxstyle="round", fc="w"),
+            arrowprops=dict(arrowstyle="->")
+        )
+        annot.set_visible(False)
+        current = {"df": None}
+
+        def update_annot(i, event):
+            row = current["df"].iloc[i]
+            annot.xy = (mdates.date2num(row["purchase_date"]), mdates.date2num(row["last_session"]))
+            annot.set_text(
+                f"{row['game_name']}\nZakup: {row['purchase_date'].date() if pd.notna(row['purchase_date']) else '—'}"
+                f"\nSesja: {row['last_session'].date() if pd.notna(row['last_session']) else '—'}"
+                f"\nCzas: {row['game_time']} min"
+            )
+            annot.set_color("#00FFFF")
+            patch = annot.get_bbox_patch()
+            patch.set_facecolor("black")
+            patch.set_alpha(0.8)
+            patch.set_edgecolor("#00FFFF")
+            patch.set_linewidth(1)
+            w, h = fig.bbox.width, fig.bbox.height
+            offset_x = -150 if event.x > w / 2 else 15
+            offset_y = -40 if event.y > h / 2 else 15
+            annot.set_position((offset_x, offset_y))
+
+        hover = HoverEngine(ax, annot, ScatterHoverIndex(ax, [], []), update_annot)
+
+        loading = LoadingIndicator(chart_frame)
+
+        def draw_chart(login, token=None):
+            run_in_background(chart_frame, lambda: _load_user_sessions(login),
+                              lambda rows: render_chart(login, rows), token=token,
+                              on_error=lambda e: print(f"Błąd generowania wykresu użytkownika: {e}"),
+                              indicator=loading)
+
+        def render_chart(login, rows):
+            if rows is None:   # użytkownik zniknął z bazy
+                return
 
+            hover.refresh()
+            ax.set_title(f"{login} – Zakup vs Ostatnia sesja", color='white', fontsize=14)
             if not rows:
+                update_scatter(scatter, [], [])
+                host.draw()
                 return
 
             df = pd.DataFrame(rows)
@@ -979,63 +1076,12 @@ def generate_purchase_vs_last_session_user_chart(parent_frame, log_target=None):
             df["last_session"]  = pd.to_datetime(df["last_session"],  errors="coerce")
             df["game_time"]     = pd.to_numeric(df["game_time"], errors="coerce").fillna(0).astype(int)
 
-            fig, ax = plt.subplots(figsize=(10, 6))
-            fig.patch.set_facecolor("#121222")
-            ax.set_facecolor("#1A0033")
-
-            scatter = ax.scatter(df["purchase_date"], df["last_session"], color="#00FFFF", alpha=0.6)
-
-            ax.set_title(f"{login} – Zakup vs Ostatnia sesja", color='white', fontsize=14)
-            ax.set_xlabel("Data zakupu", color='white')
-            ax.set_ylabel("Data ostatniej sesji", color='white')
-            ax.tick_params(axis='x', rotation=45, colors='white')
-            ax.tick_params(axis='y', colors='white')
-            for spine in ax.spines.values():
-                spine.set_color("#FF00AA")
-
-            annot = ax.annotate(
-                "", xy=(0, 0), xytext=(15, 15), textcoords="offset points",
-                bbox=dict(boxstyle="round", fc="w"),
-                arrowprops=dict(arrowstyle="->")
-            )
-            annot.set_visible(False)
-
-            def update_annot(ind):
-                i = ind["ind"][0]
-                row = df.iloc[i]
-                annot.xy = (row["purchase_date"], row["last_session"])
-                annot.set_text(
-                    f"{row['game_name']}\nZakup: {row['purchase_date'].date() if pd.notna(row['purchase_date']) else '—'}"
-                    f"\nSesja: {row['last_session'].date() if pd.notna(row['last_session']) else '—'}"
-                    f"\nCzas: {row['game_time']} min"
-                )
-                annot.set_color("#00FFFF")
-                patch = annot.get_bbox_patch()
-                patch.set_facecolor("black")
-                patch.set_alpha(0.8)
-                patch.set_edgecolor("#00FFFF")
-                patch.set_linewidth(1)
-
-            def on_hover(event):
-                if event.inaxes == ax:
-                    cont, ind = scatter.contains(event)
-                    if cont:
-                        update_annot(ind)
-                        w, h = fig.bbox.width, fig.bbox.height
-                        offset_x = -150 if event.x > w / 2 else 15
-                        offset_y = -40 if event.y > h / 2 else 15
-                        annot.set_position((offset_x, offset_y))
-                        annot.set_visible(True)
-                        fig.canvas.draw_idle()
-                    elif annot.get_visible():
-                        annot.set_visible(False)
-                        fig.canvas.draw_idle()
-
-            fig.canvas.mpl_connect("motion_notify_event", on_hover)
-
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            x = mdates.date2num(df["purchase_date"])
+            y = mdates.date2num(df["last_session"])
+            current["df"] = df
+            update_scatter(scatter, x, y)
+            hover.set_index(ScatterHoverIndex(ax, x, y, collection=scatter))
+            host.draw()
 
             df_snap = pd.DataFrame({
                 "game_name":    df["game_name"].astype(str),
@@ -1056,44 +1102,40 @@ def generate_purchase_vs_last_session_user_chart(parent_frame, log_target=None):
             ))
             append_log(log_target or parent_frame, f"[Chart] Snapshot: {login} – {len(df_snap)} punktów.")
 
-        def on_select(event):
-            selection = listbox.curselection()
-            if selection:
-                login = listbox.get(selection[0])
-                draw_chart(login)
-
-        listbox.bind("<<ListboxSelect>>", on_select)
+        bind_listbox_select(listbox, lambda: selected_item(listbox), draw_chart)
 
     except Exception as e:
         print(f"Błąd generowania wykresu użytkownika: {e}")
 
+def _load_activity_series(appid):
+    # historia z lokalnej tabeli player_stats (w pamięci jako tablice + agregaty); sieć tylko do dopisania nowych dni
+    series = get_activity_series(appid, load_daily_stats)
+    if len(series) <= BACKFILL_MAX_ROWS:   # brak historii (co najwyżej wiersz startowy)
+        sync_player_stats(appid)
+        invalidate_activity_series(appid)
+        series = get_activity_series(appid, load_daily_stats)
+    elif series.last_day < epoch_day() - 1:
+        threading.Thread(target=sync_player_stats, args=(appid,), kwargs={"log": lambda m: None},
+                         daemon=True).start()   # dociągnie się do kolejnego otwarcia
+    return series
+
+
 def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana gra", log_target=None):
-    try:
-        url = f"https://steamcharts.com/app/{appid}/chart-data.json"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        try:
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-            data_points = res.json()
-        except Exception as e:
-            for widget in parent_frame.winfo_children():
-                widget.destroy()
-            error = tk.Label(parent_frame, text=f"Błąd pobierania danych z API:\n{e}", fg="white", bg="#121222")
-            error.pack(pady=20)
-            return
+    def fail(e):
+        for widget in parent_frame.winfo_children():
+            widget.destroy()
+        error = tk.Label(parent_frame, text=f"Błąd pobierania danych:\n{e}", fg="white", bg="#121222")
+        error.pack(pady=20)
 
-        filtered_data = [row for row in data_points if 946684800000 <= row[0] <= 9223372036854775807]
-        if not filtered_data:
-            raise ValueError("Brak poprawnych danych wykresu.")
+    load_panel(parent_frame, lambda: _load_activity_series(appid),
+               lambda series: _build_steamcharts_activity_chart(parent_frame, appid, game_name, log_target, series),
+               on_error=fail)
 
-        df = pd.DataFrame(filtered_data, columns=["timestamp", "players"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", errors="coerce")
-        df = df.dropna()
-        df = df[df["timestamp"] < pd.Timestamp.now() + pd.Timedelta(days=1)]
-        df = df[df["players"] > 0]
 
-        df["date"] = df["timestamp"].dt.floor("d")  # datetime64
-        df_daily = df.groupby("date")["players"].mean().reset_index()
+def _build_steamcharts_activity_chart(parent_frame, appid, game_name, log_target, series):
+    try:
+        if not len(series):
+            raise ValueError("Brak poprawnych danych wykresu.")
 
         for widget in parent_frame.winfo_children():
             widget.destroy()
@@ -1111,15 +1153,24 @@ def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana
         chart_frame = tk.Frame(parent_frame, bg="#121222")
         chart_frame.pack(fill="both", expand=True)
 
-        def resample_for_viewport(df_view, max_points=1000):
-            if len(df_view) <= max_points:
-                return df_view
-            step = max(1, len(df_view) // max_points)
-            return df_view.iloc[::step]
+        # piramida rozdzielczości per poziom agregacji, liczona raz i trzymana przy serii
+        # (pan/zoom wybiera poziom piramidy i wycina; min/max zachowuje piki)
+        def level_pyramid(level: str) -> DownsamplePyramid:
+            def build():
+                days, values = series.levels[level]
+                return DownsamplePyramid(mdates.date2num(days_to_datetime64(days)), values, method="minmax")
+            return series.derived(("pyramid", level), build)
+
+        current = {"level": "day", "pyramid": level_pyramid("day")}
+
+        def viewport_points() -> int:
+            try:
+                return max(200, int(ax.bbox.width) * 2)   # ~2 punkty (min+max) na piksel
+            except Exception:
+                return 1000
 
-        fig, ax = plt.subplots(figsize=(12, 6))
-        fig.patch.set_facecolor("#121222")
-        ax.set_facecolor("#1A0033")
+        host = ChartHost(chart_frame, figsize=(12, 6), face="#121222", ax_face="#1A0033", spine_color="#FF00AA")
+        fig, ax = host.fig, host.ax
         line, = ax.plot([], [], color="lime", linewidth=1)
 
         annot = ax.annotate("", xy=(0, 0), xytext=(15, 15),
@@ -1135,70 +1186,58 @@ def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana
         ax.set_ylim(bottom=0)
         ax.yaxis.set_major_formatter(ticker.StrMethodFormatter("{x:,.0f}"))
         fig.tight_layout(rect=[0.05, 0.12, 1, 0.90])
-        for spine in ax.spines.values():
-            spine.set_color("#FF00AA")
-
-        canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        
-
-        def on_hover(event):
-            if event.inaxes == ax and event.xdata is not None:
-                x_vals = visible_points["x"]; y_vals = visible_points["y"]
-                if len(x_vals) == 0:
-                    return
-                idx = np.argmin(np.abs(x_vals - event.xdata))
-                x = x_vals[idx]; y = y_vals[idx]
-                annot.xy = (x, y)
-                annot.set_text(f"Data: {mdates.num2date(x).strftime('%Y-%m-%d')}\nGraczy: {int(y):,}")
-                annot.set_color("#00FFFF")
-                annot.set_visible(True)
-                fig.canvas.draw_idle()
-            else:
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    fig.canvas.draw_idle()
+
+        hover_index = LineHoverIndex()
+
+        def update_annot(idx, _event):
+            x = hover_index.x[idx]; y = hover_index.y[idx]
+            annot.xy = (x, y)
+            annot.set_text(f"Data: {mdates.num2date(x).strftime('%Y-%m-%d')}\nGraczy: {int(y):,}")
+            annot.set_color("#00FFFF")
+
+        hover = HoverEngine(ax, annot, hover_index, update_annot)
 
         def update_plot_data(xlim=None):
             range_label = selected_range.get()
             days = days_map[range_label]
-            df_filtered = df_daily.copy()
+            x0 = x1 = None
+            from_day = None if days is None else epoch_day() - days
 
             if xlim:
-                left = np.datetime64(pd.to_datetime(mdates.num2date(xlim[0])).normalize())
-                right = np.datetime64(pd.to_datetime(mdates.num2date(xlim[1])).normalize())
-                df_filtered = df_filtered[(df_filtered["date"] >= left) & (df_filtered["date"] <= right)]
-            elif days:
-                min_date = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
-                df_filtered = df_filtered[df_filtered["date"] >= min_date]
+                x0, x1 = xlim
+            elif from_day is not None:
+                x0 = mdates.date2num(np.datetime64(from_day, "D"))
+
+            span_days, _ = series.slice("day", from_day)
+            level = pick_level(int(span_days[-1] - span_days[0]) if len(span_days) else 0)
+            current["level"], current["pyramid"] = level, level_pyramid(level)
+            ax.set_ylabel(f"Gracze (średnia {LEVEL_LABELS[level]})", color="white")
 
-            df_filtered = df_filtered.sort_values("date")
-            df_filtered = resample_for_viewport(df_filtered)
+            x, y = current["pyramid"].slice(x0, x1, max_points=viewport_points())
+            if x0 is not None:
+                keep = x >= x0
+                x, y = x[keep], y[keep]
 
-            if df_filtered.empty:
+            if len(x) == 0:
                 line.set_data([], [])
                 ax.set_title("Brak danych", color="white")
                 fig.canvas.draw_idle()
                 return
 
-            x = df_filtered["date"]
-            y = pd.to_numeric(df_filtered["players"], errors='coerce').fillna(0)
-
-            line.set_data(mdates.date2num(x), y)
-            visible_points["x"] = mdates.date2num(x)
-            visible_points["y"] = y
+            line.set_data(x, y)
+            hover_index.set_data(x, y)
+            hover.refresh()
             ax.xaxis_date()
-            ax.set_xlim(mdates.date2num(x.min()), mdates.date2num(x.max()))
+            ax.set_xlim(x.min(), x.max())
             ax.set_ylim(y.min() * 0.95, y.max() * 1.05)
             ax.grid(True, color="#333333", linestyle="--", alpha=0.5)
-            ax.set_title(f"{game_name} – Średnia dzienna liczba graczy ({range_label})", color="white")
+            ax.set_title(f"{game_name} – Średnia {LEVEL_LABELS[level]} liczba graczy ({range_label})", color="white")
             fig.canvas.draw_idle()
 
             # === TU: rejestrujemy SNAPSHOT dla przycisku z main ===
             df_snap = pd.DataFrame({
-                "Date": pd.to_datetime(df_filtered["date"]).dt.strftime("%Y-%m-%d"),
-                "Players": pd.to_numeric(df_filtered["players"], errors="coerce").fillna(0).astype(int)
+                "Date": pd.to_datetime(mdates.num2date(x)).strftime("%Y-%m-%d"),
+                "Players": np.asarray(y).astype(int)
             })
             register_chart_snapshot(ChartSnapshot(
                 chart_type="line",
@@ -1207,32 +1246,27 @@ def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana
                 x_col="Date",
                 y_col="Players",
                 series_col=None,
-                meta={"appid": int(appid), "game": game_name, "range": range_label, "points": int(len(df_snap))}
+                meta={"appid": int(appid), "game": game_name, "range": range_label, "level": level,
+                      "points": int(len(df_snap))}
             ))
             if log_target is not None:
                 append_log(log_target, f"[Chart] Snapshot: {game_name} – {range_label} – {len(df_snap)} punktów.")
 
-            update_visible_data(df_daily)
+            update_visible_data()
 
         pan_start = {"x": None, "y": None}
 
-        def update_visible_data(df):
+        def update_visible_data(_df=None):
             xlim = ax.get_xlim()
-            left = np.datetime64(pd.to_datetime(mdates.num2date(xlim[0])).normalize())
-            right = np.datetime64(pd.to_datetime(mdates.num2date(xlim[1])).normalize())
-
-            visible_df = df[(df["date"] >= left) & (df["date"] <= right)].copy()
-            if visible_df.empty:
+            x, y = current["pyramid"].slice(xlim[0], xlim[1], max_points=viewport_points())
+            if len(x) == 0:
                 line.set_data([], [])
                 fig.canvas.draw_idle()
                 return
 
-            visible_df = resample_for_viewport(visible_df, max_points=500)
-            x = visible_df["date"]; y = visible_df["players"]
-
-            line.set_data(mdates.date2num(x), y)
-            visible_points["x"] = mdates.date2num(x)
-            visible_points["y"] = y
+            line.set_data(x, y)
+            hover_index.set_data(x, y)
+            hover.refresh()
 
             if pd.notnull(y.min()) and pd.notnull(y.max()) and y.max() > y.min():
                 y_min = y.min(); y_max = y.max()
@@ -1254,9 +1288,8 @@ def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana
             new_ylim = [ydata - (ydata - cur_ylim[0]) * scale_factor,
                         ydata + (cur_ylim[1] - ydata) * scale_factor]
             ax.set_xlim(new_xlim); ax.set_ylim(new_ylim)
-            update_visible_data(df_daily)
+            update_visible_data()
 
-        visible_points = {"x": [], "y": []}
         pan_start = {"x": None, "y": None}
 
         def on_press(event):
@@ -1273,13 +1306,12 @@ def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana
                 ax.set_xlim(ax.get_xlim()[0] + dx, ax.get_xlim()[1] + dx)
                 ax.set_ylim(ax.get_ylim()[0] + dy, ax.get_ylim()[1] + dy)
                 pan_start["x"], pan_start["y"] = event.xdata, event.ydata
-                update_visible_data(df_daily)
+                update_visible_data()
 
-        fig.canvas.mpl_connect("button_press_event", on_press)
-        fig.canvas.mpl_connect("button_release_event", on_release)
-        fig.canvas.mpl_connect("motion_notify_event", on_motion)
-        fig.canvas.mpl_connect("scroll_event", on_scroll)
-        fig.canvas.mpl_connect("motion_notify_event", on_hover)
+        host.connect("button_press_event", on_press)
+        host.connect("button_release_event", on_release)
+        host.connect("motion_notify_event", on_motion)
+        host.connect("scroll_event", on_scroll)
 
         dropdown.bind("<<ComboboxSelected>>", lambda e: update_plot_data())
         update_plot_data()
@@ -1290,22 +1322,28 @@ def generate_steamcharts_activity_chart(parent_frame, appid, game_name="Wybrana
         error = tk.Label(parent_frame, text=f"Błąd pobierania wykresu:\n{e}", fg="white", bg="#121222")
         error.pack(pady=20)
 
+def _load_steamcharts_games():
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT name, steam_appid FROM game 
+            WHERE steam_appid IS NOT NULL 
+            ORDER BY name
+        """)
+        return cursor.fetchall()
+
+
 def show_steamcharts_selection(parent_frame):
-    try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("""
-                SELECT name, steam_appid FROM game 
-                WHERE steam_appid IS NOT NULL 
-                ORDER BY name
-            """)
-            games = cursor.fetchall()
-    except Exception as e:
+    def fail(e):
         for widget in parent_frame.winfo_children():
             widget.destroy()
         error = tk.Label(parent_frame, text=f"Błąd bazy danych:\n{e}", fg="white", bg="#121222")
         error.pack(pady=20)
-        return
 
+    load_panel(parent_frame, _load_steamcharts_games,
+               lambda games: _build_steamcharts_selection(parent_frame, games), on_error=fail)
+
+
+def _build_steamcharts_selection(parent_frame, games):
     for widget in parent_frame.winfo_children():
         widget.destroy()
 
@@ -1316,26 +1354,34 @@ def show_steamcharts_selection(parent_frame):
         listbox.insert(tk.END, name)
     listbox.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
 
-    def on_select(event):
-        index = listbox.curselection()
-        if index:
-            selected_name = listbox.get(index[0])
-            appid = game_dict[selected_name]
-            generate_steamcharts_activity_chart(parent_frame, appid, selected_name)
+    def show_game(selected_name, _token=None):
+        generate_steamcharts_activity_chart(parent_frame, game_dict[selected_name], selected_name)
+
+    bind_listbox_select(listbox, lambda: selected_item(listbox), show_game)
+
+def _load_mods_by_game():
+    with with_db_connection() as (conn, cursor):
+        cursor.execute("""
+            SELECT name, mods
+            FROM game
+            WHERE mods IS NOT NULL
+            ORDER BY mods DESC
+        """)
+        return cursor.fetchall()
 
-    listbox.bind("<<ListboxSelect>>", on_select)
 
 def generate_mods_chart(parent_frame, log_target=None):
-    try:
-        with with_db_connection() as (conn, cursor):
-            cursor.execute("""
-                SELECT name, mods
-                FROM game
-                WHERE mods IS NOT NULL
-                ORDER BY mods DESC
-            """)
-            data = cursor.fetchall()
+    def fail(e):
+        print(f"Błąd generowania wykresu modów: {e}")
+        if log_target is not None:
+            append_log(log_target, f"[ModsChart] Błąd: {e}")
+
+    load_panel(parent_frame, _load_mods_by_game,
+               lambda data: _build_mods_chart(parent_frame, log_target, data), on_error=fail)
 
+
+def _build_mods_chart(parent_frame, log_target, data):
+    try:
         if not data:
             return
 
@@ -1363,75 +1409,23 @@ def generate_mods_chart(parent_frame, log_target=None):
         chart_frame = tk.Frame(parent_frame, bg=CHART_FACE)
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        def draw_chart(selected_titles):
-            for w in chart_frame.winfo_children():
-                w.destroy()
+        host = ChartHost(chart_frame, figsize=(10, 6), layout="constrained")
+        ax = host.ax
+        bars = WindowedBarSeries(ax, CHART_BAR_COLOR)
+        ax.set_title("Liczba modów do gier", color='magenta', fontsize=14, pad=20)
+        ax.set_ylabel("Ilość modów", color='white')
+        ax.tick_params(axis='x', colors='white')
+        ax.tick_params(axis='y', colors='white')
+
+        attach_bar_pan(host, bars)
 
+        def draw_chart(selected_titles, _token=None):
             if not selected_titles:
                 return
 
             selected_mods = [mods_dict[t] for t in selected_titles]
-            num_bars = len(selected_titles)
-
-            fig, ax = plt.subplots(
-            figsize=(max(10, num_bars * 0.55), 6),
-            constrained_layout=True
-            )
-            fig.patch.set_facecolor(CHART_FACE)
-            ax.set_facecolor(CHART_AX_FACE)
-
-            bars = ax.bar(range(num_bars), selected_mods, color=CHART_BAR_COLOR)
-
-            for bar in bars:
-                h = bar.get_height()
-                ax.annotate(f'{int(h)}',
-                            xy=(bar.get_x() + bar.get_width() / 2, h),
-                            xytext=(0, 3), textcoords="offset points",
-                            ha='center', va='bottom', fontsize=9, color='white')
-
-            ax.set_title("Liczba modów do gier", color='magenta', fontsize=14, pad=20)
-            ax.set_ylabel("Ilość modów", color='white')
-            ax.set_xticks(range(num_bars))
-            ax.set_xticklabels(selected_titles, rotation=45, ha='right', fontsize=9, color='white')
-            ax.tick_params(axis='x', colors='white')
-            ax.tick_params(axis='y', colors='white')
-            for spine in ax.spines.values():
-                spine.set_color(BORDER_COLOR)
-
-
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-            pan_start = {"x": None}
-
-            def on_mouse_scroll(event):
-                shift = 1
-                left, right = ax.get_xlim()
-                width = right - left
-                new_left = left + shift if event.step < 0 else left - shift
-                new_left = max(-0.5, min(new_left, num_bars + 0.5 - width))
-                ax.set_xlim(new_left, new_left + width)
-                fig.canvas.draw_idle()
-
-            def on_press(event):
-                if event.button == 1 and event.inaxes == ax:
-                    pan_start["x"] = event.xdata
-
-            def on_release(event):
-                pan_start["x"] = None
-
-            def on_motion(event):
-                if pan_start["x"] is not None and event.inaxes == ax and event.xdata:
-                    dx = pan_start["x"] - event.xdata
-                    ax.set_xlim(ax.get_xlim()[0] + dx, ax.get_xlim()[1] + dx)
-                    pan_start["x"] = event.xdata
-                    fig.canvas.draw_idle()
-
-            fig.canvas.mpl_connect("scroll_event", on_mouse_scroll)
-            fig.canvas.mpl_connect("button_press_event", on_press)
-            fig.canvas.mpl_connect("button_release_event", on_release)
-            fig.canvas.mpl_connect("motion_notify_event", on_motion)
+            bars.set_data(selected_titles, selected_mods)
+            host.draw()
 
             df_bar = pd.DataFrame({
                 "Game": selected_titles,
@@ -1449,32 +1443,40 @@ def generate_mods_chart(parent_frame, log_target=None):
             if log_target is not None:
                 append_log(log_target, f"[Chart] Snapshot (mods): {len(selected_titles)} słupków.")
 
-        def on_select_change(_event):
-            selected = [listbox.get(i) for i in listbox.curselection()]
-            draw_chart(selected if selected else all_titles)
-
-        listbox.bind('<<ListboxSelect>>', on_select_change)
-        draw_chart(all_titles)
+        select = bind_listbox_select(listbox, lambda: selected_items(listbox, all_titles), draw_chart)
+        select.flush()
 
     except Exception as e:
         print(f"Błąd generowania wykresu modów: {e}")
         if log_target is not None:
             append_log(log_target, f"[ModsChart] Błąd: {e}")
 
+def _load_mods_by_genre():
+    with with_db_connection() as (conn, cursor):
+        cursor.execute("""
+            SELECT ge.name AS genre_name, SUM(g.mods) AS total_mods
+            FROM game g
+            JOIN game_genre gg ON gg.id_game = g.id_game
+            JOIN genre ge ON ge.id_genre = gg.id_genre
+            WHERE g.mods IS NOT NULL
+            GROUP BY ge.name
+            ORDER BY total_mods DESC
+        """)
+        return cursor.fetchall()
+
+
 def generate_mods_by_genre_chart(parent_frame, log_target=None):
-    try:
-        with with_db_connection() as (conn, cursor):
-            cursor.execute("""
-                SELECT ge.name AS genre_name, SUM(g.mods) AS total_mods
-                FROM game g
-                JOIN game_genre gg ON gg.id_game = g.id_game
-                JOIN genre ge ON ge.id_genre = gg.id_genre
-                WHERE g.mods IS NOT NULL
-                GROUP BY ge.name
-                ORDER BY total_mods DESC
-            """)
-            data = cursor.fetchall()
+    def fail(e):
+        print(f"Błąd generowania wykresu modów wg gatunku: {e}")
+        if log_target is not None:
+            append_log(log_target, f"[ModsByGenre] Błąd: {e}")
+
+    load_panel(parent_frame, _load_mods_by_genre,
+               lambda data: _build_mods_by_genre_chart(parent_frame, log_target, data), on_error=fail)
 
+
+def _build_mods_by_genre_chart(parent_frame, log_target, data):
+    try:
         if not data:
             return
 
@@ -1502,75 +1504,51 @@ def generate_mods_by_genre_chart(parent_frame, log_target=None):
         chart_frame = tk.Frame(parent_frame, bg=CHART_FACE)
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        def draw_chart(selected_genres):
-            for w in chart_frame.winfo_children():
-                w.destroy()
-            if not selected_genres:
-                return
+        host = ChartHost(chart_frame, figsize=(10, 6), layout="constrained")
+        ax = host.ax
+        bars = BarSeries(ax, CHART_BAR_COLOR)
+        ax.set_title("Liczba modów wg gatunku", color='magenta', fontsize=14, pad=20, loc='left')
+        ax.set_ylabel("Ilość modów", color='white')
+        ax.tick_params(axis='x', colors='white')
+        ax.tick_params(axis='y', colors='white')
+
+        pan_start = {"x": None}
+
+        def on_mouse_scroll(event):
+            shift = 1
+            left, right = ax.get_xlim()
+            width = right - left
+            new_left = left + shift if event.step < 0 else left - shift
+            new_left = max(-0.5, min(new_left, len(bars) + 0.5 - width))
+            ax.set_xlim(new_left, new_left + width)
+            host.draw()
 
-            selected_mods = [mods_dict[g] for g in selected_genres]
-            num_bars = len(selected_genres)
+        def on_press(event):
+            if event.button == 1 and event.inaxes == ax:
+                pan_start["x"] = event.xdata
 
-            fig, ax = plt.subplots(
-            figsize=(max(10, num_bars * 0.55), 6),
-            constrained_layout=True
-            )
-            fig.patch.set_facecolor(CHART_FACE)
-            ax.set_facecolor(CHART_AX_FACE)
-
-            bars = ax.bar(range(num_bars), selected_mods, color=CHART_BAR_COLOR)
-
-            for i, bar in enumerate(bars):
-                h = bar.get_height()
-                ax.annotate(f'{int(h)}',
-                            xy=(bar.get_x() + bar.get_width() / 2, h),
-                            xytext=(0, 3), textcoords="offset points",
-                            ha='center', va='bottom',
-                            fontsize=9, color='white')
-
-            ax.set_title("Liczba modów wg gatunku", color='magenta', fontsize=14, pad=20, loc='left')
-            ax.set_ylabel("Ilość modów", color='white')
-            ax.set_xticks(range(num_bars))
-            ax.set_xticklabels(selected_genres, rotation=45, ha='right', fontsize=9, color='white')
-            ax.tick_params(axis='x', colors='white')
-            ax.tick_params(axis='y', colors='white')
-            for spine in ax.spines.values():
-                spine.set_color(BORDER_COLOR)
-
-
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-            pan_start = {"x": None}
-
-            def on_mouse_scroll(event):
-                shift = 1
-                left, right = ax.get_xlim()
-                width = right - left
-                new_left = left + shift if event.step < 0 else left - shift
-                new_left = max(-0.5, min(new_left, num_bars + 0.5 - width))
-                ax.set_xlim(new_left, new_left + width)
-                fig.canvas.draw_idle()
+        def on_release(event):
+            pan_start["x"] = None
 
-            def on_press(event):
-                if event.button == 1 and event.inaxes == ax:
-                    pan_start["x"] = event.xdata
+        def on_motion(event):
+            if pan_start["x"] is not None and event.inaxes == ax and event.xdata:
+                dx = pan_start["x"] - event.xdata
+                ax.set_xlim(ax.get_xlim()[0] + dx, ax.get_xlim()[1] + dx)
+                pan_start["x"] = event.xdata
+                host.draw()
 
-            def on_release(event):
-                pan_start["x"] = None
+        host.connect("scroll_event", on_mouse_scroll)
+        host.connect("button_press_event", on_press)
+        host.connect("button_release_event", on_release)
+        host.connect("motion_notify_event", on_motion)
 
-            def on_motion(event):
-                if pan_start["x"] is not None and event.inaxes == ax and event.xdata:
-                    dx = pan_start["x"] - event.xdata
-                    ax.set_xlim(ax.get_xlim()[0] + dx, ax.get_xlim()[1] + dx)
-                    pan_start["x"] = event.xdata
-                    fig.canvas.draw_idle()
+        def draw_chart(selected_genres, _token=None):
+            if not selected_genres:
+                return
 
-            fig.canvas.mpl_connect("scroll_event", on_mouse_scroll)
-            fig.canvas.mpl_connect("button_press_event", on_press)
-            fig.canvas.mpl_connect("button_release_event", on_release)
-            fig.canvas.mpl_connect("motion_notify_event", on_motion)
+            selected_mods = [mods_dict[g] for g in selected_genres]
+            bars.set_data(selected_genres, selected_mods)
+            host.draw()
 
             df_bar = pd.DataFrame({
                 "Genre": selected_genres,
@@ -1588,28 +1566,45 @@ def generate_mods_by_genre_chart(parent_frame, log_target=None):
             if log_target is not None:
                 append_log(log_target, f"[Chart] Snapshot (mods by genre): {len(selected_genres)} słupków.")
 
-        def on_select_change(_event):
-            selected = [listbox.get(i) for i in listbox.curselection()]
-            draw_chart(selected if selected else all_genres)
-
-        listbox.bind('<<ListboxSelect>>', on_select_change)
-        draw_chart(all_genres)
+        select = bind_listbox_select(listbox, lambda: selected_items(listbox, all_genres), draw_chart)
+        select.flush()
 
     except Exception as e:
         print(f"Błąd generowania wykresu modów wg gatunku: {e}")
         if log_target is not None:
             append_log(log_target, f"[ModsByGenre] Błąd: {e}")
 
+def _load_game_ids():
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT g.name AS game_name, g.id_game
+            FROM game g
+            ORDER BY g.name ASC
+        """)
+        return cursor.fetchall()
+
+
+def _load_playtime_vs_achievements(id_game):
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT play_time/60 AS hours_played, achievements, achievement_progress
+            FROM library
+            WHERE id_game = %s AND play_time > 0 AND achievements > 0
+        """, (id_game,))
+        return cursor.fetchall()
+
+
 def generate_playtime_vs_achievements_chart(parent_frame, log_box):
-    try:
-        with with_db_connection(dictionary=True) as (conn, cursor):
-            cursor.execute("""
-                SELECT g.name AS game_name, g.id_game
-                FROM game g
-                ORDER BY g.name ASC
-            """)
-            games = cursor.fetchall()
+    def fail(e):
+        print(f"Błąd generowania wykresu zależności czasu i osiągnięć: {e}")
+        append_log(log_box, f"[Playtime vs Ach] Błąd: {e}")
+
+    load_panel(parent_frame, _load_game_ids,
+               lambda games: _build_playtime_vs_achievements_chart(parent_frame, log_box, games), on_error=fail)
 
+
+def _build_playtime_vs_achievements_chart(parent_frame, log_box, games):
+    try:
         if not games:
             return
 
@@ -1637,75 +1632,60 @@ def generate_playtime_vs_achievements_chart(parent_frame, log_box):
         chart_frame = tk.Frame(parent_frame, bg=CHART_FACE)
         chart_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        def draw_chart(game_name):
-            for w in chart_frame.winfo_children():
-                w.destroy()
+        host = ChartHost(chart_frame, figsize=(10, 6))
+        ax = host.ax
+        scatter = ax.scatter([], [], color="#00FFFF", alpha=0.7)
+        ax.set_xlabel("Czas gry (godziny)", color='white')
+        ax.set_ylabel("Procent osiągnięć", color='white')
+        ax.tick_params(axis='x', colors='white')
+        ax.tick_params(axis='y', colors='white')
+
+        annot = ax.annotate(
+            "", xy=(0, 0), xytext=(15, 15), textcoords="offset points",
+            fontsize=9, color='#00FFFF',
+            bbox=dict(boxstyle="round", fc="black", ec="#00FFFF", lw=1),
+            arrowprops=dict(arrowstyle="->", color="#00FFFF")
+        )
+        annot.set_visible(False)
+        current = {"x": [], "y": [], "labels": []}
+
+        def update_annot(idx, _event):
+            annot.xy = (current["x"][idx], current["y"][idx])
+            annot.set_text(current["labels"][idx])
 
-            id_game = game_dict[game_name]
+        hover = HoverEngine(ax, annot, ScatterHoverIndex(ax, [], []), update_annot)
 
-            with with_db_connection(dictionary=True) as (conn, cursor):
-                cursor.execute("""
-                    SELECT play_time/60 AS hours_played, achievements, achievement_progress
-                    FROM library
-                    WHERE id_game = %s AND play_time > 0 AND achievements > 0
-                """, (id_game,))
-                data = cursor.fetchall()
+        loading = LoadingIndicator(chart_frame)
 
+        def draw_chart(game_name, token=None):
+            id_game = game_dict[game_name]
+            run_in_background(chart_frame, lambda: _load_playtime_vs_achievements(id_game),
+                              lambda data: render_chart(game_name, data), token=token,
+                              on_error=lambda e: append_log(log_box, f"[Playtime vs Ach] Błąd: {e}"),
+                              indicator=loading)
+
+        def render_chart(game_name, data):
+            hover.refresh()
+            ax.set_title(f"{game_name} – Wpływ czasu gry na osiągnięcia (%)", color='white', fontsize=14)
             if not data:
                 append_log(log_box, f"[Chart] Brak danych dla gry: {game_name}.")
+                update_scatter(scatter, [], [])
+                host.draw()
                 return
 
-            x = np.array([row['hours_played'] for row in data])              # godziny gry
-            y = np.array([row['achievement_progress'] for row in data])      # % osiągnięć
-            ach = np.array([row['achievements'] for row in data])            # liczba osiągnięć
+            x = np.array([row['hours_played'] for row in data], dtype=float)              # godziny gry
+            y = np.array([row['achievement_progress'] for row in data], dtype=float)      # % osiągnięć
+            ach = np.array([row['achievements'] for row in data])                         # liczba osiągnięć
 
             labels = [
                 f"{row['hours_played']:.1f}h\n{row['achievements']} osią.\n{row['achievement_progress']}%"
                 for row in data
             ]
 
-            fig, ax = plt.subplots(figsize=(10, 6))
-            fig.patch.set_facecolor(CHART_FACE)
-            ax.set_facecolor(CHART_AX_FACE)
-            scatter = ax.scatter(x, y, color="#00FFFF", alpha=0.7)
-
-            ax.set_title(f"{game_name} – Wpływ czasu gry na osiągnięcia (%)", color='white', fontsize=14)
-            ax.set_xlabel("Czas gry (godziny)", color='white')
-            ax.set_ylabel("Procent osiągnięć", color='white')
-            ax.tick_params(axis='x', colors='white')
-            ax.tick_params(axis='y', colors='white')
-            for spine in ax.spines.values():
-                spine.set_color(BORDER_COLOR)
-
-            annot = ax.annotate(
-                "", xy=(0, 0), xytext=(15, 15), textcoords="offset points",
-                fontsize=9, color='#00FFFF',
-                bbox=dict(boxstyle="round", fc="black", ec="#00FFFF", lw=1),
-                arrowprops=dict(arrowstyle="->", color="#00FFFF")
-            )
-            annot.set_visible(False)
-
-            def update_annot(ind):
-                idx = ind["ind"][0]
-                annot.xy = (x[idx], y[idx])
-                annot.set_text(labels[idx])
-                annot.set_visible(True)
-
-            def on_hover(event):
-                if event.inaxes == ax:
-                    cont, ind = scatter.contains(event)
-                    if cont:
-                        update_annot(ind)
-                        fig.canvas.draw_idle()
-                    elif annot.get_visible():
-                        annot.set_visible(False)
-                        fig.canvas.draw_idle()
-
-            fig.canvas.mpl_connect("motion_notify_event", on_hover)
-
-            canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            current.update(x=x, y=y, labels=labels)
+            update_scatter(scatter, x, y)
+            hover.set_index(ScatterHoverIndex(ax, x, y, collection=scatter))
+            host.draw()
 
             df_snap = pd.DataFrame({
                 "HoursPlayed": x.astype(float),
@@ -1723,16 +1703,11 @@ def generate_playtime_vs_achievements_chart(parent_frame, log_box):
             ))
             append_log(log_box, f"[Chart] Snapshot ({game_name}): {len(df_snap)} punktów.")
 
-        def on_select(_event):
-            sel = listbox.curselection()
-            if sel:
-                draw_chart(listbox.get(sel[0]))
-
-        listbox.bind('<<ListboxSelect>>', on_select)
+        select = bind_listbox_select(listbox, lambda: selected_item(listbox), draw_chart)
 
         if game_titles:
             listbox.selection_set(0)
-            draw_chart(game_titles[0])
+            select.flush()
 
     except Exception as e:
         print(f"Błąd generowania wykresu zależności czasu i osiągnięć: {e}")
@@ -1867,8 +1842,15 @@ def main_ui():
     OknoOpcje,
     text="Odśwież dane",
     font=FONT,
-    command=lambda: refresh_all_games(status_label, log_box)
+    command=lambda: refresh_all_games_async(status_label, log_box)
 ).place(relx=1.0, y=10, x=-180, anchor="ne")
+
+    tk.Button(
+    OknoOpcje,
+    text="Odśwież ceny",
+    font=FONT,
+    command=lambda: refresh_prices_async(status_label, log_box)
+).place(relx=1.0, y=48, x=-180, anchor="ne")
     
     tk.Button(
     OknoOpcje_1,
@@ -1947,8 +1929,21 @@ def main_ui():
         script_path = os.path.abspath(__file__)
         subprocess.Popen([python, script_path])
 
+    # zapytania panelu informacji w tle; nowsze anuluje starsze (szybkie przełączanie gracza/gry)
+    info_loading = LoadingIndicator(OknoWykres)
+    info_load = {"token": None}
+
+    def load_info(load, show):
+        if info_load["token"] is not None:
+            info_load["token"].cancel()
+        info_load["token"] = token = CancelToken()
+        run_in_background(info_text, load, show, token=token, indicator=info_loading)
+
     def pokaz_info():
-        dane = get_game_info(combo.get())
+        title = combo.get()
+        load_info(lambda: get_game_info(title), wypisz_info)
+
+    def wypisz_info(dane):
         info_text.delete("1.0", "end")
         info_text.insert("end", f"""
 Nazwa gry: {dane['NazwaGry']}
@@ -1970,18 +1965,20 @@ Platformy: {dane['Platformy']}
 
     def pokaz_lista():
         combo.place(x=20, y=50)
-        combo['values'] = get_game_titles()
         combo.set("Wybierz grę...")
+        run_in_background(combo, get_game_titles, lambda titles: combo.configure(values=titles))
         combo.bind("<<ComboboxSelected>>", lambda e: (pokaz_info(), combo.place_forget()))
 
     def pokaz_uzytkownikow():
         combo_users.place(x=20, y=50)
-        combo_users['values'] = get_user_logins()
         combo_users.set("Wybierz gracza...")
+        run_in_background(combo_users, get_user_logins, lambda logins: combo_users.configure(values=logins))
         combo_users.bind("<<ComboboxSelected>>", lambda e: (pokaz_uzytkownika(combo_users.get().strip()), combo_users.place_forget()))
 
     def pokaz_uzytkownika(login):
-        dane = get_user_details(login)
+        load_info(lambda: get_user_details(login), wypisz_uzytkownika)
+
+    def wypisz_uzytkownika(dane):
         info_text.delete("1.0", "end")
         if "Błąd" in dane:
             info_text.insert("end", f"Błąd: {dane['Błąd']}")
@@ -2010,7 +2007,12 @@ Gry:
     przycisk_info = tk.Button(OknoOpcje, text="Informacje o", font=FONT, command=show_menu_buttons)
     przycisk_info.place(x=20, y=10)
 
+    start_refresh_scheduler(log_box)
     root.mainloop()
+    stop_refresh_scheduler()
+    shutdown_task_executor()
+    log_figure_stats()
+    log_task_stats()
 
 if __name__ == "__main__":
         main_ui()
\ No newline at end of file
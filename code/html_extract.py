@@ -0,0 +1,262 @@
+# html_extract.py – wyciąganie danych ze stron (SteamCharts, ceny): szybka ścieżka na
+# prekompilowanych wyrażeniach + BeautifulSoup jako rezerwa, gdy szybka nie rozpozna układu
+#
+#   python html_extract.py --bench             # porównanie obu ścieżek na plikach z code/debug
+#   python html_extract.py --bench --repeat 200
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    from bs4 import BeautifulSoup
+    HAS_BS4 = True
+except Exception:
+    HAS_BS4 = False
+
+DEBUG_DIR = Path(__file__).resolve().parent / "debug"
+
+
+class Extractor:
+    """
+    fast(html) -> wynik albo None ("nie wiem" – wtedy wołamy slow),
+    slow(html) -> wynik (pełny parser, np. bs4).
+    """
+
+    def __init__(self, name: str, fast: Callable[[str], object], slow: Optional[Callable[[str], object]] = None):
+        self.name = name
+        self.fast = fast
+        self.slow = slow
+
+    def __call__(self, html: str, use_fast: bool = True):
+        if use_fast:
+            result = self.fast(html)
+            if result is not None:
+                return result
+        if self.slow is not None and HAS_BS4:
+            return self.slow(html)
+        return None
+
+
+_EXTRACTORS: dict[str, Extractor] = {}
+
+
+def register_extractor(name: str, fast: Callable[[str], object], slow: Optional[Callable[[str], object]] = None) -> Extractor:
+    ex = Extractor(name, fast, slow)
+    _EXTRACTORS[name] = ex
+    return ex
+
+
+def get_extractor(name: str) -> Extractor:
+    return _EXTRACTORS[name]
+
+
+def extract(name: str, html: str, use_fast: bool = True):
+    return _EXTRACTORS[name](html, use_fast=use_fast)
+
+
+# === Strony zablokowane (SteamDB / Cloudflare) ===
+_BLOCKED_RE = re.compile(r"You have been banned on SteamDB|/cdn-cgi/challenge-platform/|class=\"[^\"]*cf-error", re.I)
+
+
+def is_blocked_page(html: str) -> bool:
+    """Strona z banem / wyzwaniem zamiast treści – nie ma czego parsować."""
+    return bool(_BLOCKED_RE.search(html[:20000] if html else ""))
+
+
+# === Wspólne ===
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+
+def _text(fragment: str) -> str:
+    return _WS_RE.sub(" ", _TAG_RE.sub(" ", fragment)).strip()
+
+
+def parse_int(txt: str) -> Optional[int]:
+    txt = re.sub(r"[^\d]", "", txt or "")
+    return int(txt) if txt else None
+
+
+def parse_price(txt: str) -> Optional[float]:
+    """'249,00zł' / '$59.99' / '1 249,00 zł' / 'Free' -> float (None gdy brak liczby)."""
+    txt = (txt or "").strip()
+    if not txt:
+        return None
+    if re.search(r"free|darmow", txt, re.I) and not re.search(r"\d", txt):
+        return 0.0
+    num = re.sub(r"[^\d,.]", "", txt)
+    if not num:
+        return None
+    last_sep = max(num.rfind(","), num.rfind("."))
+    if last_sep >= 0 and len(num) - last_sep - 1 in (1, 2):
+        whole = re.sub(r"[^\d]", "", num[:last_sep]) or "0"
+        return float(f"{whole}.{num[last_sep + 1:]}")
+    return float(re.sub(r"[^\d]", "", num))
+
+
+# === SteamCharts: (teraz, szczyt 24h, rekord) ===
+def _steamcharts_from_boxes(boxes: list[tuple[str, str]]):
+    """boxes = [(tekst span.num, cały tekst boxa)] – ta sama logika dla obu parserów."""
+    if not boxes:
+        return None, None, None
+
+    current = peak24 = alltime = None
+    for num_txt, label in boxes:
+        label = label.lower()
+        value = parse_int(num_txt)
+        if "right now" in label or "graczy teraz" in label:
+            current = value
+        elif "24-hour peak" in label or "24 godz." in label:
+            peak24 = value
+        elif "all-time peak" in label or "rekord wszechczasów" in label:
+            alltime = value
+
+    if any(v is None for v in (current, peak24, alltime)) and len(boxes) >= 3:
+        current = current or parse_int(boxes[0][0])
+        peak24  = peak24  or parse_int(boxes[1][0])
+        alltime = alltime or parse_int(boxes[2][0])
+
+    return current, peak24, alltime
+
+
+_APP_STAT_RE = re.compile(r'<div class="app-stat">(.*?)</div>', re.S)
+_NUM_RE = re.compile(r'<span class="num">([^<]*)</span>')
+
+
+def _steamcharts_fast(html: str):
+    if is_blocked_page(html):
+        return (None, None, None)
+    blocks = _APP_STAT_RE.findall(html)
+    if len(blocks) != html.count("app-stat"):
+        # któryś box ma inny zapis klas – wynik byłby niepełny, niech zdecyduje pełny parser
+        return None
+    if not blocks:
+        return None if "app-stat" in html else (None, None, None)
+    boxes = []
+    for block in blocks:
+        m = _NUM_RE.search(block)
+        if m is None or "<div" in block:
+            return None   # zagnieżdżony układ – regex mógł uciąć blok
+        boxes.append((m.group(1), _text(block)))
+    result = _steamcharts_from_boxes(boxes)
+    return None if None in result else result
+
+
+def _steamcharts_bs4(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    boxes = []
+    for box in soup.find_all("div", class_="app-stat"):
+        num = box.find("span", class_="num")
+        boxes.append((num.get_text(strip=True) if num else "", box.get_text(" ", strip=True)))
+    return _steamcharts_from_boxes(boxes)
+
+
+register_extractor("steamcharts_stats", _steamcharts_fast, _steamcharts_bs4)
+
+
+# === Cena: SteamDB ("Current Price") i sklep Steam (pierwszy blok game_area_purchase_game) ===
+# Na stronie sklepu niżej są też DLC i pakiety z własnymi cenami – liczy się tylko pierwszy
+# blok zakupu (gra bazowa), a w nim pierwsza cena w kolejności dokumentu.
+_STEAMDB_PRICE_RE = re.compile(r"<b>\s*Current Price\s*</b>\s*<span[^>]*>([^<]+)</span>", re.I)
+_PURCHASE_BLOCK_RE = re.compile(r'<div[^>]*class="game_area_purchase_game(?:\s[^"]*)?"')
+_DIV_TAG_RE = re.compile(r"<(/?)div\b")
+_BLOCK_PRICE_RE = re.compile(r'class="(?:discount_final_price|game_purchase_price price)[^"]*"[^>]*>([^<]+)<')
+
+
+def _purchase_block(html: str) -> Optional[str]:
+    """Treść pierwszego div.game_area_purchase_game (liczenie zagnieżdżeń <div>)."""
+    m = _PURCHASE_BLOCK_RE.search(html)
+    if m is None:
+        return None
+    depth = 0
+    for tag in _DIV_TAG_RE.finditer(html, m.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[m.start():tag.start()]
+    return None   # niedomknięty blok – niech zdecyduje pełny parser
+
+
+def _price_fast(html: str):
+    if is_blocked_page(html):
+        return {"price": None, "blocked": True}
+    m = _STEAMDB_PRICE_RE.search(html)
+    if m is None:
+        block = _purchase_block(html)
+        m = _BLOCK_PRICE_RE.search(block) if block is not None else None
+    if m:
+        price = parse_price(m.group(1))
+        if price is not None:
+            return {"price": price, "blocked": False}
+    return None
+
+
+def _price_bs4(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    for line in soup.select("div.single-price-line"):
+        b = line.find("b")
+        span = line.find("span")
+        if b and span and b.get_text(strip=True).lower() == "current price":
+            return {"price": parse_price(span.get_text(strip=True)), "blocked": False}
+    block = soup.select_one("div.game_area_purchase_game")
+    el = block.select_one("div.discount_final_price, div.game_purchase_price") if block is not None else None
+    if el is not None:
+        return {"price": parse_price(el.get_text(strip=True)), "blocked": False}
+    return {"price": None, "blocked": is_blocked_page(html)}
+
+
+register_extractor("store_price", _price_fast, _price_bs4)
+
+
+# === Benchmark ===
+def benchmark(files: list[Path], repeat: int = 50) -> list[dict]:
+    rows = []
+    for path in files:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        for name, ex in _EXTRACTORS.items():
+            timings = {}
+            results = {}
+            for mode, use_fast in (("fast", True), ("bs4", False)):
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    results[mode] = ex(html, use_fast=use_fast)
+                timings[mode] = (time.perf_counter() - t0) / repeat * 1000
+            rows.append({
+                "file": path.name, "kind": name, "bytes": len(html),
+                "fast_ms": timings["fast"], "bs4_ms": timings["bs4"],
+                "same": results["fast"] == results["bs4"], "result": results["fast"],
+            })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ekstrakcja danych z HTML (szybka ścieżka + bs4).")
+    parser.add_argument("--bench", action="store_true", help="porównaj szybkość na plikach z katalogu debug")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--dir", default=str(DEBUG_DIR))
+    parser.add_argument("files", nargs="*", help="pliki HTML do sparsowania")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        if not HAS_BS4:
+            parser.error("benchmark wymaga bs4")
+        files = [Path(f) for f in args.files] or sorted(Path(args.dir).glob("*.html"))
+        ok = True
+        for r in benchmark(files, args.repeat):
+            ok &= r["same"]
+            speedup = r["bs4_ms"] / r["fast_ms"] if r["fast_ms"] else float("inf")
+            print(f"{r['file']:<38} {r['kind']:<18} {r['bytes']:>8} B  fast {r['fast_ms']:8.3f} ms  "
+                  f"bs4 {r['bs4_ms']:8.3f} ms  x{speedup:7.1f}  {'OK' if r['same'] else 'RÓŻNICA'}  {r['result']}")
+        return 0 if ok else 1
+
+    for f in args.files:
+        html = Path(f).read_text(encoding="utf-8", errors="replace")
+        print(f, {name: extract(name, html) for name in _EXTRACTORS})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
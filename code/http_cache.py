@@ -0,0 +1,135 @@
+# http_cache.py – dyskowy cache odpowiedzi HTTP (SteamCharts): skompresowane treści,
+# zapytania warunkowe (ETag / Last-Modified), TTL świeżości i stare dane przy braku sieci
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Optional
+
+import requests
+
+from mapingURL import BASE_DIR
+
+HTTP_CACHE_DIR = BASE_DIR / ".http_cache"
+HTTP_CACHE_TTL = 15 * 60   # sekundy, przez które wpis uznajemy za świeży (bez sieci)
+
+
+def is_network_error(e: BaseException) -> bool:
+    """Brak sieci albo serwer 5xx (po ponowieniach fetch) – tylko wtedy wolno oddać stare dane."""
+    if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+        return True
+    resp = getattr(e, "response", None) if isinstance(e, requests.HTTPError) else None
+    return resp is not None and resp.status_code >= 500
+
+
+class CachedResponse:
+    def __init__(self, url: str, content: bytes, headers: dict, from_cache: bool = False, stale: bool = False):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+        self.stale = stale   # sieć niedostępna – dane starsze niż TTL
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpCache:
+    """
+    Wpis = jeden plik: linia JSON z metadanymi (url, etag, last_modified, fetched_at)
+    + treść skompresowana zlib. fetch(url, headers=..., timeout=...) musi zwracać obiekt
+    w stylu requests.Response (status_code, content, headers) – np. steamcharts.http_get.
+    Stary wpis (stale=True) zastępuje odpowiedź tylko przy błędzie sieci (is_network_error);
+    przerwanie, 4xx i inne błędy fetch idą dalej do wołającego.
+    """
+
+    def __init__(self, fetch: Callable, directory: Path = HTTP_CACHE_DIR, ttl: float = HTTP_CACHE_TTL,
+                 stale_on: Callable[[BaseException], bool] = is_network_error):
+        self.fetch = fetch
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.stale_on = stale_on
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.bin"
+
+    def _load(self, url: str) -> Optional[tuple[dict, bytes]]:
+        path = self._path(url)
+        try:
+            raw = path.read_bytes()
+            head, body = raw.split(b"\n", 1)
+            meta = json.loads(head)
+            if meta.get("url") != url:
+                return None
+            return meta, zlib.decompress(body)
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def _store(self, url: str, meta: dict, content: bytes) -> None:
+        path = self._path(url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(json.dumps(meta).encode("utf-8") + b"\n" + zlib.compress(content, 6))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[HTTP CACHE] Nie zapisano {url}: {e}")
+
+    def get(self, url: str, ttl: Optional[float] = None, timeout: float = 10.0,
+            allow_stale: bool = True, **fetch_kwargs) -> CachedResponse:
+        """allow_stale=False – dla zapisu do bazy: błąd sieci idzie dalej zamiast starych danych."""
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._load(url)
+        now = time.time()
+
+        if entry is not None and now - entry[0].get("fetched_at", 0) < ttl:
+            meta, content = entry
+            return CachedResponse(url, content, meta.get("headers", {}), from_cache=True)
+
+        headers = {}
+        if entry is not None:
+            if entry[0].get("etag"):
+                headers["If-None-Match"] = entry[0]["etag"]
+            if entry[0].get("last_modified"):
+                headers["If-Modified-Since"] = entry[0]["last_modified"]
+
+        try:
+            resp = self.fetch(url, headers=headers, timeout=timeout, **fetch_kwargs)
+        except Exception as e:
+            if entry is None or not allow_stale or not self.stale_on(e):
+                raise
+            meta, content = entry
+            return CachedResponse(url, content, meta.get("headers", {}), from_cache=True, stale=True)
+
+        if resp.status_code == 304 and entry is not None:
+            meta, content = entry
+            meta = dict(meta, fetched_at=now)   # treść bez zmian – przesuwamy tylko czas pobrania
+            self._store(url, meta, content)
+            return CachedResponse(url, content, meta.get("headers", {}), from_cache=True)
+
+        keep = {k: v for k, v in resp.headers.items() if k.lower() in ("content-type", "date")}
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "headers": keep,
+        }
+        self._store(url, meta, resp.content)
+        return CachedResponse(url, resp.content, keep)
+
+    def clear(self) -> None:
+        for p in self.directory.glob("*/*.bin"):
+            try:
+                p.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,176 @@
+# image_pipeline.py – dekodowanie/skalowanie obrazów poza wątkiem Tk
+
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+IMAGE_WORKERS = 4     # ile obrazów dekodujemy równolegle
+POLL_MS = 15          # jak często pętla Tk odbiera gotowe wyniki
+MAX_PER_TICK = 8      # ile wyników obsłużyć w jednym ticku (płynność UI)
+
+
+class AsyncImageLoader:
+    """
+    Pula wątków wykonująca ciężką część pracy (otwarcie pliku / pobranie, convert, thumbnail).
+    Wyniki wracają do wątku Tk przez kolejkę odpytywaną z `after`, bo widgetów i PhotoImage
+    nie wolno dotykać z innych wątków. Kilka żądań o ten sam klucz jest łączonych w jedno.
+
+    submit() i wszystkie callbacki działają wyłącznie w wątku Tk.
+    """
+
+    def __init__(self, max_workers: int = IMAGE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="img")
+        self._results: "queue.Queue[tuple[str, object, Optional[BaseException]]]" = queue.Queue()
+        self._inflight: dict[str, list[Callable]] = {}
+        self._finalizers: dict[str, Optional[Callable]] = {}
+        self._tk = None
+        self._poll_id = None
+
+    def submit(self, widget, key: str, job: Callable[[], object],
+               callback: Callable[[object, Optional[BaseException]], None],
+               finalize: Optional[Callable[[object], object]] = None) -> None:
+        """
+        job()      – uruchamiane w puli (bez Tk),
+        finalize() – raz na klucz, w wątku Tk (np. PIL.Image -> PhotoImage),
+        callback(wynik, błąd) – dla każdego zgłoszonego żądania.
+        """
+        waiting = self._inflight.get(key)
+        if waiting is not None:
+            waiting.append(callback)      # ten sam obraz już się liczy – dopisz się
+            return
+
+        self._inflight[key] = [callback]
+        self._finalizers[key] = finalize
+        self._tk = widget.nametowidget(".")
+        self._executor.submit(self._run, key, job)
+        self._ensure_polling()
+
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def _run(self, key: str, job: Callable[[], object]) -> None:
+        try:
+            self._results.put((key, job(), None))
+        except BaseException as e:
+            self._results.put((key, None, e))
+
+    def _ensure_polling(self) -> None:
+        if self._poll_id is None and self._tk is not None:
+            try:
+                self._poll_id = self._tk.after(POLL_MS, self._drain)
+            except Exception:
+                self._poll_id = None
+
+    def _drain(self) -> None:
+        self._poll_id = None
+        for _ in range(MAX_PER_TICK):
+            try:
+                key, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self._inflight.pop(key, [])
+            finalize = self._finalizers.pop(key, None)
+            if error is None and finalize is not None:
+                try:
+                    result = finalize(result)
+                except Exception as e:
+                    result, error = None, e
+
+            for cb in callbacks:
+                try:
+                    cb(result, error)
+                except Exception:
+                    pass  # np. widget zniszczony w międzyczasie
+
+        if self._inflight:
+            self._ensure_polling()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# === Cache obrazów (LRU z limitem pamięci) ===
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024   # szacunkowo w*h*3 na wpis
+IMAGE_CACHE_MAX_ENTRIES = 2000
+IMAGE_FAIL_TTL = 300.0                     # po ilu sekundach ponawiamy nieudany obraz
+
+
+class ImageLRU:
+    """
+    Cache PhotoImage ograniczony liczbą wpisów i szacowaną pamięcią (w*h*3 bajtów).
+    Nieudane klucze trzymane osobno z TTL, żeby po pewnym czasie spróbować ponownie.
+    """
+
+    def __init__(self, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 max_entries: int = IMAGE_CACHE_MAX_ENTRIES,
+                 fail_ttl: float = IMAGE_FAIL_TTL):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.fail_ttl = fail_ttl
+        self._items: "OrderedDict[str, tuple[object, int]]" = OrderedDict()
+        self._failed: dict[str, float] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def estimate_bytes(w: int, h: int) -> int:
+        return int(w) * int(h) * 3
+
+    def get(self, key: str):
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value, w: int, h: int) -> None:
+        self._failed.pop(key, None)
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = self.estimate_bytes(w, h)
+        self._items[key] = (value, size)
+        self.bytes += size
+        while self._items and (self.bytes > self.max_bytes or len(self._items) > self.max_entries):
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def mark_failed(self, key: str) -> None:
+        self._failed[key] = time.monotonic() + self.fail_ttl
+        if len(self._failed) > self.max_entries:
+            now = time.monotonic()
+            self._failed = {k: t for k, t in self._failed.items() if t > now}
+            while len(self._failed) > self.max_entries:
+                del self._failed[next(iter(self._failed))]
+
+    def is_failed(self, key: str) -> bool:
+        until = self._failed.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._failed[key]
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._failed.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._items),
+            "bytes": self.bytes,
+            "failed": len(self._failed),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -2,21 +2,12 @@ import tkinter as tk
 from tkinter import messagebox
 import os
 import sys
-import mysql.connector
+from database_connection import with_db_connection
 from start_ui_styles import (
     BTN_BG, BTN_FG, BUTTON_FONT, COLOR_RIGHT, TEXT_COLOR,
     stylized_entry, stylized_button, stylized_label
 )
 
-# === BAZA ===
-def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="root",
-        database="gamedb"
-    )
-
 # === ROOT ===
 root = tk.Tk()
 root.title("Start")
@@ -76,36 +67,35 @@ def toggle_form(form_type):
             return
 
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-
-            if form_type == "login":
-                cursor.execute("SELECT * FROM user WHERE login = %s AND password = %s", (data["login"], data["password"]))
-                user = cursor.fetchone()
-                if user:
-                    show_main_menu(data["login"])
+            # połączenie z puli (database_connection) – bez osobnego handshake'u przy każdym kliknięciu
+            with with_db_connection(dictionary=True) as (conn, cursor):
+                if form_type == "login":
+                    cursor.execute("SELECT * FROM user WHERE login = %s AND password = %s", (data["login"], data["password"]))
+                    user = cursor.fetchone()
                 else:
-                    messagebox.showerror("Błąd", "Nieprawidłowy login lub hasło.")
-            else:
-                cursor.execute("SELECT * FROM user WHERE login = %s", (data["login"],))
-                if cursor.fetchone():
-                    messagebox.showwarning("Uwaga", "Taki login już istnieje.")
-                    return
-
-                cursor.execute("""
-                    INSERT INTO user (email, login, password, phone, age)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (data["email"], data["login"], data["password"], data["phone"], int(data["age"])))
-                conn.commit()
-                messagebox.showinfo("Sukces", "Rejestracja zakończona!")
-                toggle_form("login")
+                    cursor.execute("SELECT * FROM user WHERE login = %s", (data["login"],))
+                    if cursor.fetchone():
+                        messagebox.showwarning("Uwaga", "Taki login już istnieje.")
+                        return
+
+                    cursor.execute("""
+                        INSERT INTO user (email, login, password, phone, age)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (data["email"], data["login"], data["password"], data["phone"], int(data["age"])))
+                    conn.commit()
 
         except Exception as e:
             messagebox.showerror("Błąd bazy danych", str(e))
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            return
+
+        if form_type == "login":
+            if user:
+                show_main_menu(data["login"])
+            else:
+                messagebox.showerror("Błąd", "Nieprawidłowy login lub hasło.")
+        else:
+            messagebox.showinfo("Sukces", "Rejestracja zakończona!")
+            toggle_form("login")
 
     stylized_button(form_frame, "Wyślij", submit).pack(pady=20)
 
@@ -1,5 +1,5 @@
 from pathlib import Path
-from database_connection import with_db_connection
+from database_connection import bulk_update, with_db_connection
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 ASSETS_DIR = BASE_DIR / "__inz_assets_f3a9c1e7b2"
@@ -7,16 +7,17 @@ DEFAULT_IMG = ASSETS_DIR / "default.png"
 
 
 
-print("BASE_DIR:", BASE_DIR)
-print("ASSETS_DIR:", ASSETS_DIR)
-print("ASSETS_DIR EXISTS:", ASSETS_DIR.exists())
+def print_assets_report():
+    print("BASE_DIR:", BASE_DIR)
+    print("ASSETS_DIR:", ASSETS_DIR)
+    print("ASSETS_DIR EXISTS:", ASSETS_DIR.exists())
 
-if ASSETS_DIR.exists():
-    print("FILES:")
-    for f in ASSETS_DIR.iterdir():
-        print(" -", f.name)
-else:
-    print("[ERROR] ASSETS_DIR NIE ISTNIEJE")
+    if ASSETS_DIR.exists():
+        print("FILES:")
+        for f in ASSETS_DIR.iterdir():
+            print(" -", f.name)
+    else:
+        print("[ERROR] ASSETS_DIR NIE ISTNIEJE")
 
 
 def resolve_image_path(id_game: int) -> str:
@@ -29,26 +30,26 @@ def resolve_image_path(id_game: int) -> str:
 
 
 
-def update_image_paths():
+def update_image_paths() -> int:
     with with_db_connection(dictionary=True) as (conn, cursor):
         cursor.execute("SELECT id_game FROM game")
         games = cursor.fetchall()
 
-        for g in games:
-            gid = int(g["id_game"])
-            img_path = resolve_image_path(gid)
+    rows = []
+    for g in games:
+        gid = int(g["id_game"])
+        img_path = resolve_image_path(gid)
+        rows.append((gid, img_path))
+        print(f"id_game={gid} -> {img_path}")
 
-            cursor.execute(
-                "UPDATE game SET image_url = %s WHERE id_game = %s",
-                (img_path, gid)
-            )
-
-            print(f"id_game={gid} -> {img_path}")
-
-        conn.commit()
+    # jedna transakcja, paczki zamiast UPDATE na każdą grę
+    changed = bulk_update("game", "id_game", ["image_url"], rows)
+    print(f"Zmieniono {changed} z {len(rows)} wierszy")
+    return changed
 
 
 
 if __name__ == "__main__":
+    print_assets_report()
     update_image_paths()
     print("Image paths updated")
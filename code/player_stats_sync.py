@@ -0,0 +1,136 @@
+# player_stats_sync.py – historia liczby graczy ze SteamCharts zapisywana w player_stats
+#
+#   python player_stats_sync.py            # wszystkie gry z steam_appid
+#   python player_stats_sync.py --appid 730
+
+import argparse
+import datetime as _dt
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from activity_series import daily_rollup, epoch_day, ingest_points, invalidate_activity_series
+from database_connection import bulk_insert, with_db_connection
+from steamcharts import REFRESH_WORKERS, RefreshCancelled, fetch_chart_data
+
+BACKFILL_MAX_ROWS = 1             # gry z tyloma wierszami traktujemy jak niezsynchronizowane
+_EPOCH = _dt.date(1970, 1, 1)
+_sync_lock = threading.Lock()     # dwie synchronizacje naraz wstawiłyby te same dni (brak UNIQUE)
+
+
+def daily_series(points, until: Optional[_dt.date] = None) -> list[tuple[_dt.date, int]]:
+    """
+    [[timestamp_ms, gracze], ...] -> [(dzień, średnia), ...] rosnąco.
+    Bieżący (niepełny) dzień jest pomijany, żeby nie zapisać zaniżonej średniej.
+    """
+    days, means = daily_rollup(*ingest_points(points))
+    n = int(days.searchsorted(epoch_day(until)))
+    return [(_EPOCH + _dt.timedelta(days=int(d)), int(round(m))) for d, m in zip(days[:n], means[:n])]
+
+
+def _sync_state() -> dict[int, tuple[Optional[_dt.date], int]]:
+    """id_game -> (ostatnia stat_date, liczba wierszy)."""
+    with with_db_connection() as (conn, cur):
+        cur.execute("""
+            SELECT id_game, MAX(stat_date), COUNT(*)
+            FROM player_stats
+            GROUP BY id_game
+        """)
+        return {int(gid): (last, int(cnt)) for gid, last, cnt in cur.fetchall()}
+
+
+def _existing_dates(id_game: int) -> set:
+    with with_db_connection() as (conn, cur):
+        cur.execute("SELECT stat_date FROM player_stats WHERE id_game = %s", (id_game,))
+        return {d for (d,) in cur.fetchall()}
+
+
+def _games(appid: Optional[int] = None) -> list[dict]:
+    with with_db_connection(dictionary=True) as (conn, cur):
+        if appid is None:
+            cur.execute("SELECT id_game, steam_appid, name FROM game WHERE steam_appid IS NOT NULL")
+        else:
+            cur.execute("SELECT id_game, steam_appid, name FROM game WHERE steam_appid = %s", (appid,))
+        return cur.fetchall()
+
+
+def sync_player_stats(appid: Optional[int] = None, workers: int = REFRESH_WORKERS,
+                      cancel: Optional[threading.Event] = None,
+                      log: Callable[[str], None] = print) -> dict:
+    """
+    Pobiera chart-data.json (przez cache HTTP) i dopisuje do player_stats tylko dni
+    nowsze niż ostatnia zapisana stat_date gry. Gry z pojedynczym wierszem (dane startowe)
+    są uzupełniane o całą brakującą historię. Wszystko jednym zapisem hurtowym.
+    """
+    with _sync_lock:
+        return _sync(appid, workers, cancel, log)
+
+
+def _sync(appid, workers, cancel, log) -> dict:
+    t0 = time.perf_counter()
+    games = _games(appid)
+    state = _sync_state()
+
+    def new_rows(game: dict) -> list[tuple]:
+        if cancel is not None and cancel.is_set():
+            raise RefreshCancelled()
+        gid = int(game["id_game"])
+        series = daily_series(fetch_chart_data(game["steam_appid"], allow_stale=False))
+        last, count = state.get(gid, (None, 0))
+        if count <= BACKFILL_MAX_ROWS or last is None:
+            have = _existing_dates(gid) if count else set()
+            return [(gid, d, p) for d, p in series if d not in have]
+        return [(gid, d, p) for d, p in series if d > last]
+
+    rows, failed = [], 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="player-stats") as pool:
+        futures = {pool.submit(new_rows, g): g for g in games}
+        for fut, game in futures.items():
+            try:
+                rows.extend(fut.result())
+            except RefreshCancelled:
+                pass
+            except Exception as e:
+                failed += 1
+                log(f"[PLAYER STATS] {game.get('name')}: {e}")
+
+    inserted = bulk_insert("player_stats", ["id_game", "stat_date", "players_online"], rows)
+    if inserted:
+        touched = {r[0] for r in rows}
+        for game in games:
+            if int(game["id_game"]) in touched:
+                invalidate_activity_series(game["steam_appid"])
+    summary = {"games": len(games), "failed": failed, "inserted": inserted,
+               "seconds": time.perf_counter() - t0}
+    log(f"[PLAYER STATS] gier {summary['games']}, nowych dni {inserted}, "
+        f"błędy {failed} – {summary['seconds']:.1f}s")
+    return summary
+
+
+def load_daily_stats(appid: int) -> list[tuple[_dt.date, int]]:
+    """Zapisana historia gry (po steam_appid) – [(stat_date, players_online), ...] rosnąco."""
+    with with_db_connection() as (conn, cur):
+        cur.execute("""
+            SELECT ps.stat_date, AVG(ps.players_online)
+            FROM player_stats ps
+            JOIN game g ON g.id_game = ps.id_game
+            WHERE g.steam_appid = %s AND ps.players_online > 0
+            GROUP BY ps.stat_date
+            ORDER BY ps.stat_date
+        """, (appid,))
+        return [(d, int(p)) for d, p in cur.fetchall() if d is not None]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Dopisuje historię graczy ze SteamCharts do player_stats.")
+    parser.add_argument("--appid", type=int, default=None, help="tylko jedna gra (steam_appid)")
+    parser.add_argument("--workers", type=int, default=REFRESH_WORKERS)
+    args = parser.parse_args(argv)
+    summary = sync_player_stats(args.appid, workers=args.workers)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# price_sync.py – aktualizacja game.price ze stron sklepu Steam (równolegle, zapis hurtowy)
+#
+#   python price_sync.py                        # wszystkie gry z steam_appid
+#   python price_sync.py --appid 730 --dry-run
+#   python price_sync.py --parse debug/*.html   # sam parser, offline
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from database_connection import bulk_update, with_db_connection
+from html_extract import extract
+from steamcharts import REFRESH_WORKERS, RefreshCancelled, cached_get, get_session
+
+# SteamDB banuje scrapery (zob. debug/price_debug_*.html) – ceny bierzemy ze sklepu Steam
+STORE_URL = "https://store.steampowered.com/app/{appid}/?cc=pl&l=english"
+PRICE_TTL = 6 * 60 * 60   # ceny zmieniają się rzadko – strona z cache HTTP przez 6h
+STORE_COOKIES = {"birthtime": "0", "lastagecheckage": "1-0-1990", "wants_mature_content": "1"}
+
+
+def parse_store_price(html: str) -> Optional[float]:
+    """Cena z HTML (SteamDB lub sklep Steam); None gdy strona zablokowana / brak ceny."""
+    result = extract("store_price", html) or {}
+    return result.get("price")
+
+
+def _prepare_session() -> None:
+    # bramka wieku przed stroną gry dla dorosłych – bez tych ciasteczek nie ma ceny
+    session = get_session()
+    for name, value in STORE_COOKIES.items():
+        session.cookies.set(name, value, domain="store.steampowered.com")
+
+
+def fetch_store_price(appid: int, cancel: Optional[threading.Event] = None) -> Optional[float]:
+    resp = cached_get(STORE_URL.format(appid=appid), ttl=PRICE_TTL, cancel=cancel, allow_stale=False)
+    return parse_store_price(resp.text)
+
+
+def _games(appid: Optional[int] = None) -> list[dict]:
+    with with_db_connection(dictionary=True) as (conn, cur):
+        if appid is None:
+            cur.execute("SELECT id_game, steam_appid, name, price FROM game WHERE steam_appid IS NOT NULL")
+        else:
+            cur.execute("SELECT id_game, steam_appid, name, price FROM game WHERE steam_appid = %s", (appid,))
+        return cur.fetchall()
+
+
+def sync_prices(appid: Optional[int] = None, workers: int = REFRESH_WORKERS,
+                cancel: Optional[threading.Event] = None, dry_run: bool = False,
+                log: Callable[[str], None] = print) -> dict:
+    """
+    Pobiera ceny równolegle (wspólna sesja z limitem zapytań, cache HTTP) i zapisuje
+    jednym bulk_update tylko te, które się zmieniły.
+    """
+    t0 = time.perf_counter()
+    _prepare_session()
+    games = _games(appid)
+
+    def one(game: dict):
+        if cancel is not None and cancel.is_set():
+            raise RefreshCancelled()
+        return fetch_store_price(game["steam_appid"], cancel=cancel)
+
+    changes, missing, failed = [], 0, 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price-sync") as pool:
+        futures = {pool.submit(one, g): g for g in games}
+        for fut, game in futures.items():
+            try:
+                price = fut.result()
+            except RefreshCancelled:
+                continue
+            except Exception as e:
+                failed += 1
+                log(f"  • {game['name']}: błąd – {e}")
+                continue
+            if price is None:
+                missing += 1
+                continue
+            old = game.get("price")
+            if old is not None and round(float(old), 2) == round(price, 2):
+                continue
+            changes.append((int(game["id_game"]), round(price, 2)))
+            log(f"  • {game['name']}: {old} -> {price:.2f} zł")
+
+    updated = 0
+    if changes and not dry_run:
+        updated = bulk_update("game", "id_game", ["price"], changes)
+
+    summary = {"games": len(games), "changed": len(changes), "updated": updated,
+               "missing": missing, "failed": failed, "seconds": time.perf_counter() - t0}
+    log(f"[PRICES] gier {summary['games']}, zmian {summary['changed']}, zapisano {updated}, "
+        f"bez ceny {missing}, błędy {failed} – {summary['seconds']:.1f}s")
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Aktualizuje game.price ze sklepu Steam.")
+    parser.add_argument("--appid", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=REFRESH_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="tylko pokaż zmiany, bez zapisu")
+    parser.add_argument("--parse", nargs="+", metavar="HTML", help="sparsuj lokalne pliki i zakończ")
+    args = parser.parse_args(argv)
+
+    if args.parse:
+        for f in args.parse:
+            html = Path(f).read_text(encoding="utf-8", errors="replace")
+            print(f"{f}: {parse_store_price(html)}")
+        return 0
+
+    summary = sync_prices(args.appid, workers=args.workers, dry_run=args.dry_run)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
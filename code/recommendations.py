@@ -0,0 +1,466 @@
+# recommendations.py – rekomendacje "podobne do Twoich gatunków" liczone w pamięci (NumPy)
+
+import datetime as _dt
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from database_connection import with_db_connection
+
+CATALOG_TTL = 600.0   # po ilu sekundach przeładować macierz gra×gatunek z bazy
+
+
+class RecommendationEngine:
+    """
+    Macierz gra×gatunek (0/1) budowana raz z bazy + wektor upodobań użytkownika
+    (ile posiadanych gier ma dany gatunek). Wynik gry = G @ upodobania, czyli ta sama
+    suma co w dawnym zapytaniu CTE. Ranking jest trzymany per użytkownik
+    do czasu invalidate() (np. po zakupie).
+    """
+
+    def __init__(self, catalog_ttl: float = CATALOG_TTL):
+        self.catalog_ttl = catalog_ttl
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._users: dict[str, dict] = {}
+
+        self.game_ids = np.zeros(0, dtype=np.int64)
+        self.genre_names: list[str] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.games: list[dict] = []
+        self._pos: dict[int, int] = {}
+        self._genres_txt: list[Optional[str]] = []
+        self._default_order = np.zeros(0, dtype=np.int64)
+
+    # === Katalog ===
+    def load(self) -> None:
+        with with_db_connection(dictionary=True) as (conn, cur):
+            cur.execute("SELECT id_game, name, price, release_date, image_url FROM game")
+            games = list(cur.fetchall())
+            cur.execute("""
+                SELECT gg.id_game, ge.name
+                FROM game_genre gg
+                JOIN genre ge ON ge.id_genre = gg.id_genre
+            """)
+            links = cur.fetchall()
+
+        genre_names = sorted({r["name"] for r in links if r.get("name")})
+        col = {name: j for j, name in enumerate(genre_names)}
+        pos = {int(g["id_game"]): i for i, g in enumerate(games)}
+
+        matrix = np.zeros((len(games), len(genre_names)), dtype=np.float32)
+        for r in links:
+            i = pos.get(int(r["id_game"]))
+            j = col.get(r.get("name"))
+            if i is not None and j is not None:
+                matrix[i, j] = 1.0
+
+        # gatunki gry jako tekst (alfabetycznie – kolumny są już posortowane)
+        genres_txt = []
+        for i in range(len(games)):
+            names = [genre_names[j] for j in np.flatnonzero(matrix[i])]
+            genres_txt.append(", ".join(names) if names else None)
+
+        # kolejność przy równym wyniku: nowsze premiery, potem nazwa
+        release = np.array([self._ordinal(g.get("release_date")) for g in games], dtype=np.int64)
+        names = [(g.get("name") or "") for g in games]
+        name_rank = np.empty(len(games), dtype=np.int64)
+        name_rank[sorted(range(len(games)), key=names.__getitem__)] = np.arange(len(games))
+        default_order = np.lexsort((name_rank, -release))
+
+        with self._lock:
+            self.games = games
+            self.game_ids = np.array([int(g["id_game"]) for g in games], dtype=np.int64)
+            self.genre_names = genre_names
+            self.matrix = matrix
+            self._pos = pos
+            self._genres_txt = genres_txt
+            self._default_order = default_order
+            self._users.clear()
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _ordinal(d) -> int:
+        if isinstance(d, _dt.datetime):
+            d = d.date()
+        return d.toordinal() if isinstance(d, _dt.date) else -1   # brak daty – na koniec
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.catalog_ttl:
+            self.load()
+
+    # === Użytkownik ===
+    def _fetch_owned(self, login: str) -> list[int]:
+        with with_db_connection(dictionary=True) as (conn, cur):
+            cur.execute("""
+                SELECT l.id_game
+                FROM library l
+                JOIN user u ON u.id_user = l.id_user
+                WHERE u.login = %s
+            """, (login,))
+            return [int(r["id_game"]) for r in cur.fetchall()]
+
+    def _user_state(self, login: str) -> dict:
+        state = self._users.get(login)
+        if state is not None:
+            return state
+
+        owned = np.zeros(len(self.games), dtype=bool)
+        for gid in self._fetch_owned(login):
+            i = self._pos.get(gid)
+            if i is not None:
+                owned[i] = True
+
+        affinity = self.matrix[owned].sum(axis=0)          # gatunek -> liczba posiadanych gier
+        scores = self.matrix @ affinity                    # jeden iloczyn macierz × wektor
+        candidates = np.flatnonzero(~owned)
+
+        # ranking deterministyczny: wynik malejąco, dalej domyślna kolejność katalogu
+        order = self._default_order[~owned[self._default_order]]
+        order = order[np.argsort(-scores[order], kind="stable")]
+
+        state = {
+            "owned_ids": [int(g) for g in self.game_ids[owned]],
+            "affinity": affinity,
+            "scores": scores,
+            "candidates": candidates,
+            "order": order,
+            "rows": {},   # pozycja -> gotowy słownik wiersza
+        }
+        with self._lock:
+            self._users[login] = state
+        return state
+
+    def _row(self, state: dict, i: int) -> dict:
+        row = state["rows"].get(i)
+        if row is None:
+            g = self.games[i]
+            matched = [self.genre_names[j] for j in np.flatnonzero(self.matrix[i] * state["affinity"])]
+            row = {
+                "id_game": int(g["id_game"]),
+                "name": g.get("name"),
+                "price": g.get("price"),
+                "release_date": g.get("release_date"),
+                "image_url": g.get("image_url"),
+                "score": int(state["scores"][i]),
+                "genres": self._genres_txt[i],
+                "matched_genres": ", ".join(matched) if matched else None,
+            }
+            state["rows"][i] = row
+        return dict(row)
+
+    def recommend(self, login: str, limit: int = 3, randomize: bool = False) -> list[dict]:
+        """Te same klucze co dawne zapytanie SQL (w tym matched_genres dla build_reco_reason)."""
+        self._ensure_loaded()
+        state = self._user_state(login)
+        if randomize:
+            cand = state["candidates"]
+            # losowa kolejność tylko w obrębie równych wyników
+            order = cand[np.lexsort((np.random.random(len(cand)), -state["scores"][cand]))]
+        else:
+            order = state["order"]
+        return [self._row(state, int(i)) for i in order[:max(0, int(limit))]]
+
+    def owned_ids(self, login: str) -> list[int]:
+        self._ensure_loaded()
+        return self._user_state(login)["owned_ids"]
+
+    def game_name(self, game_id: int) -> Optional[str]:
+        i = self._pos.get(int(game_id))
+        return None if i is None else self.games[i].get("name")
+
+    def invalidate(self, login: Optional[str] = None) -> None:
+        with self._lock:
+            if login is None:
+                self._users.clear()
+            else:
+                self._users.pop(login, None)
+
+
+# === "Gracze, którzy mają X, mają też Y" (współposiadanie) ===
+COOWN_TOP_K = 20        # ilu najbliższych sąsiadów trzymać na grę
+COOWN_MIN_SUPPORT = 1   # minimalna liczba wspólnych graczy
+COOWN_REBUILD_EVERY = 500   # po tylu aktualizacjach przyrostowych – pełna przebudowa
+COOWN_BLOCK_CELLS = 1 << 22   # ile komórek (wiersze bloku × gry) ma gęsty wynik jednego bloku
+
+
+def _interaction_weight(rating: Optional[int]) -> float:
+    """Posiadanie = 0.75, ocena przesuwa wagę w zakresie 0.55–1.0."""
+    return 0.75 if rating is None else 0.5 + float(rating) / 20.0
+
+
+def _ranges(starts: np.ndarray, lens: np.ndarray) -> np.ndarray:
+    """Sklejone arange(start, start+len) dla każdej pary – bez pętli w Pythonie."""
+    total = int(lens.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(lens) - lens), lens)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+def _compress(major: np.ndarray, minor: np.ndarray, weights: np.ndarray, size: int):
+    """Trójki (wiersz, kolumna, waga) -> tablice w stylu CSR: (ptr, kolumny, wagi)."""
+    order = np.lexsort((minor, major))
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(major, minlength=size), out=ptr[1:])
+    return ptr, minor[order].astype(np.int64), weights[order].astype(np.float32)
+
+
+class CoOwnershipIndex:
+    """
+    Rzadka macierz użytkownik×gra w dwóch układach (tablice w stylu CSR):
+      _u_ptr/_u_cols/_u_w – gry każdego gracza, _g_ptr/_g_users/_g_w – gracze każdej gry,
+    z tabel library + rating i gotowe listy top-K sąsiadów (podobieństwo kosinusowe):
+      neighbours[i] – pozycje gier (int32, -1 = puste), scores[i] – podobieństwa (float32).
+    Współposiadanie bloku gier liczy bincount po parach (gra z bloku, gra tego samego
+    gracza) – pamięć rośnie z liczbą par, nie z użytkownikami × grami. similar() to tylko
+    wycinek tablicy. Zakup/ocena przelicza wiersz tej gry i gier danego gracza; pozostałe
+    wiersze mogą mieć lekko nieaktualne wagi do kolejnej pełnej przebudowy
+    (co COOWN_REBUILD_EVERY zmian). Budowa i aktualizacje – poza wątkiem Tk.
+    """
+
+    def __init__(self, k: int = COOWN_TOP_K, min_support: int = COOWN_MIN_SUPPORT):
+        self.k = k
+        self.min_support = min_support
+        self._lock = threading.Lock()
+        self._users: dict[int, int] = {}   # id_user -> wiersz
+        self._pos: dict[int, int] = {}     # id_game -> kolumna
+        self._u_ptr = np.zeros(1, dtype=np.int64)
+        self._u_cols = np.zeros(0, dtype=np.int64)
+        self._u_w = np.zeros(0, dtype=np.float32)
+        self._g_ptr = np.zeros(1, dtype=np.int64)
+        self._g_users = np.zeros(0, dtype=np.int64)
+        self._g_w = np.zeros(0, dtype=np.float32)
+        self.game_ids = np.zeros(0, dtype=np.int64)
+        self.neighbours = np.full((0, k), -1, dtype=np.int32)
+        self.scores = np.zeros((0, k), dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float64)
+        self._updates = 0
+        self._building = False
+        self._during_build: list[tuple[int, int, float]] = []   # zmiany, które budowa mogła przegapić
+        self.built = False
+
+    # === Macierz ===
+    def _grow_games(self, games: int) -> None:
+        """Nowa gra po budowie: tablice wierszy rosną dwukrotnie (kopiowanie rzadko)."""
+        cap = len(self.game_ids)
+        if games <= cap:
+            return
+        extra = max(games, 2 * cap) - cap
+        # puste wiersze mają normę 0 – nigdy nie trafiają do sąsiadów
+        self.game_ids = np.concatenate([self.game_ids, np.full(extra, -1, dtype=np.int64)])
+        self.neighbours = np.vstack([self.neighbours, np.full((extra, self.k), -1, dtype=np.int32)])
+        self.scores = np.vstack([self.scores, np.zeros((extra, self.k), dtype=np.float32)])
+        self._norms = np.concatenate([self._norms, np.zeros(extra, dtype=np.float64)])
+
+    @staticmethod
+    def _put(ptr, cols, weights, row: int, col: int, weight: float):
+        """Ustawia (row, col) w tablicach CSR; nowy wpis przesuwa ogon (memmove, bez pętli)."""
+        s, e = int(ptr[row]), int(ptr[row + 1])
+        at = s + int(np.searchsorted(cols[s:e], col))
+        if at < e and cols[at] == col:
+            weights[at] = weight
+            return ptr, cols, weights
+        ptr = ptr.copy()
+        ptr[row + 1:] += 1
+        return ptr, np.insert(cols, at, col), np.insert(weights, at, np.float32(weight))
+
+    def _set(self, user_id: int, game_id: int, weight: float) -> tuple[int, int]:
+        u = self._users.get(user_id)
+        if u is None:
+            u = self._users[user_id] = len(self._users)
+            self._u_ptr = np.append(self._u_ptr, self._u_ptr[-1])
+        i = self._pos.get(game_id)
+        if i is None:
+            i = self._pos[game_id] = len(self._pos)
+            self._g_ptr = np.append(self._g_ptr, self._g_ptr[-1])
+            self._grow_games(len(self._pos))
+            self.game_ids[i] = game_id
+        self._u_ptr, self._u_cols, self._u_w = self._put(self._u_ptr, self._u_cols, self._u_w, u, i, weight)
+        self._g_ptr, self._g_users, self._g_w = self._put(self._g_ptr, self._g_users, self._g_w, i, u, weight)
+        w = self._g_w[self._g_ptr[i]:self._g_ptr[i + 1]].astype(np.float64)
+        self._norms[i] = float(np.sqrt(w @ w))
+        return u, i
+
+    # === Sąsiedzi ===
+    def _compute_rows(self, rows: np.ndarray) -> None:
+        """Sąsiedzi dla gier `rows` – tylko gracze tych gier i ich pozostałe gry."""
+        n = len(self._pos)
+        if not len(rows) or not n:
+            return
+        step = max(1, COOWN_BLOCK_CELLS // n)
+        for start in range(0, len(rows), step):
+            self._compute_block(np.asarray(rows[start:start + step], dtype=np.int64), n)
+
+    def _compute_block(self, rows: np.ndarray, n: int) -> None:
+        # (wiersz bloku, gracz, waga) dla wszystkich właścicieli gier z bloku
+        starts = self._g_ptr[rows]
+        lens = self._g_ptr[rows + 1] - starts
+        own = _ranges(starts, lens)
+        own_row = np.repeat(np.arange(len(rows), dtype=np.int64), lens)
+        own_user = self._g_users[own]
+
+        # każda para (gra z bloku, inna gra tego samego gracza)
+        u_start = self._u_ptr[own_user]
+        u_len = self._u_ptr[own_user + 1] - u_start
+        items = _ranges(u_start, u_len)
+        key = np.repeat(own_row, u_len) * n + self._u_cols[items]
+        pair_w = np.repeat(self._g_w[own].astype(np.float64), u_len) * self._u_w[items]
+
+        cells = len(rows) * n
+        co = np.bincount(key, weights=pair_w, minlength=cells).reshape(len(rows), n)
+        support = np.bincount(key, minlength=cells).reshape(len(rows), n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sim = co / (self._norms[rows, None] * self._norms[None, :n])
+        sim[np.arange(len(rows)), rows] = 0.0
+        sim[(support < self.min_support) | ~np.isfinite(sim)] = 0.0
+
+        k = min(self.k, n)
+        if n > k:
+            top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(rows), n)).copy()
+        top_sim = np.take_along_axis(sim, top, axis=1)
+        order = np.argsort(-top_sim, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sim = np.take_along_axis(top_sim, order, axis=1)
+        empty = top_sim <= 0
+
+        self.neighbours[rows] = -1
+        self.scores[rows] = 0.0
+        self.neighbours[rows, :k] = np.where(empty, -1, top)
+        self.scores[rows, :k] = np.where(empty, 0.0, top_sim)
+
+    # === Budowa / aktualizacje ===
+    def build(self) -> None:
+        with with_db_connection(dictionary=True) as (conn, cur):
+            cur.execute("""
+                SELECT l.id_user, l.id_game, r.rating
+                FROM library l
+                LEFT JOIN rating r ON r.id_user = l.id_user AND r.id_game = l.id_game
+            """)
+            rows = cur.fetchall()
+
+        user_ids = np.array([int(r["id_user"]) for r in rows], dtype=np.int64)
+        game_ids = np.array([int(r["id_game"]) for r in rows], dtype=np.int64)
+        weights = np.array([_interaction_weight(r.get("rating")) for r in rows], dtype=np.float32)
+        users, u_row = np.unique(user_ids, return_inverse=True)
+        games, g_col = np.unique(game_ids, return_inverse=True)
+        # powtórzona para (gracz, gra) – liczy się ostatni wiersz
+        _, last = np.unique((u_row * len(games) + g_col)[::-1], return_index=True)
+        keep = len(rows) - 1 - last
+        u_row, g_col, weights = u_row[keep], g_col[keep], weights[keep]
+
+        # wszystkie tablice od razu w docelowym rozmiarze
+        fresh = CoOwnershipIndex(self.k, self.min_support)
+        fresh._users = {int(u): j for j, u in enumerate(users)}
+        fresh._pos = {int(g): i for i, g in enumerate(games)}
+        fresh._u_ptr, fresh._u_cols, fresh._u_w = _compress(u_row, g_col, weights, len(users))
+        fresh._g_ptr, fresh._g_users, fresh._g_w = _compress(g_col, u_row, weights, len(games))
+        fresh.game_ids = games
+        fresh.neighbours = np.full((len(games), self.k), -1, dtype=np.int32)
+        fresh.scores = np.zeros((len(games), self.k), dtype=np.float32)
+        fresh._norms = np.sqrt(np.bincount(g_col, weights=weights.astype(np.float64) ** 2, minlength=len(games)))
+        fresh._compute_rows(np.arange(len(games)))
+
+        with self._lock:
+            state = dict(fresh.__dict__)
+            for name in ("_lock", "_building", "_during_build"):
+                state.pop(name)
+            self.__dict__.update(state)
+            # zakupy/oceny zatwierdzone w trakcie budowy mogły nie trafić do zapytania
+            missed, self._during_build = self._during_build, []
+            for user_id, game_id, weight in missed:
+                self._apply(user_id, game_id, weight)
+            self.built = True
+
+    def _start_build(self) -> None:
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            self._during_build = []
+        threading.Thread(target=self._build_in_background, name="coown-build", daemon=True).start()
+
+    def build_async(self) -> None:
+        """Pierwsza budowa w wątku w tle; do jej końca similar()/best_source() nic nie zwracają."""
+        if not self.built:
+            self._start_build()
+
+    def _build_in_background(self) -> None:
+        try:
+            self.build()
+        except Exception as e:
+            print(f"[RECO] Nie zbudowano indeksu współposiadania: {e}")
+        finally:
+            self._building = False
+
+    def _apply(self, user_id: int, game_id: int, weight: float) -> None:
+        u, i = self._set(user_id, game_id, weight)
+        self._compute_rows(self._u_cols[self._u_ptr[u]:self._u_ptr[u + 1]])   # zawiera już i
+
+    def add_interaction(self, user_id: int, game_id: int, rating: Optional[int] = None) -> None:
+        """Zakup lub ocena: przelicza sąsiadów tej gry i pozostałych gier gracza."""
+        weight = _interaction_weight(rating)
+        with self._lock:
+            if self._building:
+                self._during_build.append((int(user_id), int(game_id), weight))
+            if not self.built:
+                return   # pierwsza budowa i tak wczyta wszystko z bazy
+            self._apply(int(user_id), int(game_id), weight)
+            self._updates += 1
+            rebuild = self._updates >= COOWN_REBUILD_EVERY
+        if rebuild:
+            self._start_build()   # najwyżej jedna przebudowa naraz
+
+    def similar(self, game_id: int, limit: int = 5) -> list[tuple[int, float]]:
+        """[(id_game, podobieństwo)] – gry najczęściej posiadane razem z game_id."""
+        i = self._pos.get(int(game_id))
+        if i is None:
+            return []
+        row = self.neighbours[i]
+        keep = row >= 0
+        ids = self.game_ids[row[keep][:limit]]
+        return list(zip(ids.tolist(), self.scores[i][keep][:limit].tolist()))
+
+    def best_source(self, game_id: int, owned_ids) -> Optional[tuple[int, float]]:
+        """Która z posiadanych gier najmocniej "ciągnie" game_id – (id_gry_posiadanej, podobieństwo)."""
+        i = self._pos.get(int(game_id))
+        if i is None:
+            return None
+        owned = np.asarray([self._pos[g] for g in owned_ids if g in self._pos], dtype=np.int64)
+        if not len(owned):
+            return None
+        row = self.neighbours[i]
+        hit = np.flatnonzero(np.isin(row, owned))
+        if not len(hit):
+            return None
+        j = int(hit[0])   # wiersz jest posortowany malejąco
+        return int(self.game_ids[row[j]]), float(self.scores[i, j])
+
+
+_engine: Optional[RecommendationEngine] = None
+
+
+def get_recommendation_engine() -> RecommendationEngine:
+    global _engine
+    if _engine is None:
+        _engine = RecommendationEngine()
+    return _engine
+
+
+def invalidate_recommendations(login: Optional[str] = None) -> None:
+    if _engine is not None:
+        _engine.invalidate(login)
+
+
+_coown: Optional[CoOwnershipIndex] = None
+
+
+def get_coownership_index() -> CoOwnershipIndex:
+    global _coown
+    if _coown is None:
+        _coown = CoOwnershipIndex()
+    return _coown
@@ -0,0 +1,294 @@
+# refresh_scheduler.py – cykliczne odświeżanie liczby graczy (current / 24h / rekord) w tle.
+# Każda gra ma własny interwał zależny od popularności (popularne częściej), z losowym
+# rozrzutem; kolejka i czasy ostatniego odświeżenia są zapisywane na dysku.
+#
+#   python refresh_scheduler.py            # demon: odświeża w pętli, Ctrl+C kończy
+#   python refresh_scheduler.py --once     # jedna porcja zaległych gier (np. z crona)
+#   python refresh_scheduler.py --status   # najbliższe terminy
+
+import argparse
+import heapq
+import json
+import math
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from database_connection import bulk_update, with_db_connection
+from mapingURL import BASE_DIR
+from steamcharts import REFRESH_WORKERS, STATS_TTL, SteamChartsRefresher
+
+SCHEDULE_FILE = BASE_DIR / ".refresh_schedule.json"
+MIN_INTERVAL = STATS_TTL          # częściej i tak dostalibyśmy stronę z cache HTTP
+MAX_INTERVAL = 6 * 60 * 60        # gry bez graczy – raz na kilka godzin
+JITTER = 0.15                     # ±15% interwału, żeby terminy się nie zbijały
+TICK_SECONDS = 5.0                # jak często wątek sprawdza kolejkę
+BATCH_SIZE = REFRESH_WORKERS * 2  # ile zaległych gier pobieramy naraz
+GAMES_RESYNC_SECONDS = 10 * 60    # co ile dociągamy listę gier z bazy
+
+
+def refresh_interval(players: Optional[int]) -> float:
+    """
+    Interwał w sekundach: każdy rząd wielkości graczy skraca go o połowę
+    (0 graczy -> MAX_INTERVAL, 1000 -> /8, 1 mln -> /64), w granicach [MIN, MAX].
+    """
+    players = max(0, int(players or 0))
+    interval = MAX_INTERVAL / 2 ** math.log10(players + 1)
+    return float(min(MAX_INTERVAL, max(MIN_INTERVAL, interval)))
+
+
+def _jittered(interval: float) -> float:
+    return interval * (1 + random.uniform(-JITTER, JITTER))
+
+
+def save_live_stats(rows: list[tuple]) -> int:
+    """rows = [(appid, current, peak_24h, peak_all), ...] – jeden zapis hurtowy do game."""
+    return bulk_update("game", "steam_appid", ["current_players", "peak_24h_players", "peak_players"], rows)
+
+
+def _load_games() -> list[dict]:
+    with with_db_connection(dictionary=True) as (conn, cursor):
+        cursor.execute("""
+            SELECT steam_appid, name, current_players, peak_24h_players
+            FROM game
+            WHERE steam_appid IS NOT NULL
+        """)
+        return cursor.fetchall()
+
+
+class RefreshScheduler:
+    """
+    Stan per appid: name, interval, last_refreshed, next_due, failures (czasy – epoch s).
+    Kolejka to kopiec (next_due, appid); wpisy nieaktualne (po zmianie terminu) są pomijane
+    przy zdejmowaniu. Gry odświeżone niedawno (także ręcznie, przez record()) są przesuwane
+    zamiast pobierane ponownie.
+
+    Tryb w aplikacji: start() / stop(); tryb demona: run_forever().
+    """
+
+    def __init__(self, path: Path = SCHEDULE_FILE,
+                 save_many: Callable[[list[tuple]], int] = save_live_stats,
+                 games_loader: Callable[[], list[dict]] = _load_games,
+                 batch_size: int = BATCH_SIZE, tick: float = TICK_SECONDS,
+                 log: Callable[[str], None] = print):
+        self.path = Path(path)
+        self.save_many = save_many
+        self.games_loader = games_loader
+        self.batch_size = batch_size
+        self.tick = tick
+        self.log = log
+        self.state: dict[int, dict] = {}
+        self._heap: list[tuple[float, int]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refresher: Optional[SteamChartsRefresher] = None
+        self._games_synced_at = 0.0
+        self.load()
+
+    # === Trwałość ===
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            games = data.get("games", {})
+        except (OSError, ValueError):
+            games = {}
+        with self._lock:
+            self.state = {int(appid): entry for appid, entry in games.items()}
+            self._rebuild_heap()
+
+    def save(self) -> None:
+        with self._lock:
+            payload = {"version": 1, "saved_at": time.time(),
+                       "games": {str(appid): entry for appid, entry in self.state.items()}}
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.log(f"[SCHEDULER] Nie udało się zapisać kolejki: {e}")
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(entry["next_due"], appid) for appid, entry in self.state.items()]
+        heapq.heapify(self._heap)
+
+    def _schedule(self, appid: int, next_due: float) -> None:
+        self.state[appid]["next_due"] = next_due
+        heapq.heappush(self._heap, (next_due, appid))
+
+    # === Lista gier ===
+    def sync_games(self, now: Optional[float] = None) -> None:
+        """Nowe gry z bazy trafiają do kolejki rozłożone po swoim interwale; usunięte wypadają."""
+        now = time.time() if now is None else now
+        games = self.games_loader()
+        with self._lock:
+            seen = set()
+            for game in games:
+                appid = int(game["steam_appid"])
+                seen.add(appid)
+                entry = self.state.get(appid)
+                if entry is None:
+                    interval = refresh_interval(game.get("current_players") or game.get("peak_24h_players"))
+                    self.state[appid] = {"name": game.get("name"), "interval": interval,
+                                         "last_refreshed": None, "next_due": now, "failures": 0}
+                    self._schedule(appid, now + random.uniform(0, interval))
+                else:
+                    entry["name"] = game.get("name")
+            for appid in set(self.state) - seen:
+                del self.state[appid]
+            self._rebuild_heap()
+        self._games_synced_at = now
+
+    # === Kolejka ===
+    def due(self, now: Optional[float] = None, limit: Optional[int] = None) -> list[dict]:
+        """Zdejmuje z kolejki do `limit` gier, którym minął termin."""
+        now = time.time() if now is None else now
+        limit = self.batch_size if limit is None else limit
+        out = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(out) < limit:
+                next_due, appid = heapq.heappop(self._heap)
+                entry = self.state.get(appid)
+                if entry is None or entry["next_due"] != next_due:
+                    continue   # nieaktualny wpis kopca
+                last = entry.get("last_refreshed")
+                if last is not None and now - last < MIN_INTERVAL:
+                    self._schedule(appid, last + max(MIN_INTERVAL, _jittered(entry["interval"])))
+                    continue
+                out.append({"steam_appid": appid, "name": entry.get("name")})
+        return out
+
+    def record(self, rows: list[tuple], now: Optional[float] = None) -> None:
+        """Odnotowuje świeże dane [(appid, current, peak_24h, peak_all), ...] – też z ręcznego odświeżenia."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for appid, current, peak_24h, _peak_all in rows:
+                entry = self.state.get(int(appid))
+                if entry is None:
+                    continue
+                entry["interval"] = refresh_interval(current if current is not None else peak_24h)
+                entry["last_refreshed"] = now
+                entry["failures"] = 0
+                self._schedule(int(appid), now + _jittered(entry["interval"]))
+
+    def _record_failures(self, appids: list[int], now: float) -> None:
+        with self._lock:
+            for appid in appids:
+                entry = self.state.get(appid)
+                if entry is None:
+                    continue
+                entry["failures"] = min(entry.get("failures", 0) + 1, 6)
+                delay = min(MAX_INTERVAL, entry["interval"] * 2 ** (entry["failures"] - 1))
+                self._schedule(appid, now + _jittered(delay))
+
+    def run_once(self, now: Optional[float] = None) -> dict:
+        """Pobiera jedną porcję zaległych gier i zapisuje je hurtowo."""
+        now = time.time() if now is None else now
+        if not self.state or now - self._games_synced_at >= GAMES_RESYNC_SECONDS:
+            self.sync_games(now)
+        games = self.due(now)
+        if not games:
+            return {"games": 0, "updated": 0, "failed": 0}
+
+        self._refresher = SteamChartsRefresher(save_many=self.save_many)
+        results = self._refresher.run(games)
+        rows = [(r["appid"], r["current"], r["peak_24h"], r["peak_all"])
+                for r in results if r["current"] is not None]
+        done = time.time()
+        self.record(rows, done)
+        ok = {int(r[0]) for r in rows}
+        failed = [int(g["steam_appid"]) for g in games if int(g["steam_appid"]) not in ok]
+        self._record_failures(failed, done)
+        self.save()
+
+        updated = 0
+        while True:   # zdarzenia refreshera – interesuje nas tylko podsumowanie
+            try:
+                kind, data = self._refresher.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "done":
+                updated = data["updated"]
+        self.log(f"[SCHEDULER] odświeżono {len(rows)}/{len(games)} gier, zmienione {updated}, "
+                 f"błędy {len(failed)}")
+        return {"games": len(games), "updated": updated, "failed": len(failed)}
+
+    def upcoming(self, limit: int = 10) -> list[tuple[float, int, dict]]:
+        with self._lock:
+            items = sorted((e["next_due"], appid, e) for appid, e in self.state.items())
+        return items[:limit]
+
+    # === Pętla ===
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.log(f"[SCHEDULER] Błąd: {e}")
+            self._stop.wait(self.tick)
+        self.save()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Wątek w tle (tryb w aplikacji)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+
+_scheduler: Optional[RefreshScheduler] = None
+
+
+def get_refresh_scheduler(**kwargs) -> RefreshScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RefreshScheduler(**kwargs)
+    return _scheduler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cykliczne odświeżanie liczby graczy ze SteamCharts.")
+    parser.add_argument("--once", action="store_true", help="jedna porcja zaległych gier i koniec")
+    parser.add_argument("--status", action="store_true", help="pokaż najbliższe terminy")
+    parser.add_argument("--tick", type=float, default=TICK_SECONDS)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    scheduler = RefreshScheduler(batch_size=args.batch, tick=args.tick)
+    if args.status:
+        now = time.time()
+        for next_due, appid, entry in scheduler.upcoming(20):
+            print(f"{appid:>8}  za {max(0, next_due - now) / 60:6.1f} min  co {entry['interval'] / 60:6.1f} min  "
+                  f"{entry.get('name')}")
+        return 0
+    if args.once:
+        summary = scheduler.run_once()
+        return 1 if summary["failed"] else 0
+
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# shop_catalog.py – indeks katalogu sklepu do filtrowania w pamięci
+
+import datetime as _dt
+from typing import Optional
+
+import numpy as np
+
+
+class CatalogIndex:
+    """
+    Indeks budowany raz przy wczytaniu sklepu:
+      - gatunek -> maska bitowa (np.bool_) pozycji w katalogu,
+      - posortowane ceny i daty premiery (+ permutacje) do wyszukiwania binarnego.
+    Filtry to iloczyny masek, a wynik zachowuje kolejność listy wejściowej.
+    """
+
+    def __init__(self, games: list[dict]):
+        self.games = list(games)
+        n = len(self.games)
+
+        # --- gatunki: jeden split na grę, przy budowie ---
+        genre_rows: dict[str, list[int]] = {}
+        for i, g in enumerate(self.games):
+            for name in (g.get("genres") or "").split(", "):
+                if name:
+                    genre_rows.setdefault(name, []).append(i)
+        self._genres: dict[str, np.ndarray] = {}
+        for name, rows in genre_rows.items():
+            mask = np.zeros(n, dtype=bool)
+            mask[rows] = True
+            self._genres[name] = mask
+
+        # --- ceny (gry bez ceny nie przechodzą filtra ceny, jak wcześniej) ---
+        price_rows = [i for i, g in enumerate(self.games) if g.get("price") is not None]
+        prices = np.array([float(self.games[i]["price"]) for i in price_rows], dtype=np.float64)
+        order = np.argsort(prices, kind="stable")
+        self._price_sorted = prices[order]
+        self._price_rows = np.asarray(price_rows, dtype=np.int64)[order]
+
+        # --- daty premiery jako ordinal ---
+        date_rows = [i for i, g in enumerate(self.games) if g.get("release_date")]
+        days = np.array([self._ordinal(self.games[i]["release_date"]) for i in date_rows], dtype=np.int64)
+        order = np.argsort(days, kind="stable")
+        self._date_sorted = days[order]
+        self._date_rows = np.asarray(date_rows, dtype=np.int64)[order]
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    @staticmethod
+    def _ordinal(d) -> int:
+        if isinstance(d, _dt.datetime):
+            d = d.date()
+        return d.toordinal()
+
+    def genres(self) -> list[str]:
+        return sorted(self._genres)
+
+    def _rows_mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(self.games), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def query_mask(self, genre: Optional[str] = None,
+                   date_from: Optional[_dt.date] = None,
+                   date_to: Optional[_dt.date] = None,
+                   price_max: Optional[float] = None) -> np.ndarray:
+        mask = np.ones(len(self.games), dtype=bool)
+
+        if genre:
+            gm = self._genres.get(genre)
+            if gm is None:
+                return np.zeros(len(self.games), dtype=bool)
+            mask &= gm
+
+        if date_from is not None or date_to is not None:
+            lo = 0 if date_from is None else np.searchsorted(self._date_sorted, self._ordinal(date_from), side="left")
+            hi = len(self._date_sorted) if date_to is None else np.searchsorted(self._date_sorted, self._ordinal(date_to), side="right")
+            mask &= self._rows_mask(self._date_rows[lo:hi])
+
+        if price_max is not None:
+            hi = np.searchsorted(self._price_sorted, float(price_max), side="right")
+            mask &= self._rows_mask(self._price_rows[:hi])
+
+        return mask
+
+    def query(self, genre: Optional[str] = None,
+              date_from: Optional[_dt.date] = None,
+              date_to: Optional[_dt.date] = None,
+              price_max: Optional[float] = None) -> list[dict]:
+        mask = self.query_mask(genre, date_from, date_to, price_max)
+        games = self.games
+        return [games[i] for i in np.flatnonzero(mask)]
@@ -2,13 +2,23 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from shop_ui_styles import COLOR_BG, COLOR_NAV, stylized_nav_button, stylized_label
 from database_connection import with_db_connection
+from shop_catalog import CatalogIndex
+from recommendations import get_coownership_index, get_recommendation_engine, invalidate_recommendations
+from image_pipeline import AsyncImageLoader, ImageLRU, IMAGE_WORKERS
+from ui_scheduler import CancelToken, run_in_background
 from io import BytesIO
 import os
 import decimal
 import sys
+import threading
 from database_connection import (
-    fetch_game_rating_summary,
+    SHOP_PAGE_SIZE,
+    count_games,
+    fetch_games_for_shop_with_ratings,
+    fetch_games_page,
+    fetch_rating_summaries,
     fetch_user_game_rating,
+    fetch_user_ratings,
     upsert_rating,
 )
 try:
@@ -18,15 +28,8 @@ except Exception:
     HAS_PIL = False
 
 if HAS_PIL:
-    try:
-        import pillow_heif
-        pillow_heif.register_heif_opener()  # HEIF/HEIC/AVIF
-    except Exception:
-        pass
-    try:
-        import pillow_avif  # sam import rejestruje plugin AVIF dla Pillow
-    except Exception:
-        pass
+    from thumbnail_cache import load_thumbnail, make_thumbnail, register_image_plugins, save_thumbnail
+    register_image_plugins()   # HEIF/HEIC/AVIF, jeśli zainstalowane
 
 try:
     import requests
@@ -36,15 +39,19 @@ except Exception:
 
 # === Stałe UI ===
 CARD_W = 240
+CARD_H = 350            # stała wysokość karty – potrzebna do wirtualizacji siatki
+CARD_H_LIBRARY = 410    # karta biblioteki ma dodatkowo ocenę użytkownika i przycisk „Oceń”
 IMG_W, IMG_H = 220, 124
 GRID_PAD_X = 12
 GRID_PAD_Y = 14
 MAX_COLUMNS = 5
+FILTER_DEBOUNCE_MS = 120   # opóźnienie filtrowania przy pisaniu w polach
+SHOP_INDEX_MAX_GAMES = 20000   # do tej wielkości katalog filtrujemy w pamięci, powyżej – strony z bazy
 
 
 # === Cache obrazów ===
-_IMAGE_CACHE = {}
-_BAD_ONCE = set()
+_IMAGE_CACHE = ImageLRU()   # PhotoImage wg klucza "ścieżka|WxH" + błędy z TTL (log raz na TTL)
+_IMAGE_LOADER = AsyncImageLoader(max_workers=IMAGE_WORKERS)
 
 # === Baza ===
 def fetch_all_genres() -> list[str]:
@@ -55,77 +62,42 @@ def fetch_all_genres() -> list[str]:
         return [r["name"] for r in rows if r and r.get("name")]
     
 def fetch_recommended_games_with_reason(login: str, limit: int = 3, randomize: bool = False) -> list[dict]:
-   
-    order_clause = "ORDER BY s.score DESC, s.release_date DESC, s.name ASC"
-    if randomize:
-        order_clause = "ORDER BY s.score DESC, RAND()"
-
-    sql = f"""
-        WITH user_genres AS (
-            SELECT gg.id_genre, COUNT(*) AS cnt
-            FROM library l
-            JOIN user u    ON u.id_user = l.id_user
-            JOIN game_genre gg ON gg.id_game = l.id_game
-            WHERE u.login = %s
-            GROUP BY gg.id_genre
-        ),
-        owned AS (
-            SELECT l.id_game
-            FROM library l
-            JOIN user u ON u.id_user = l.id_user
-            WHERE u.login = %s
-        ),
-        candidates AS (
-            SELECT g.id_game, g.name, g.price, g.release_date, g.image_url
-            FROM game g
-            WHERE g.id_game NOT IN (SELECT id_game FROM owned)
-        ),
-        scored AS (
-            SELECT 
-                c.id_game,
-                c.name,
-                c.price,
-                c.release_date,
-                c.image_url,
-                COALESCE(SUM(ug.cnt), 0) AS score
-            FROM candidates c
-            LEFT JOIN game_genre gg ON gg.id_game = c.id_game
-            LEFT JOIN user_genres ug ON ug.id_genre = gg.id_genre
-            GROUP BY c.id_game, c.name, c.price, c.release_date, c.image_url
-        )
-        SELECT 
-            s.id_game,
-            s.name,
-            s.price,
-            s.release_date,
-            s.image_url,
-            s.score,
-            (
-              SELECT GROUP_CONCAT(DISTINCT ge.name ORDER BY ge.name SEPARATOR ', ')
-              FROM game_genre ggi
-              LEFT JOIN genre ge ON ge.id_genre = ggi.id_genre
-              WHERE ggi.id_game = s.id_game
-            ) AS genres,
-            (
-              SELECT GROUP_CONCAT(DISTINCT ge2.name ORDER BY ge2.name SEPARATOR ', ')
-              FROM game_genre ggm
-              JOIN user_genres ugm ON ugm.id_genre = ggm.id_genre
-              JOIN genre ge2 ON ge2.id_genre = ggm.id_genre
-              WHERE ggm.id_game = s.id_game
-            ) AS matched_genres
-        FROM scored s
-        {order_clause}
-        LIMIT %s
-    """
-    with with_db_connection(dictionary=True) as (conn, cursor):
-        cursor.execute(sql, (login, login, limit))
-        rows = cursor.fetchall() or []
-        return rows
+    """Rekomendacje z indeksu w pamięci (recommendations.py) – bez zapytania CTE przy każdym kliknięciu."""
+    engine = get_recommendation_engine()
+    rows = engine.recommend(login, limit=limit, randomize=randomize)
+
+    # "gracze, którzy mają X, mają też tę grę" – z indeksu współposiadania
+    try:
+        coown = get_coownership_index()
+        coown.build_async()   # pierwsza budowa w tle – do tego czasu bez "gracze mają też"
+        owned = engine.owned_ids(login)
+        for row in rows:
+            src = coown.best_source(row["id_game"], owned)
+            if src is not None:
+                row["also_owned_from"] = engine.game_name(src[0])
+    except Exception as e:
+        print(f"[RECO] Indeks współposiadania niedostępny: {e}")
+    return rows
+
 
+def _record_interaction(login: str, game_id: int, rating: int | None = None, id_user: int | None = None) -> None:
+    """Zakup / ocena (już zatwierdzone) – przyrostowa aktualizacja indeksu współposiadania w wątku w tle."""
+    def work():
+        try:
+            uid = id_user if id_user is not None else get_user_id(login)
+            if uid is not None:
+                get_coownership_index().add_interaction(uid, game_id, rating)
+        except Exception as e:
+            print(f"[RECO] Nie zaktualizowano indeksu współposiadania: {e}")
+
+    threading.Thread(target=work, name="coown-update", daemon=True).start()
 
 
 def build_reco_reason(row: dict) -> str:
   
+    src = (row.get("also_owned_from") or "").strip()
+    if src:
+        return f"Gracze, którzy mają {src}, mają też tę grę"
     mg = (row.get("matched_genres") or "").strip()
     if mg:
         return f"Podobne do Twoich gatunków: {mg}"
@@ -177,28 +149,6 @@ def fetch_user_profile(login: str) -> dict:
         clean[k] = v
     return clean
 
-def fetch_games_for_shop() -> list[dict]:
-    sql = """
-        SELECT 
-            g.id_game,
-            g.name,
-            g.price,
-            g.release_date,
-            g.image_url,
-            (
-              SELECT GROUP_CONCAT(DISTINCT ge.name ORDER BY ge.name SEPARATOR ', ')
-              FROM game_genre gg
-              LEFT JOIN genre ge ON ge.id_genre = gg.id_genre
-              WHERE gg.id_game = g.id_game
-            ) AS genres
-        FROM game g
-        ORDER BY g.release_date DESC, g.name ASC
-    """
-    with with_db_connection(dictionary=True) as (conn, cursor):
-        cursor.execute(sql)
-        rows = cursor.fetchall() or []
-        return rows
-
 def fetch_library_for_user(login: str) -> list[dict]:
     sql = """
         SELECT 
@@ -265,89 +215,105 @@ def purchase_game(login: str, game_id: int) -> tuple[bool, str, float]:
         cursor.execute("UPDATE user SET balance = COALESCE(balance, 0) - %s WHERE id_user = %s", (price, id_user))
         cursor.execute("INSERT INTO library (id_user, id_game) VALUES (%s, %s)", (id_user, game_id))
         conn.commit()
+        invalidate_recommendations(login)   # posiadane gry zmieniły upodobania i kandydatów
         cursor.execute("SELECT COALESCE(balance, 0) AS balance FROM user WHERE id_user = %s", (id_user,))
         nb = cursor.fetchone()
         new_balance = float(nb["balance"] if nb else 0.0)
-        return (True, "Zakup zakończony powodzeniem.", new_balance)
 
+    # połączenie już oddane – indeks współposiadania liczy się poza transakcją i wątkiem Tk
+    _record_interaction(login, game_id, id_user=id_user)
+    return (True, "Zakup zakończony powodzeniem.", new_balance)
 
-# === Obrazy / placeholdery ===
-def _placeholder_widget(parent, w, h, text="NO IMAGE", fg="#00FFFF"):
-    f = tk.Frame(parent, width=w, height=h, bg="#0A0A1A",
-                 highlightbackground="#222", highlightthickness=1)
-    f.pack_propagate(False)
-    tk.Label(f, text=text, bg="#0A0A1A", fg=fg, font=("Consolas", 10)).pack(expand=True)
-    return f
 
-def _image_widget(parent, src, w, h):
+# === Obrazy / placeholdery ===
+def _decode_image(path: str, w: int, h: int):
+    """Wątek roboczy: miniatura z trwałego cache albo otwarcie/pobranie + skalowanie (bez Tk)."""
+    if os.path.exists(path):
+        thumb = load_thumbnail(path, w, h)
+        if thumb is not None:
+            return thumb
+        with Image.open(path) as img:
+            thumb = make_thumbnail(img, w, h)
+        save_thumbnail(path, thumb, w, h)
+        return thumb
+    if path.startswith(("http://", "https://")) and HAS_REQUESTS:
+        r = requests.get(path, timeout=5)
+        r.raise_for_status()
+        return make_thumbnail(Image.open(BytesIO(r.content)), w, h)
+    raise FileNotFoundError(path)
+
+def _request_photo(widget, src, w, h, on_ready):
+    """
+    on_ready(PhotoImage | None, (tekst_placeholdera, kolor) | None).
+    Z cache – od razu; w przeciwnym razie obraz liczy się w tle i wraca przez pętlę Tk.
+    """
     if not HAS_PIL:
-        return _placeholder_widget(parent, w, h)
+        return on_ready(None, ("NO IMAGE", "#00FFFF"))
 
     path = (src or "").strip()
 
     if not path:
-        return _placeholder_widget(parent, w, h)
+        return on_ready(None, ("NO IMAGE", "#00FFFF"))
 
     if not path.startswith(("http://", "https://")) and not os.path.exists(path):
-        return _placeholder_widget(parent, w, h, text="NO IMAGE")
-
-    def _build_photo(img):
-        img = img.convert("RGB")
-        img.thumbnail((w, h), Image.LANCZOS)
-        bg = Image.new("RGB", (w, h), "#0A0A1A")
-        x = (w - img.width) // 2
-        y = (h - img.height) // 2
-        bg.paste(img, (x, y))
-        return ImageTk.PhotoImage(bg)
+        return on_ready(None, ("NO IMAGE", "#00FFFF"))
 
     key = f"{path}|{w}x{h}"
 
-    if key in _IMAGE_CACHE and _IMAGE_CACHE[key] is not None:
-        ph = _IMAGE_CACHE[key]
-        lbl = tk.Label(parent, image=ph, bg="#111122")
-        if not hasattr(parent, "_img_refs"):
-            parent._img_refs = []
-        parent._img_refs.append(ph)
-        return lbl
+    ph = _IMAGE_CACHE.get(key)
+    if ph is not None:
+        return on_ready(ph, None)
+
+    if _IMAGE_CACHE.is_failed(key):
+        return on_ready(None, ("BAD IMAGE", "#FF5577"))
+
+    def to_photo(img):
+        ph = ImageTk.PhotoImage(img)
+        _IMAGE_CACHE.put(key, ph, w, h)
+        return ph
+
+    def done(ph, error):
+        if error is None:
+            return on_ready(ph, None)
+
+        _IMAGE_CACHE.mark_failed(key)
+        if isinstance(error, UnidentifiedImageError):
+            print(f"[IMG BAD FORMAT] {path} -> {error}")
+            return on_ready(None, ("BAD IMAGE", "#FF5577"))
+        if isinstance(error, FileNotFoundError):
+            return on_ready(None, ("NO IMAGE", "#00FFFF"))
+        print(f"[IMG ERROR] {path} -> {error}")
+        return on_ready(None, ("IMG ERROR", "#FF5577"))
+
+    _IMAGE_LOADER.submit(widget, key, lambda: _decode_image(path, w, h), done, finalize=to_photo)
+
+def _show_image(label: tk.Label, src, w, h):
+    """Placeholder od razu, właściwy obraz – gdy wątek roboczy skończy (karty wielokrotnego użytku)."""
+    token = object()
+    label._img_token = token
+    label.config(image="", text="LOADING", fg="#555577")
+    label.image = None
+
+    def apply(ph, placeholder):
+        if getattr(label, "_img_token", None) is not token or not label.winfo_exists():
+            return  # karta dostała już inną grę
+        if ph is None:
+            text, fg = placeholder
+            label.config(image="", text=text, fg=fg)
+        else:
+            label.config(image=ph, text="")
+        label.image = ph  # referencja, inaczej Tk zgubi obraz
 
-    if key in _IMAGE_CACHE and _IMAGE_CACHE[key] is None:
-        return _placeholder_widget(parent, w, h, text="BAD IMAGE", fg="#FF5577")
+    _request_photo(label, src, w, h, apply)
 
-    try:
-        if not path:
-            _IMAGE_CACHE[key] = None
-            return _placeholder_widget(parent, w, h)
-
-        if os.path.exists(path):
-            img = Image.open(path)
-            ph = _build_photo(img)
-        elif path.startswith(("http://", "https://")) and HAS_REQUESTS:
-            r = requests.get(path, timeout=5)
-            r.raise_for_status()
-            img = Image.open(BytesIO(r.content))
-            ph = _build_photo(img)
-        else:
-            _IMAGE_CACHE[key] = None
-            return _placeholder_widget(parent, w, h)
-
-        _IMAGE_CACHE[key] = ph
-        if not hasattr(parent, "_img_refs"):
-            parent._img_refs = []
-        parent._img_refs.append(ph)
-        return tk.Label(parent, image=ph, bg="#111122")
-
-    except UnidentifiedImageError as e:
-        _IMAGE_CACHE[key] = None
-        if key not in _BAD_ONCE:
-            print(f"[IMG BAD FORMAT] {path} -> {e}")
-            _BAD_ONCE.add(key)
-        return _placeholder_widget(parent, w, h, text="BAD IMAGE", fg="#FF5577")
-    except Exception as e:
-        _IMAGE_CACHE[key] = None
-        if key not in _BAD_ONCE:
-            print(f"[IMG ERROR] {path} -> {e}")
-            _BAD_ONCE.add(key)
-        return _placeholder_widget(parent, w, h, text="IMG ERROR", fg="#FF5577")
+def _image_widget(parent, src, w, h):
+    holder = tk.Frame(parent, width=w, height=h, bg="#0A0A1A",
+                      highlightbackground="#222", highlightthickness=1)
+    holder.pack_propagate(False)
+    label = tk.Label(holder, bg="#0A0A1A", font=("Consolas", 10))
+    label.pack(expand=True, fill="both")
+    _show_image(label, src, w, h)
+    return holder
 
 # === Scrollowalna siatka ===
 class ScrollGrid(tk.Frame):
@@ -355,9 +321,6 @@ class ScrollGrid(tk.Frame):
         super().__init__(parent, bg=COLOR_BG, **kwargs)
         self.canvas = tk.Canvas(self, bg=COLOR_BG, highlightthickness=0)
         self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
-        self.inner = tk.Frame(self.canvas, bg=COLOR_BG)
-
-        self.inner_id = self.canvas.create_window((0, 0), window=self.inner, anchor="nw")
         self.canvas.configure(yscrollcommand=self.vsb.set)
 
         self.canvas.pack(side="left", fill="both", expand=True)
@@ -365,12 +328,18 @@ class ScrollGrid(tk.Frame):
         self._vsb_shown = True
         self._scroll_enabled = False
 
-        self.inner.bind("<Configure>", self._on_layout_change)
-        self.canvas.bind("<Configure>", self._on_layout_change)
+        self._build_content()
 
         self.canvas.bind("<Enter>", self._bind_mousewheel)
         self.canvas.bind("<Leave>", self._unbind_mousewheel)
 
+    def _build_content(self):
+        self.inner = tk.Frame(self.canvas, bg=COLOR_BG)
+        self.inner_id = self.canvas.create_window((0, 0), window=self.inner, anchor="nw")
+
+        self.inner.bind("<Configure>", self._on_layout_change)
+        self.canvas.bind("<Configure>", self._on_layout_change)
+
     def _bind_mousewheel(self, _e=None):
         try:
             self.canvas.focus_set()
@@ -410,31 +379,32 @@ class ScrollGrid(tk.Frame):
 
         return "break"
 
+    def _update_scrollbar(self, content_h: int):
+        viewport_h = self.canvas.winfo_height()
+        need_scroll = content_h > max(1, viewport_h)
+
+        if need_scroll and not self._vsb_shown:
+            self.vsb.pack(side="right", fill="y")
+            self._vsb_shown = True
+        elif not need_scroll and self._vsb_shown:
+            self.vsb.forget()
+            self._vsb_shown = False
+            self.canvas.yview_moveto(0.0)
+
+        self._scroll_enabled = bool(need_scroll)
+
+        top, bottom = self.canvas.yview()
+        if top < 0.0:
+            self.canvas.yview_moveto(0.0)
+        elif bottom > 1.0:
+            self.canvas.yview_moveto(1.0)
+
     def _on_layout_change(self, _e=None):
         try:
             self.canvas.itemconfigure(self.inner_id, width=self.canvas.winfo_width())
             self.canvas.update_idletasks()
             self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
-            content_h = self.inner.winfo_reqheight()
-            viewport_h = self.canvas.winfo_height()
-            need_scroll = content_h > max(1, viewport_h)
-
-            if need_scroll and not self._vsb_shown:
-                self.vsb.pack(side="right", fill="y")
-                self._vsb_shown = True
-            elif not need_scroll and self._vsb_shown:
-                self.vsb.forget()
-                self._vsb_shown = False
-                self.canvas.yview_moveto(0.0)
-
-            self._scroll_enabled = bool(need_scroll)
-
-            top, bottom = self.canvas.yview()
-            if top < 0.0:
-                self.canvas.yview_moveto(0.0)
-            elif bottom > 1.0:
-                self.canvas.yview_moveto(1.0)
+            self._update_scrollbar(self.inner.winfo_reqheight())
         except Exception:
             pass
 
@@ -445,191 +415,306 @@ def _compute_columns(container_width: int) -> int:
     cols = max(1, container_width // col_unit)
     return min(cols, MAX_COLUMNS)
 
-def render_grid(container: tk.Frame, games: list[dict]):
-    def _add_rating_label(card: tk.Frame, row: dict, gid: int):
-        try:
+
+class _GridCard:
+    """Karta gry wielokrotnego użytku – widgety powstają raz, bind() podmienia tylko dane."""
+
+    def __init__(self, grid: "VirtualCardGrid", library_mode: bool):
+        self.grid = grid
+        self.library_mode = library_mode
+        self.gid = 0
+        self._status_after = None
+
+        self.frame = tk.Frame(grid.canvas, bg="#111122",
+                              highlightbackground="#00FFFF", highlightthickness=1,
+                              width=CARD_W, height=grid.card_h)
+        self.frame.pack_propagate(False)
+
+        holder = tk.Frame(self.frame, width=IMG_W, height=IMG_H, bg="#0A0A1A",
+                          highlightbackground="#222", highlightthickness=1)
+        holder.pack_propagate(False)
+        holder.pack(pady=(8, 6))
+        self.image = tk.Label(holder, bg="#0A0A1A", font=("Consolas", 10))
+        self.image.pack(expand=True, fill="both")
+
+        self.title = tk.Label(self.frame, fg="#00FFFF", bg="#111122",
+                              font=("Consolas", 11, "bold"), wraplength=CARD_W-16,
+                              justify="center")
+        self.title.pack(padx=8)
+        self.price = tk.Label(self.frame, fg="#E5008A", bg="#111122", font=("Consolas", 11))
+        self.price.pack(pady=(2, 0))
+        self.genres = tk.Label(self.frame, fg="#CCCCCC", bg="#111122",
+                               font=("Consolas", 9), wraplength=CARD_W-16,
+                               justify="center")
+        self.genres.pack(padx=8, pady=(2, 0))
+        self.release = tk.Label(self.frame, fg="#AAAAAA", bg="#111122", font=("Consolas", 9))
+        self.release.pack(pady=(2, 8))
+
+        # ---------- PRZYCISK „KUP” ----------
+        self.buy_btn = tk.Button(
+            self.frame, text="Kup", bg="#22223A", fg="#00FFFF",
+            activebackground="#1a1a2b", activeforeground="#00FFFF",
+            font=("Consolas", 11, "bold"), relief="flat", padx=12, pady=6, cursor="hand2",
+            command=self._do_buy
+        )
+        self.buy_btn.pack(pady=(0, 12))
+
+        self.rating = tk.Label(self.frame, fg="#A0AEC0", bg="#111122", font=("Consolas", 9))
+        self.rating.pack(pady=(6, 0))
+
+        if library_mode:
+            self.my_rating = tk.Label(self.frame, fg="#94a3b8", bg="#111122", font=("Consolas", 9))
+            self.my_rating.pack(pady=(2, 0))
+            ttk.Button(self.frame, text="Oceń", command=self._open_rating).pack(pady=(6, 0))
+
+        self.status = tk.Label(self.frame, text="", bg="#111122", font=("Consolas", 9))
+        self.status.pack()
+
+        self.item = grid.canvas.create_window(0, 0, window=self.frame, anchor="nw", state="hidden")
+        grid._bind_wheel_recursive(self.frame)
+
+    def bind(self, row: dict):
+        grid = self.grid
+        self.row = row
+        self.gid = int(row.get("id_game") or 0)
+
+        _show_image(self.image, row.get("image_url"), IMG_W, IMG_H)
+
+        price = row.get("price")
+        rel = row.get("release_date")
+        self.title.config(text=row.get("name") or "—")
+        self.price.config(text=(f"{price:.2f} zł" if price is not None else "—"))
+        self.genres.config(text=row.get("genres") or "—")
+        self.release.config(text=f"Premiera: {rel.strftime('%Y-%m-%d') if rel else '—'}")
+
+        if "rating_count" in row:
             avg = row.get("avg_rating")
             cnt = int(row.get("rating_count") or 0)
-            if avg is None or cnt == 0:
-                avg, cnt = fetch_game_rating_summary(gid)
-        except Exception:
-            avg, cnt = (None, 0)
+        else:
+            avg, cnt = grid.rating_summaries.get(self.gid, (None, 0))
+        self.rating.config(text=("Brak ocen" if not cnt else f"Ocena: {avg}/10  ({cnt})"))
 
-        text = "Brak ocen" if not cnt else f"Ocena: {avg}/10  ({cnt})"
-        tk.Label(card, text=text, fg="#A0AEC0", bg=card["bg"], font=("Consolas", 9)).pack(pady=(6, 0))
+        if self.library_mode:
+            my = grid.my_ratings.get(self.gid)
+            self.my_rating.config(text=(f"Moja ocena: {my}/10" if my else "Nie oceniono"))
 
-    def _add_rate_button_if_library(card: tk.Frame, container: tk.Frame, login: str, gid: int, title: str):
-       
-        if callable(getattr(container, "purchase_game", None)):
-            return
+        if self.gid and self.gid in grid.owned_ids:
+            self._set_owned()
+        else:
+            self.buy_btn.config(text="Kup", state="normal", fg="#00FFFF", bg="#22223A", cursor="hand2")
 
-        try:
-            my = fetch_user_game_rating(login, gid) if login and gid else None
-        except Exception:
-            my = None
-
-        tk.Label(
-            card,
-            text=(f"Moja ocena: {my}/10" if my else "Nie oceniono"),
-            fg="#94a3b8",
-            bg=card["bg"],
-            font=("Consolas", 9),
-        ).pack(pady=(2, 0))
-
-        # callback do odświeżenia biblioteki po zapisie
-        on_saved = getattr(container, "on_rating_saved", None)
-
-        ttk.Button(
-            card,
-            text="Oceń",
-            command=lambda: open_rating_dialog(
-                container,
-                login,
-                gid,
-                title,
-                on_saved=on_saved,
-            ),
-        ).pack(pady=(6, 0))
-    
-    for w in container.winfo_children():
-        w.destroy()
-
-    if not games:
-        tk.Label(container, text="Brak gier w bazie.", fg="#888888", bg=COLOR_BG,
-                 font=("Consolas", 14)).pack(pady=40)
-        return
-
-    # --- kontekst sklepu przekazany przez parenta ---
-    login = getattr(container, "login", None)
-    owned_ids = set(getattr(container, "owned_ids", set()))
-    purchase_game = getattr(container, "purchase_game", None)  # callable(login, id_game)->(ok,msg,new_balance)
-    on_balance_change = getattr(container, "on_balance_change", None)
-    on_purchase_success = getattr(container, "on_purchase_success", None)
-
-    container._img_refs = []
-    container._last_cols = None
-    container._last_offset = None
-    container._rows_count = 0
-
-    def adjust_offset():
-        width = max(container.winfo_width(), 1)
-        cols = container._last_cols or 1
-        total_width = cols * CARD_W + (cols - 1) * GRID_PAD_X
-        offset_x = max(0, (width - total_width) // 2)
-
-        if container._last_offset == offset_x:
+        self._show_status("", None)
+
+    def _set_owned(self):
+        self.buy_btn.config(text="Posiadane", state="disabled", fg="#AAAAAA", bg="#1a1a1a", cursor="arrow")
+
+    def _show_status(self, text: str, fg, ms: int = 2500):
+        if self._status_after is not None:
+            try:
+                self.status.after_cancel(self._status_after)
+            except Exception:
+                pass
+            self._status_after = None
+        self.status.config(text=text, fg=fg or "#111122")
+        if text:
+            self._status_after = self.status.after(ms, lambda: self._show_status("", None))
+
+    def _do_buy(self):
+        grid = self.grid
+        purchase_game = grid.purchase_game
+        g = self.gid
+        if not (callable(purchase_game) and grid.login and g):
+            self._show_status("Brak akcji zakupu (purchase_game).", "#FF5577", ms=3000)
             return
-        container._last_offset = offset_x
 
-        for r in range(container._rows_count):
-            first_col_widgets = container.grid_slaves(row=r, column=0)
-            if not first_col_widgets:
-                continue
-            w0 = first_col_widgets[0]
-            if (container._last_cols or 1) == 1:
-                w0.grid_configure(padx=(offset_x, offset_x))
-            else:
-                w0.grid_configure(padx=(offset_x, GRID_PAD_X // 2))
+        ok, msg, new_balance = purchase_game(grid.login, g)
+        self._show_status(msg, "#7CFC00" if ok else "#FF5577")
+        if ok:
+            grid.owned_ids.add(g)
+            self._set_owned()
+            if callable(grid.on_balance_change):
+                try: grid.on_balance_change(new_balance)
+                except Exception: pass
+            if callable(grid.on_purchase_success):
+                try: grid.on_purchase_success()
+                except Exception: pass
+
+    def _open_rating(self):
+        grid = self.grid
+        open_rating_dialog(
+            grid,
+            grid.login,
+            self.gid,
+            self.row.get("name") or "—",
+            on_saved=grid.on_rating_saved,
+        )
 
-    def rebuild(cols: int):
-        for w in container.winfo_children():
-            w.destroy()
 
-        for idx, row in enumerate(games):
-            r, c = divmod(idx, cols)
-            card = tk.Frame(container, bg="#111122",
-                            highlightbackground="#00FFFF", highlightthickness=1,
-                            width=CARD_W)
-            padx = (GRID_PAD_X // 2, GRID_PAD_X // 2)
-            if c == cols - 1 and cols > 1:
-                padx = (GRID_PAD_X // 2, GRID_PAD_X // 2)
+class VirtualCardGrid(ScrollGrid):
+    """
+    Siatka kart tworząca widgety tylko dla wierszy w (i tuż obok) widoku.
+    Karty są umieszczane na Canvasie jako okna i przy przewijaniu podpinane do innych gier,
+    więc liczba widgetów nie zależy od wielkości katalogu.
+    """
 
-            is_last_row = (r == (len(games) + cols - 1) // cols - 1)
-            pad_y = (GRID_PAD_Y, GRID_PAD_Y if not is_last_row else GRID_PAD_Y // 2)
+    OVERSCAN_ROWS = 1
 
-            card.grid(row=r, column=c, padx=padx, pady=pad_y, sticky="n")
-            card.grid_propagate(False)
+    def __init__(self, parent, **kwargs):
+        # kontekst sklepu/biblioteki ustawiany przez widok
+        self.login = None
+        self.owned_ids = set()
+        self.purchase_game = None       # callable(login, id_game)->(ok,msg,new_balance)
+        self.on_balance_change = None
+        self.on_purchase_success = None
+        self.on_rating_saved = None
+        self.rating_summaries = {}
+        self.my_ratings = {}
+        self.on_near_end = None         # callable() – dociągnięcie kolejnej strony katalogu
+
+        self.items: list[dict] = []
+        self.card_h = CARD_H
+        self._cols = 1
+        self._offset_x = 0
+        self._active: dict[int, _GridCard] = {}
+        self._free: list[_GridCard] = []
+        self._library_mode = None
+        self._refresh_pending = False
+        super().__init__(parent, **kwargs)
+
+    def _build_content(self):
+        self.canvas.configure(yscrollincrement=40, yscrollcommand=self._on_yscroll)
+        self._empty_id = self.canvas.create_text(
+            0, 40, text="Brak gier w bazie.", fill="#888888",
+            font=("Consolas", 14), anchor="n", state="hidden"
+        )
+        self.canvas.bind("<Configure>", self._on_layout_change)
 
-            _image_widget(card, row.get("image_url"), IMG_W, IMG_H).pack(pady=(8, 6))
+    def _bind_wheel_recursive(self, widget):
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(seq, self._on_mousewheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel_recursive(child)
+
+    def _on_yscroll(self, first, last):
+        self.vsb.set(first, last)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh_visible)
+
+    @property
+    def _row_h(self) -> int:
+        return self.card_h + GRID_PAD_Y
+
+    def _content_height(self) -> int:
+        rows = (len(self.items) + self._cols - 1) // self._cols
+        return GRID_PAD_Y + rows * self._row_h
+
+    def set_items(self, items: list[dict]):
+        library_mode = not callable(self.purchase_game)
+        if library_mode != self._library_mode:
+            # inny układ karty – stare widgety nie pasują
+            for card in list(self._active.values()) + self._free:
+                self.canvas.delete(card.item)
+                card.frame.destroy()
+            self._active.clear()
+            self._free.clear()
+            self._library_mode = library_mode
+            self.card_h = CARD_H_LIBRARY if library_mode else CARD_H
+
+        self.items = list(items)
+        self._release_all()
+        self.canvas.yview_moveto(0.0)
+        self._on_layout_change()
+
+    def append_items(self, items: list[dict]):
+        """Dopisuje kolejną stronę bez przewijania i bez ruszania widocznych kart."""
+        if not items:
+            return
+        self.items.extend(items)
+        self._on_layout_change()
 
-            title = row.get("name") or "—"
-            price = row.get("price")
-            genres = row.get("genres") or "—"
-            rel = row.get("release_date")
-            rel_txt = rel.strftime("%Y-%m-%d") if rel else "—"
-            gid = int(row.get("id_game") or 0)
+    def _release_all(self):
+        for card in self._active.values():
+            self.canvas.itemconfigure(card.item, state="hidden")
+            self._free.append(card)
+        self._active.clear()
 
-            tk.Label(card, text=title, fg="#00FFFF", bg="#111122",
-                     font=("Consolas", 11, "bold"), wraplength=CARD_W-16,
-                     justify="center").pack(padx=8)
-            tk.Label(card, text=(f"{price:.2f} zł" if price is not None else "—"),
-                     fg="#E5008A", bg="#111122", font=("Consolas", 11)).pack(pady=(2, 0))
-            tk.Label(card, text=genres, fg="#CCCCCC", bg="#111122",
-                     font=("Consolas", 9), wraplength=CARD_W-16,
-                     justify="center").pack(padx=8, pady=(2, 0))
-            tk.Label(card, text=f"Premiera: {rel_txt}", fg="#AAAAAA",
-                     bg="#111122", font=("Consolas", 9)).pack(pady=(2, 8))
-
-            # ---------- PRZYCISK „KUP” ----------
-            btn = tk.Button(
-                card, text="Kup", bg="#22223A", fg="#00FFFF",
-                activebackground="#1a1a2b", activeforeground="#00FFFF",
-                font=("Consolas", 11, "bold"), relief="flat", padx=12, pady=6, cursor="hand2"
-            )
-            btn.pack(pady=(0, 12))
+    def _on_layout_change(self, _e=None):
+        try:
+            width = max(self.canvas.winfo_width(), 1)
+            cols = _compute_columns(width)
+            total_width = cols * CARD_W + (cols - 1) * GRID_PAD_X
+            offset_x = max(0, (width - total_width) // 2)
+            if cols != self._cols or offset_x != self._offset_x:
+                self._cols, self._offset_x = cols, offset_x
+                self._release_all()
+
+            content_h = self._content_height()
+            self.canvas.configure(scrollregion=(0, 0, width, content_h))
+            self.canvas.coords(self._empty_id, width // 2, 40)
+            self.canvas.itemconfigure(self._empty_id, state=("hidden" if self.items else "normal"))
+            self._update_scrollbar(content_h)
+            self._schedule_refresh()
+        except Exception:
+            pass
 
-            _add_rating_label(card, row, gid)
-            _add_rate_button_if_library(card, container, login, gid, title)
+    def _refresh_visible(self):
+        self._refresh_pending = False
+        if not self.winfo_exists():
+            return
+        n = len(self.items)
+        cols = self._cols
+        row_h = self._row_h
+
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), 1)
+        first_row = max(0, int(top // row_h) - self.OVERSCAN_ROWS)
+        last_row = int(bottom // row_h) + self.OVERSCAN_ROWS
+        wanted = range(first_row * cols, min(n, (last_row + 1) * cols))
+
+        for idx in [i for i in self._active if i not in wanted]:
+            card = self._active.pop(idx)
+            self.canvas.itemconfigure(card.item, state="hidden")
+            self._free.append(card)
+
+        for idx in wanted:
+            if idx in self._active:
+                continue
+            card = self._free.pop() if self._free else _GridCard(self, self._library_mode)
+            card.bind(self.items[idx])
+            r, c = divmod(idx, cols)
+            x = self._offset_x + c * (CARD_W + GRID_PAD_X)
+            y = GRID_PAD_Y + r * row_h
+            self.canvas.coords(card.item, x, y)
+            self.canvas.itemconfigure(card.item, state="normal")
+            self._active[idx] = card
 
-            def set_owned(b=btn):
-                b.config(text="Posiadane", state="disabled", fg="#AAAAAA", bg="#1a1a1a", cursor="arrow")
+        # blisko końca listy – poproś o kolejną stronę (jeśli widok stronicuje)
+        if callable(self.on_near_end) and (last_row + self.OVERSCAN_ROWS + 1) * cols >= n:
+            self.on_near_end()
 
-            if gid and gid in owned_ids:
-                set_owned()
-            else:
-                def do_buy(g=gid, card_ref=card, b=btn):
-                    if not (callable(purchase_game) and login and g):
-                        info = tk.Label(card_ref, text="Brak akcji zakupu (purchase_game).",
-                                        bg="#111122", fg="#FF5577", font=("Consolas", 9))
-                        info.pack()
-                        info.after(3000, info.destroy)
-                        return
-
-                    ok, msg, new_balance = purchase_game(login, g)
-                    status = tk.Label(card_ref, text=msg, bg="#111122",
-                                      fg=("#7CFC00" if ok else "#FF5577"),
-                                      font=("Consolas", 9))
-                    status.pack()
-                    status.after(2500, status.destroy)
-                    if ok:
-                        owned_ids.add(g)
-                        set_owned(b)
-                        if callable(on_balance_change):
-                            try: on_balance_change(new_balance)
-                            except Exception: pass
-                        if callable(on_purchase_success):
-                            try: on_purchase_success()
-                            except Exception: pass
 
-                btn.config(command=do_buy)
-            # -----------------------------------
-
-        container._rows_count = (len(games) + cols - 1) // cols
-        container.update_idletasks()
-        adjust_offset()
-
-    def do_layout(_e=None):
-        width = max(container.winfo_width(), 1)
-        cols = _compute_columns(width)
-        if container._last_cols != cols:
-            container._last_cols = cols
-            container._last_offset = None
-            rebuild(cols)
-        else:
-            adjust_offset()
+def render_grid(container: "VirtualCardGrid", games: list[dict]):
+    login = container.login
+    purchase_game = container.purchase_game
+
+    # --- oceny: hurtowo, zanim powstaną karty (zamiast 1–2 zapytań na kartę) ---
+    missing = [int(g.get("id_game") or 0) for g in games if "rating_count" not in g]
+    try:
+        container.rating_summaries = fetch_rating_summaries(missing) if missing else {}
+    except Exception:
+        container.rating_summaries = {}
+    container.my_ratings = {}
+    if login and not callable(purchase_game):
+        try:
+            container.my_ratings = fetch_user_ratings(login)
+        except Exception:
+            container.my_ratings = {}
 
-    container.after(50, do_layout)
-    container.bind("<Configure>", do_layout)
+    container.set_items(games or [])
 
 
 # === Widoki ===
@@ -643,9 +728,15 @@ def build_shop_view(parent: tk.Frame, login: str, on_balance_change, on_purchase
     dbg.pack(anchor="w", padx=8, pady=(4, 2))
 
     # --- dane do widoku
-    games_all = fetch_games_for_shop()          # pełna lista gier z bazy
+    total_games = count_games()
+    if total_games <= SHOP_INDEX_MAX_GAMES:
+        games_all = fetch_games_for_shop_with_ratings()  # pełna lista gier z bazy (z ocenami)
+        catalog = CatalogIndex(games_all)                # indeks gatunków / cen / dat do filtrów
+    else:
+        games_all = []                                   # duży katalog – strony dociągane przy przewijaniu
+        catalog = None
     owned_ids = fetch_owned_game_ids(login)     # posiadane
-    dbg.config(text=f"Wczytano gier: {len(games_all)} | Posiadane: {len(owned_ids)}")
+    dbg.config(text=f"Wczytano gier: {len(games_all) if catalog else total_games} | Posiadane: {len(owned_ids)}")
 
    
     filters = tk.Frame(frame, bg=COLOR_BG, highlightbackground="#00FFFF", highlightthickness=1)
@@ -812,13 +903,13 @@ def build_shop_view(parent: tk.Frame, login: str, on_balance_change, on_purchase
     refresh_btn.pack(side=tk.LEFT, padx=10)
 
    
-    grid = ScrollGrid(frame)
+    grid = VirtualCardGrid(frame)
     grid.pack(fill="both", expand=True)
-    grid.inner.login = login
-    grid.inner.owned_ids = set(owned_ids)               # startowa lista posiadanych
-    grid.inner.purchase_game = purchase_game            # Twoja funkcja z pliku
-    grid.inner.on_balance_change = on_balance_change    # callback do odświeżenia salda
-    grid.inner.on_purchase_success = on_purchase_success  # np. odśwież bibliotekę
+    grid.login = login
+    grid.owned_ids = set(owned_ids)               # startowa lista posiadanych
+    grid.purchase_game = purchase_game            # Twoja funkcja z pliku
+    grid.on_balance_change = on_balance_change    # callback do odświeżenia salda
+    grid.on_purchase_success = on_purchase_success  # np. odśwież bibliotekę
     def parse_date(s: str):
         s = (s or "").strip()
         if not s:
@@ -844,13 +935,9 @@ def build_shop_view(parent: tk.Frame, login: str, on_balance_change, on_purchase
             return "ERR"
 
     def apply_filters_and_render():
-        # start od pełnej listy
-        filtered = list(games_all)
-
         # gatunek
         gsel = (genre_var.get() or "").strip()
-        if gsel and gsel != "(wszystkie)":
-            filtered = [g for g in filtered if g.get("genres") and gsel in g["genres"].split(", ")]
+        genre = gsel if gsel and gsel != "(wszystkie)" else None
 
         # data od/do
         df = parse_date(date_from_var.get())
@@ -861,22 +948,83 @@ def build_shop_view(parent: tk.Frame, login: str, on_balance_change, on_purchase
 
         if df == "ERR" or dt == "ERR":
             # błędny format – nic nie filtruj po dacie
-            pass
-        else:
-            if df:
-                filtered = [g for g in filtered if (g.get("release_date") and g["release_date"] >= df)]
-            if dt:
-                filtered = [g for g in filtered if (g.get("release_date") and g["release_date"] <= dt)]
+            df = dt = None
 
         # cena max
         pmax = parse_price(price_max_var.get())
         price_entry.config(highlightbackground=("#00FFFF" if pmax not in ("ERR",) else "#FF5577"))
-        if pmax not in (None, "ERR"):
-            filtered = [g for g in filtered if (g.get("price") is not None and float(g["price"]) <= pmax)]
+        if pmax == "ERR":
+            pmax = None
+
+        if catalog is None:
+            start_paging(genre=genre, date_from=df, date_to=dt, price_max=pmax)
+            return
+
+        filtered = catalog.query(genre=genre, date_from=df, date_to=dt, price_max=pmax)
 
-        render_grid(grid.inner, filtered)
+        render_grid(grid, filtered)
         dbg.config(text=f"Wczytano gier: {len(games_all)} | Posiadane: {len(owned_ids)} | Po filtrach: {len(filtered)}")
 
+    # --- tryb stronicowany (duży katalog): kursor keyset + dociąganie przy przewijaniu ---
+    # strony pobiera pula wątków (ui_scheduler); naraz w drodze jest najwyżej jedna, a nowe
+    # filtry anulują stronę zamówioną dla starych
+    paging = {"filters": {}, "cursor": None, "done": True, "loaded": 0, "loading": False, "token": None}
+
+    def request_page(first: bool):
+        filters, cursor = paging["filters"], paging["cursor"]
+        paging["loading"] = True
+        paging["token"] = token = CancelToken()
+        run_in_background(
+            grid, lambda: fetch_games_page(**filters, cursor=cursor, limit=SHOP_PAGE_SIZE),
+            lambda result: page_loaded(result, first), token=token,
+            on_error=lambda e: page_failed(e, first),
+        )
+
+    def page_failed(e, first: bool):
+        print(f"[SHOP] Błąd pobierania strony katalogu: {e}")
+        page_loaded(([], None), first)
+
+    def page_loaded(result, first: bool):
+        rows, cursor = result
+        paging.update(cursor=cursor, done=cursor is None, loading=False)
+        paging["loaded"] += len(rows)
+        more = "" if paging["done"] else " (kolejne przy przewijaniu)"
+        dbg.config(text=f"Gier w bazie: {total_games} | Posiadane: {len(owned_ids)} | "
+                        f"Po filtrach: {paging['loaded']}{more}")
+        if first:
+            render_grid(grid, rows)
+        else:
+            grid.append_items(rows)
+
+    def start_paging(**filters):
+        if paging["token"] is not None:
+            paging["token"].cancel()
+        paging.update(filters=filters, cursor=None, done=False, loaded=0)
+        request_page(first=True)
+
+    def load_next_page():
+        if paging["done"] or paging["loading"]:
+            return
+        request_page(first=False)
+
+    if catalog is None:
+        grid.on_near_end = load_next_page
+
+    # filtrowanie „na żywo” – z krótkim opóźnieniem, żeby seria klawiszy dała jedno odświeżenie
+    pending_filter = {"id": None}
+
+    def schedule_filters(*_):
+        if pending_filter["id"] is not None:
+            frame.after_cancel(pending_filter["id"])
+        pending_filter["id"] = frame.after(FILTER_DEBOUNCE_MS, run_scheduled_filters)
+
+    def run_scheduled_filters():
+        pending_filter["id"] = None
+        apply_filters_and_render()
+
+    for var in (genre_var, date_from_var, date_to_var, price_max_var):
+        var.trace_add("write", schedule_filters)
+
     def clear_filters():
         genre_var.set("(wszystkie)")
         date_from_var.set("")
@@ -885,7 +1033,13 @@ def build_shop_view(parent: tk.Frame, login: str, on_balance_change, on_purchase
         date_from_entry.config(highlightbackground="#00FFFF")
         date_to_entry.config(highlightbackground="#00FFFF")
         price_entry.config(highlightbackground="#00FFFF")
-        render_grid(grid.inner, games_all)
+        if pending_filter["id"] is not None:
+            frame.after_cancel(pending_filter["id"])  # zmiany pól powyżej – siatkę odświeżamy tutaj
+            pending_filter["id"] = None
+        if catalog is None:
+            start_paging()
+            return
+        render_grid(grid, games_all)
         dbg.config(text=f"Wczytano gier: {len(games_all)} | Posiadane: {len(owned_ids)} | Po filtrach: {len(games_all)}")
 
     # przyciski
@@ -900,7 +1054,10 @@ def build_shop_view(parent: tk.Frame, login: str, on_balance_change, on_purchase
 
     # pierwsze renderowanie: polecane + pełna siatka
     render_recommendations(randomize=False)
-    render_grid(grid.inner, games_all)
+    if catalog is None:
+        start_paging()
+    else:
+        render_grid(grid, games_all)
 
     return frame
 
@@ -924,7 +1081,7 @@ def build_library_view(parent: tk.Frame, login: str) -> tk.Frame:
     info = tk.Label(header, text="Wczytywanie…", bg=COLOR_BG, fg="#888")
     info.pack(side=tk.LEFT, padx=10, pady=(8, 6))
 
-    grid = ScrollGrid(frame)
+    grid = VirtualCardGrid(frame)
     grid.pack(fill="both", expand=True)
 
     def _refresh():
@@ -932,10 +1089,10 @@ def build_library_view(parent: tk.Frame, login: str) -> tk.Frame:
         games = fetch_library_for_user(login)
         info.config(text=f"Łącznie pozycji: {len(games)}")
 
-        grid.inner.login = login
-        grid.inner.on_rating_saved = frame.refresh
+        grid.login = login
+        grid.on_rating_saved = frame.refresh
 
-        render_grid(grid.inner, games)
+        render_grid(grid, games)
 
     frame.refresh = _refresh
 
@@ -984,6 +1141,7 @@ def open_rating_dialog(parent, login: str, game_id: int, game_name: str, on_save
 
             # zapis do bazy
             upsert_rating(login, game_id, val)
+            _record_interaction(login, game_id, rating=val)
 
             messagebox.showinfo("Zapisano", f"Twoja ocena: {val}/10")
 
@@ -0,0 +1,250 @@
+# steamcharts.py – pobieranie statystyk ze SteamCharts: wspólna sesja HTTP, limit zapytań,
+# ponawianie z backoffem i równoległe odświeżanie wielu gier z możliwością przerwania
+
+import queue
+import random
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from html_extract import extract
+from http_cache import HttpCache
+
+STEAMCHARTS_URL = "https://steamcharts.com/app/{appid}"
+CHART_DATA_URL = "https://steamcharts.com/app/{appid}/chart-data.json"
+STATS_TTL = 5 * 60        # strona gry (liczby graczy) – krótko świeża
+CHART_DATA_TTL = 60 * 60  # historia do wykresu zmienia się wolniej
+REFRESH_WORKERS = 8          # ile gier pobieramy równolegle
+HOST_RATE_PER_SEC = 8.0      # maks. zapytań na sekundę do jednego hosta
+HOST_BURST = 8               # ile zapytań może pójść "od razu" po przerwie
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5           # 0.5s, 1s, 2s... (+ losowy rozrzut)
+BACKOFF_MAX = 10.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class RefreshCancelled(Exception):
+    """Odświeżanie przerwane przez użytkownika."""
+
+
+# === Limit zapytań per host (token bucket) ===
+class HostRateLimiter:
+    def __init__(self, rate_per_sec: float = HOST_RATE_PER_SEC, burst: int = HOST_BURST):
+        self.rate = float(rate_per_sec)
+        self.burst = float(burst)
+        self._buckets: dict[str, tuple[float, float]] = {}   # host -> (tokeny, czas)
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str, cancel: Optional[threading.Event] = None) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1.0:
+                    self._buckets[host] = (tokens - 1.0, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1.0 - tokens) / self.rate
+            if cancel is not None:
+                if cancel.wait(wait):
+                    raise RefreshCancelled()
+            else:
+                time.sleep(wait)
+
+
+# === Wspólna sesja (keep-alive) ===
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_limiter = HostRateLimiter()
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=REFRESH_WORKERS)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update(DEFAULT_HEADERS)
+            _session = s
+        return _session
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def http_get(url: str, timeout: float = 10.0, headers: Optional[dict] = None,
+             cancel: Optional[threading.Event] = None,
+             retries: int = MAX_RETRIES) -> requests.Response:
+    """GET przez wspólną sesję z limitem per host; 429/5xx i błędy sieci – ponowienia z backoffem."""
+    host = urlsplit(url).netloc
+    session = get_session()
+    attempt = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise RefreshCancelled()
+        _limiter.acquire(host, cancel)
+        retry_after = None
+        try:
+            resp = session.get(url, headers=headers, timeout=timeout)
+            if resp.status_code not in RETRY_STATUS:
+                resp.raise_for_status()
+                return resp
+            retry_after = resp.headers.get("Retry-After")
+            error = requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        if attempt >= retries:
+            raise error
+        delay = _backoff_delay(attempt, retry_after)
+        attempt += 1
+        if cancel is not None:
+            if cancel.wait(delay):
+                raise RefreshCancelled()
+        else:
+            time.sleep(delay)
+
+
+# === Parsowanie strony gry ===
+def parse_steamcharts_html(html: str) -> tuple[Optional[int], Optional[int], Optional[int]]:
+    """(gracze teraz, szczyt 24h, rekord wszechczasów) z HTML strony gry – szybka ścieżka, bs4 w rezerwie."""
+    return extract("steamcharts_stats", html)
+
+
+_http_cache = HttpCache(fetch=http_get)
+
+
+def cached_get(url: str, ttl: Optional[float] = None, timeout: float = 10.0,
+               cancel: Optional[threading.Event] = None, allow_stale: bool = True):
+    """
+    GET przez dyskowy cache (http_cache) – świeży wpis bez sieci, potem zapytanie warunkowe.
+    Zapis do bazy woła z allow_stale=False: bez sieci dostaje błąd, nie stare dane jako świeże.
+    """
+    return _http_cache.get(url, ttl=ttl, timeout=timeout, cancel=cancel, allow_stale=allow_stale)
+
+
+def fetch_chart_data(appid: int, timeout: float = 10.0, allow_stale: bool = True) -> list:
+    """Pełna historia [[timestamp_ms, gracze], ...] z chart-data.json."""
+    return cached_get(CHART_DATA_URL.format(appid=appid), ttl=CHART_DATA_TTL, timeout=timeout,
+                      allow_stale=allow_stale).json()
+
+
+def fetch_steamcharts_data(appid: int, timeout: float = 10.0, cancel: Optional[threading.Event] = None,
+                           allow_stale: bool = True):
+    try:
+        resp = cached_get(STEAMCHARTS_URL.format(appid=appid), ttl=STATS_TTL, timeout=timeout,
+                          cancel=cancel, allow_stale=allow_stale)
+        return parse_steamcharts_html(resp.text)
+    except RefreshCancelled:
+        raise
+    except Exception:
+        return None, None, None
+
+
+# === Równoległe odświeżanie ===
+class SteamChartsRefresher:
+    """
+    Pobiera statystyki wielu gier w puli wątków. Postęp trafia do kolejki `events`
+    jako krotki (rodzaj, dane) – UI odbiera je w swoim wątku (poll()).
+      ("game", {"appid", "name", "current", "peak_24h", "peak_all"})
+      ("done", {"fetched", "updated", "total", "cancelled", "seconds"})
+    save_many([(appid, current, peak_24h, peak_all), ...]) -> liczba zmienionych wierszy
+    jest wołane raz, po pobraniu (także przerwanym) – jeden zapis hurtowy zamiast UPDATE na grę.
+    """
+
+    def __init__(self, save_many: Optional[Callable[[list[tuple]], int]] = None,
+                 workers: int = REFRESH_WORKERS, timeout: float = 10.0):
+        self.save_many = save_many
+        self.workers = workers
+        self.timeout = timeout
+        self.events: "queue.Queue[tuple[str, dict]]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _one(self, game: dict) -> dict:
+        appid = game["steam_appid"]
+        # stare dane z cache nie mogą trafić do bazy jako świeże – bez sieci gra jest "bez danych"
+        current, peak_24h, peak_all = fetch_steamcharts_data(appid, self.timeout, cancel=self._cancel,
+                                                             allow_stale=False)
+        info = {"appid": appid, "name": game.get("name"), "current": current,
+                "peak_24h": peak_24h, "peak_all": peak_all}
+        self.events.put(("game", info))
+        return info
+
+    def run(self, games: list[dict]) -> list[dict]:
+        """Blokujące – zwraca wyniki pobranych gier (przerwane pomija)."""
+        t0 = time.perf_counter()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="steamcharts") as pool:
+            futures = [pool.submit(self._one, g) for g in games]
+            for fut in futures:
+                try:
+                    results.append(fut.result())
+                except (RefreshCancelled, CancelledError):
+                    pass   # przerwane przez użytkownika (także zdjęte z kolejki puli) – bez komunikatu
+                except Exception as e:
+                    print(f"[STEAMCHARTS] Błąd: {e}")
+                if self._cancel.is_set():
+                    for f in futures:
+                        f.cancel()
+
+        rows = [(r["appid"], r["current"], r["peak_24h"], r["peak_all"])
+                for r in results if r["current"] is not None]
+        updated = 0
+        if rows and callable(self.save_many):
+            try:
+                updated = int(self.save_many(rows))
+            except Exception as e:
+                print(f"[STEAMCHARTS] Błąd zapisu do bazy: {e}")
+        self.events.put(("done", {
+            "fetched": len(rows),
+            "updated": updated,
+            "total": len(games),
+            "cancelled": self._cancel.is_set(),
+            "seconds": time.perf_counter() - t0,
+        }))
+        return results
+
+    def start(self, games: list[dict]) -> None:
+        """Nieblokujące – run() w wątku w tle."""
+        self._thread = threading.Thread(target=self.run, args=(games,), daemon=True)
+        self._thread.start()
+
+    def poll(self, handler: Callable[[str, dict], None], max_events: int = 50) -> bool:
+        """Obsługuje zebrane zdarzenia (w wątku UI). Zwraca False po zdarzeniu "done"."""
+        for _ in range(max_events):
+            try:
+                kind, data = self.events.get_nowait()
+            except queue.Empty:
+                break
+            handler(kind, data)
+            if kind == "done":
+                return False
+        return True
@@ -0,0 +1,183 @@
+# thumbnail_cache.py – trwały cache miniatur kart sklepu + prebuild z linii poleceń
+#
+#   python thumbnail_cache.py                 # wszystkie obrazy z ASSETS_DIR i game.image_url
+#   python thumbnail_cache.py --workers 8 --size 220x124
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Optional
+
+from PIL import Image
+
+from mapingURL import ASSETS_DIR, BASE_DIR
+
+THUMB_DIR = BASE_DIR / ".thumb_cache"
+THUMB_BG = "#0A0A1A"
+DEFAULT_SIZE = (220, 124)   # = IMG_W x IMG_H w shop_interface
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".heic", ".avif"}
+
+
+def register_image_plugins() -> None:
+    """Opcjonalne dekodery HEIF/AVIF dla Pillow – w sklepie i w każdym procesie prebuild."""
+    try:
+        import pillow_heif
+        pillow_heif.register_heif_opener()  # HEIF/HEIC/AVIF
+    except Exception:
+        pass
+    try:
+        import pillow_avif  # sam import rejestruje plugin AVIF dla Pillow
+    except Exception:
+        pass
+
+
+def supported_exts() -> set[str]:
+    """IMAGE_EXTS, które Pillow potrafi otworzyć (bez pluginu .heic/.avif odpadają)."""
+    register_image_plugins()
+    return {ext for ext in IMAGE_EXTS if ext in Image.registered_extensions()}
+
+
+def make_thumbnail(img: Image.Image, w: int, h: int) -> Image.Image:
+    """Miniatura wyśrodkowana na tle karty (tak samo jak w sklepie)."""
+    img = img.convert("RGB")
+    img.thumbnail((w, h), Image.LANCZOS)
+    bg = Image.new("RGB", (w, h), THUMB_BG)
+    x = (w - img.width) // 2
+    y = (h - img.height) // 2
+    bg.paste(img, (x, y))
+    return bg
+
+
+def thumb_path(src: str, w: int, h: int) -> Optional[Path]:
+    """Ścieżka miniatury dla pliku lokalnego; klucz = ścieżka + mtime + rozmiar docelowy."""
+    try:
+        st = os.stat(src)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(src)}|{st.st_mtime_ns}|{st.st_size}|{w}x{h}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return THUMB_DIR / digest[:2] / f"{digest}.png"
+
+
+def load_thumbnail(src: str, w: int, h: int) -> Optional[Image.Image]:
+    path = thumb_path(src, w, h)
+    if path is None or not path.is_file():
+        return None
+    try:
+        with Image.open(path) as img:
+            img.load()
+            return img.convert("RGB") if img.mode != "RGB" else img.copy()
+    except Exception:
+        return None
+
+
+def save_thumbnail(src: str, thumb: Image.Image, w: int, h: int) -> Optional[Path]:
+    path = thumb_path(src, w, h)
+    if path is None:
+        return None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        thumb.save(tmp, format="PNG", optimize=False)
+        os.replace(tmp, path)   # atomowo – równoległe procesy nie zobaczą połówki pliku
+        return path
+    except OSError:
+        return None
+
+
+def build_thumbnail(src: str, w: int, h: int, force: bool = False) -> tuple[str, str]:
+    """Zwraca (src, status) – status: 'ok' | 'cached' | 'error: ...'."""
+    if not force:
+        path = thumb_path(src, w, h)
+        if path is not None and path.is_file():
+            return src, "cached"
+    try:
+        with Image.open(src) as img:
+            thumb = make_thumbnail(img, w, h)
+        if save_thumbnail(src, thumb, w, h) is None:
+            return src, "error: nie udało się zapisać miniatury"
+        return src, "ok"
+    except Exception as e:
+        return src, f"error: {e}"
+
+
+# === Prebuild ===
+def _asset_files() -> list[str]:
+    if not ASSETS_DIR.exists():
+        return []
+    exts = supported_exts()
+    skipped = sorted(IMAGE_EXTS - exts)
+    if skipped:
+        print(f"[THUMBS] Brak dekodera dla {', '.join(skipped)} (pillow_heif / pillow_avif) – pomijam te pliki")
+    return sorted(p.as_posix() for p in ASSETS_DIR.iterdir()
+                  if p.is_file() and p.suffix.lower() in exts)
+
+
+def _db_image_paths() -> list[str]:
+    try:
+        from database_connection import with_db_connection
+        with with_db_connection() as (conn, cursor):
+            cursor.execute("SELECT DISTINCT image_url FROM game WHERE image_url IS NOT NULL")
+            rows = cursor.fetchall()
+    except Exception as e:
+        print(f"[THUMBS] Pomijam game.image_url (baza niedostępna): {e}")
+        return []
+    paths = []
+    for (url,) in rows:
+        url = (url or "").strip()
+        if url and not url.startswith(("http://", "https://")) and os.path.isfile(url):
+            paths.append(url)
+    return paths
+
+
+def prebuild(sources: Iterable[str], w: int, h: int, workers: Optional[int] = None,
+             force: bool = False) -> dict:
+    sources = sorted(set(sources))
+    counts = {"ok": 0, "cached": 0, "error": 0}
+    if not sources:
+        return counts
+
+    # procesy robocze nie dziedziczą rejestracji pluginów (spawn) – każdy rejestruje je sam
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=register_image_plugins) as pool:
+        futures = [pool.submit(build_thumbnail, s, w, h, force) for s in sources]
+        for fut in as_completed(futures):
+            src, status = fut.result()
+            if status.startswith("error"):
+                counts["error"] += 1
+                print(f"[THUMBS] {src} -> {status}")
+            else:
+                counts[status] += 1
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generuje miniatury kart sklepu do trwałego cache.")
+    parser.add_argument("--size", default=f"{DEFAULT_SIZE[0]}x{DEFAULT_SIZE[1]}", help="WxH, domyślnie 220x124")
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--force", action="store_true", help="przelicz także istniejące miniatury")
+    parser.add_argument("--no-db", action="store_true", help="nie czytaj game.image_url z bazy")
+    args = parser.parse_args(argv)
+
+    try:
+        w, h = (int(v) for v in args.size.lower().split("x"))
+    except ValueError:
+        parser.error("--size musi mieć postać WxH, np. 220x124")
+
+    sources = _asset_files()
+    if not args.no_db:
+        sources += _db_image_paths()
+
+    t0 = time.perf_counter()
+    counts = prebuild(sources, w, h, workers=args.workers, force=args.force)
+    dt = time.perf_counter() - t0
+    print(f"[THUMBS] {w}x{h}: nowe {counts['ok']}, z cache {counts['cached']}, "
+          f"błędy {counts['error']} – {dt:.2f}s -> {THUMB_DIR}")
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
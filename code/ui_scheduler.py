@@ -0,0 +1,336 @@
+# ui_scheduler.py – planowanie przerysowań i ładowania danych w pętli Tk (panel analiz, sklep)
+#   CancelToken        – znacznik jednego wywołania; nowszy wybór unieważnia starszy,
+#   SelectionDebouncer – zdarzenia <<ListboxSelect>> zbierane przez krótką chwilę i
+#                        rysowane raz, dla ostatniego stanu listy,
+#   TaskExecutor       – pobieranie danych (SQL, sieć) w puli wątków; wynik wraca do pętli
+#                        Tk i dopiero tam jest rysowany,
+#   LoadingIndicator   – napis "Ładowanie..." nad panelem, gdy zadanie trwa dłużej.
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence
+
+SELECT_DEBOUNCE_MS = 150   # Shift+klik po 50 pozycjach to seria zdarzeń w kilkadziesiąt ms
+TASK_WORKERS = 4           # równoległe zapytania panelu (pula połączeń MySQL i tak je ogranicza)
+TASK_POLL_MS = 25          # jak często pętla Tk odbiera gotowe wyniki, gdy coś trwa
+LOADING_DELAY_MS = 200     # krótsze ładowanie nie miga napisem
+
+_UNSET = object()
+
+
+class CancelToken:
+    """Anulowanie jest jednokierunkowe; callbacki z on_cancel() wołane są raz (także od razu, gdy już po)."""
+
+    def __init__(self):
+        self._cancelled = False
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:
+                pass
+
+    def on_cancel(self, fn: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(fn)
+                return
+        fn()
+
+
+class SelectionDebouncer:
+    """
+    Wywołanie (np. jako handler <<ListboxSelect>>) tylko odkłada rysowanie o `delay_ms`;
+    każde kolejne zdarzenie w tym czasie przesuwa termin. Po ciszy read_state() odczytuje
+    bieżący stan listy i render(state, token) jest wołany raz – pośrednie wybory przepadają.
+
+    - stan None oznacza "nic do narysowania",
+    - stan równy ostatnio narysowanemu (i nieanulowanemu) nie jest rysowany ponownie,
+    - nowy render anuluje token poprzedniego – ładowanie danych, które jeszcze trwa,
+      sprawdza token.cancelled i nie rysuje nieaktualnego wyniku.
+    """
+
+    def __init__(self, widget, read_state: Callable[[], Any], render: Callable[[Any, CancelToken], None],
+                 delay_ms: int = SELECT_DEBOUNCE_MS):
+        self.widget = widget
+        self.read_state = read_state
+        self.render = render
+        self.delay_ms = delay_ms
+        self.events = 0
+        self.renders = 0
+        self._after_id: Optional[str] = None
+        self._token: Optional[CancelToken] = None
+        self._last_state = _UNSET
+        widget.bind("<Destroy>", lambda e: self.cancel() if e.widget is widget else None, add="+")
+
+    def __call__(self, _event=None) -> None:
+        self.events += 1
+        self._cancel_pending()
+        try:
+            self._after_id = self.widget.after(self.delay_ms, self._fire)
+        except Exception:
+            self._after_id = None   # widżet już zniszczony
+
+    def _cancel_pending(self) -> None:
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _fire(self) -> None:
+        self._after_id = None
+        state = self.read_state()
+        if state is None:
+            return
+        if state == self._last_state and self._token is not None and not self._token.cancelled:
+            return
+        if self._token is not None:
+            self._token.cancel()
+        self._token = token = CancelToken()
+        self._last_state = state
+        self.renders += 1
+        self.render(state, token)
+
+    def flush(self) -> None:
+        """Rysuje od razu (pierwszy wykres po zbudowaniu panelu albo zaległe zdarzenie)."""
+        self._cancel_pending()
+        self._fire()
+
+    def cancel(self) -> None:
+        """Panel znika: zaległe rysowanie i trwające ładowanie przestają się liczyć."""
+        self._cancel_pending()
+        if self._token is not None:
+            self._token.cancel()
+        self._last_state = _UNSET
+
+    @property
+    def token(self) -> Optional[CancelToken]:
+        return self._token
+
+
+def selected_items(listbox, fallback: Optional[Sequence[str]] = None) -> Optional[list[str]]:
+    """Zaznaczone pozycje listy wielokrotnego wyboru; bez zaznaczenia – fallback (np. wszystkie)."""
+    selected = [listbox.get(i) for i in listbox.curselection()]
+    if selected:
+        return selected
+    return list(fallback) if fallback else None
+
+
+def selected_item(listbox) -> Optional[str]:
+    sel = listbox.curselection()
+    return listbox.get(sel[0]) if sel else None
+
+
+def bind_listbox_select(listbox, read_state: Callable[[], Any], render: Callable[[Any, CancelToken], None],
+                        delay_ms: int = SELECT_DEBOUNCE_MS) -> SelectionDebouncer:
+    debouncer = SelectionDebouncer(listbox, read_state, render, delay_ms)
+    listbox.bind("<<ListboxSelect>>", debouncer)
+    return debouncer
+
+
+# === Zadania w tle ===
+class LoadingIndicator:
+    """
+    Napis na środku `master` pokazywany z opóźnieniem `delay_ms`. start()/stop() liczą
+    trwające zadania – napis znika po ostatnim. Etykieta jest tworzona na nowo, gdy panel
+    wyczyścił swoje dzieci.
+    """
+
+    def __init__(self, master, text: str = "Ładowanie danych...", delay_ms: int = LOADING_DELAY_MS,
+                 bg: str = "#1A0033", fg: str = "white", font=("Consolas", 12)):
+        self.master = master
+        self.text = text
+        self.delay_ms = delay_ms
+        self.label_kw = {"bg": bg, "fg": fg, "font": font}
+        self.active = 0
+        self._label = None
+        self._after_id: Optional[str] = None
+
+    def start(self) -> None:
+        self.active += 1
+        if self.active == 1:
+            try:
+                self._after_id = self.master.after(self.delay_ms, self._show)
+            except Exception:
+                self._after_id = None
+
+    def stop(self) -> None:
+        self.active = max(0, self.active - 1)
+        if self.active:
+            return
+        if self._after_id is not None:
+            try:
+                self.master.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        try:
+            if self._label is not None and self._label.winfo_exists():
+                self._label.place_forget()
+        except Exception:
+            pass
+
+    def _show(self) -> None:
+        self._after_id = None
+        if not self.active:
+            return
+        try:
+            if self._label is None or not self._label.winfo_exists():
+                self._label = tk.Label(self.master, text=self.text, padx=12, pady=6, **self.label_kw)
+            self._label.place(relx=0.5, rely=0.5, anchor="center")
+            self._label.lift()
+        except Exception:
+            pass
+
+
+class _Task:
+    __slots__ = ("future", "widget", "render", "on_error", "token", "indicator")
+
+    def __init__(self, future, widget, render, on_error, token, indicator):
+        self.future = future
+        self.widget = widget
+        self.render = render
+        self.on_error = on_error
+        self.token = token
+        self.indicator = indicator
+
+
+def _widget_alive(widget) -> bool:
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
+
+
+class TaskExecutor:
+    """
+    submit(widget, load, render) – load() idzie do puli wątków (bez dotykania Tk), a gotowy
+    wynik odbiera pętla Tk (after() co `poll_ms`, tylko gdy coś trwa) i woła render(wynik)
+    w wątku głównym. Wynik jest porzucany, gdy token anulowano (nowszy wybór) albo widżet
+    już nie istnieje. Anulowanie przed startem zdejmuje zadanie z kolejki puli; zapytania,
+    które już trwa, nie da się przerwać – jego wynik po prostu przepada.
+
+    submit() i render() – tylko z wątku Tk.
+    """
+
+    def __init__(self, workers: int = TASK_WORKERS, poll_ms: int = TASK_POLL_MS):
+        self.workers = workers
+        self.poll_ms = poll_ms
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._done: "queue.Queue[_Task]" = queue.Queue()
+        self._pending = 0
+        self._pump_widget = None
+        self._pump_id: Optional[str] = None
+        self.submitted = 0
+        self.completed = 0
+        self.discarded = 0
+
+    def submit(self, widget, load: Callable[[], Any], render: Callable[[Any], None],
+               token: Optional[CancelToken] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None,
+               indicator: Optional[LoadingIndicator] = None) -> Future:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ui-task")
+        token = token or CancelToken()
+        if indicator is not None:
+            indicator.start()
+        future = self._pool.submit(load)
+        task = _Task(future, widget, render, on_error, token, indicator)
+        token.on_cancel(future.cancel)
+        self.submitted += 1
+        self._pending += 1
+        future.add_done_callback(lambda _f: self._done.put(task))
+        self._pump_widget = widget.winfo_toplevel()
+        self._schedule_pump()
+        return future
+
+    def _schedule_pump(self) -> None:
+        if self._pump_id is not None:
+            return
+        try:
+            self._pump_id = self._pump_widget.after(self.poll_ms, self._pump)
+        except Exception:
+            self._pump_id = None   # okno zamknięte
+
+    def _pump(self) -> None:
+        self._pump_id = None
+        while True:
+            try:
+                task = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            self._finish(task)
+        if self._pending > 0:
+            self._schedule_pump()
+
+    def _finish(self, task: _Task) -> None:
+        if task.indicator is not None:
+            task.indicator.stop()
+        future = task.future
+        if future.cancelled() or task.token.cancelled or not _widget_alive(task.widget):
+            self.discarded += 1
+            return
+        try:
+            error = future.exception()
+            if error is None:
+                task.render(future.result())
+            elif task.on_error is not None:
+                task.on_error(error)
+            else:
+                print(f"[TASKS] Błąd ładowania danych: {error}")
+        except Exception as e:
+            print(f"[TASKS] Błąd przy rysowaniu: {e}")
+        self.completed += 1
+
+    def stats(self) -> dict:
+        return {"submitted": self.submitted, "completed": self.completed,
+                "discarded": self.discarded, "pending": self._pending}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[TaskExecutor] = None
+
+
+def get_task_executor() -> TaskExecutor:
+    global _executor
+    if _executor is None:
+        _executor = TaskExecutor()
+    return _executor
+
+
+def run_in_background(widget, load: Callable[[], Any], render: Callable[[Any], None],
+                      token: Optional[CancelToken] = None,
+                      on_error: Optional[Callable[[BaseException], None]] = None,
+                      indicator: Optional[LoadingIndicator] = None) -> Future:
+    return get_task_executor().submit(widget, load, render, token=token, on_error=on_error, indicator=indicator)
+
+
+def shutdown_task_executor() -> None:
+    if _executor is not None:
+        _executor.shutdown()
+
+
+def log_task_stats(log: Callable[[str], None] = print) -> None:
+    s = get_task_executor().stats()
+    log(f"[TASKS] zlecone {s['submitted']}, narysowane {s['completed']}, porzucone {s['discarded']}")